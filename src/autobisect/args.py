@@ -5,12 +5,16 @@
 import itertools
 import os
 import platform as std_platform
-from argparse import ArgumentParser, Namespace
+from argparse import REMAINDER, ArgumentParser, Namespace
 from logging import CRITICAL, DEBUG, ERROR, INFO, WARNING
 from pathlib import Path
+from typing import List
 
 from fuzzfetch import Fetcher, Platform
 
+from autobisect.config import APP_SOCKET
+from autobisect.scenarios import DEFAULT_TIME_SCALE, SCENARIOS, STRATEGIES
+
 CPU_CHOICES = sorted(
     set(
         itertools.chain(
@@ -29,6 +33,27 @@ LOG_LEVELS = {
 }
 
 
+def collect_testcases(path: Path) -> List[Path]:
+    """
+    Enumerate the testcases of a batch.
+
+    :param path: A directory containing one testcase per file or a manifest listing
+        one testcase path per line, relative to the manifest.
+    :returns: The testcase paths.
+    """
+    if path.is_dir():
+        return sorted(
+            p for p in path.iterdir() if p.is_file() and not p.name.startswith(".")
+        )
+
+    testcases = []
+    for line in path.read_text().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            testcases.append((path.parent / line).expanduser())
+    return testcases
+
+
 class BisectCommonArgs:
     """Arguments common to all bisection targets."""
 
@@ -41,7 +66,8 @@ class BisectCommonArgs:
         self.parser.add_argument(
             "testcase",
             type=Path,
-            help="Path to testcase",
+            help="Path to testcase (or to the testcase directory or manifest with "
+            "--batch)",
         )
 
         self.parser.add_argument(
@@ -87,6 +113,91 @@ class BisectCommonArgs:
             action="store_true",
             help="Identify fix date",
         )
+        bisection_args.add_argument(
+            "--jobs",
+            type=int,
+            default=1,
+            help="Number of builds to evaluate concurrently (default: %(default)s)",
+        )
+        bisection_args.add_argument(
+            "--prefetch",
+            action="store_true",
+            help="Resolve and download the next candidate builds while the current build "
+            "is tested",
+        )
+        bisection_args.add_argument(
+            "--no-result-cache",
+            action="store_false",
+            dest="result_cache",
+            help="Re-evaluate builds even if a previous result exists or they recently "
+            "failed to launch",
+        )
+        bisection_args.add_argument(
+            "--result-max-age",
+            type=int,
+            help="Discard cached results older than the supplied number of days",
+        )
+        bisection_args.add_argument(
+            "--resume",
+            metavar="SESSION",
+            help="Continue an interrupted bisection session",
+        )
+        bisection_args.add_argument(
+            "--batch",
+            action="store_true",
+            help="Bisect every testcase within the testcase directory or manifest, "
+            "sharing downloaded builds",
+        )
+        bisection_args.add_argument(
+            "--probabilistic",
+            action="store_true",
+            help="Tolerate intermittent testcases by weighing every build",
+        )
+        bisection_args.add_argument(
+            "--confidence",
+            type=float,
+            default=0.95,
+            help="Target confidence for probabilistic bisection and adaptive repeats "
+            "(default: %(default)s)",
+        )
+        bisection_args.add_argument(
+            "--sensitivity",
+            type=float,
+            default=0.5,
+            help="Estimated probability that a crashing build reproduces the crash "
+            "when evaluated (default: %(default)s)",
+        )
+        bisection_args.add_argument(
+            "--adaptive-repeat",
+            action="store_true",
+            help="Measure the reproduction rate using up to --repeat runs and only "
+            "repeat evaluations as often as needed",
+        )
+        bisection_args.add_argument(
+            "--pivot-window",
+            type=float,
+            default=0.1,
+            help="Fraction of the build range around the midpoint within which "
+            "cached builds are preferred (default: %(default)s)",
+        )
+        bisection_args.add_argument(
+            "--trace",
+            type=Path,
+            help="Write the duration of every bisection phase to the supplied file, "
+            "as JSON lines if it ends in .jsonl or as a Chrome trace otherwise",
+        )
+        bisection_args.add_argument(
+            "--metrics",
+            type=Path,
+            help="Write probe, download and cache metrics to the supplied file in "
+            "the Prometheus text format once the bisection completes",
+        )
+        bisection_args.add_argument(
+            "--record",
+            type=Path,
+            help="Record build lookups, downloads and evaluations to the supplied "
+            "file so that the bisection can be replayed offline",
+        )
 
         target_group = self.parser.add_argument_group("Target Arguments")
         target_group.add_argument(
@@ -206,8 +317,25 @@ class BisectCommonArgs:
         :param args: Parsed arguments.
         :raises SystemExit: If sanity check fails.
         """
+        if args.batch and (
+            args.jobs > 1 or args.prefetch or args.probabilistic or args.resume
+        ):
+            self.parser.error(
+                "--batch cannot be combined with --jobs, --prefetch, --probabilistic "
+                "or --resume"
+            )
+
         args.testcase = args.testcase.expanduser()
-        if not args.testcase.is_file() or not os.access(args.testcase, os.R_OK):
+        if args.batch:
+            if not args.testcase.exists() or not os.access(args.testcase, os.R_OK):
+                self.parser.error("Cannot access testcase!")
+            args.testcases = collect_testcases(args.testcase)
+            if not args.testcases:
+                self.parser.error("No testcases found in batch!")
+            for testcase in args.testcases:
+                if not testcase.is_file() or not os.access(testcase, os.R_OK):
+                    self.parser.error(f"Cannot access testcase {testcase}!")
+        elif not args.testcase.is_file() or not os.access(args.testcase, os.R_OK):
             self.parser.error("Cannot access testcase!")
 
         log_level = LOG_LEVELS.get(args.log_level.upper(), None)
@@ -215,11 +343,44 @@ class BisectCommonArgs:
             self.parser.error(f"Invalid log-level {args.log_level!r}")
         args.log_level = log_level
 
+        if args.jobs < 1:
+            self.parser.error("--jobs must be at least 1")
+
+        if args.result_max_age is not None and args.result_max_age <= 0:
+            self.parser.error("--result-max-age must be positive")
+
+        if args.probabilistic and args.jobs > 1:
+            self.parser.error("--probabilistic cannot be combined with --jobs")
+
+        if not 0 < args.confidence < 1:
+            self.parser.error("--confidence must be between 0 and 1")
+
+        if not 0 < args.sensitivity <= 1:
+            self.parser.error("--sensitivity must be between 0 and 1")
+
+        if not 0 <= args.pivot_window <= 0.5:
+            self.parser.error("--pivot-window must be between 0 and 0.5")
+
         if args.config is not None:
             args.config = args.config.expanduser()
             if not args.config.is_file() or not os.access(args.config, os.R_OK):
                 self.parser.error("Cannot access configuration file!")
 
+        if args.trace is not None:
+            args.trace = args.trace.expanduser()
+            if not args.trace.parent.is_dir():
+                self.parser.error("Cannot create trace file!")
+
+        if args.metrics is not None:
+            args.metrics = args.metrics.expanduser()
+            if not args.metrics.parent.is_dir():
+                self.parser.error("Cannot create metrics file!")
+
+        if args.record is not None:
+            args.record = args.record.expanduser()
+            if not args.record.parent.is_dir():
+                self.parser.error("Cannot create recording file!")
+
         if args.branch is None:
             args.branch = "central"
         elif args.branch.startswith("esr"):
@@ -227,3 +388,220 @@ class BisectCommonArgs:
 
         if args.target == "firefox" and args.fuzzilli:
             self.parser.error("Fuzzilli builds are not available for firefox")
+
+
+class ServeArgs:
+    """Arguments of the bisection server."""
+
+    def __init__(self, parser: ArgumentParser):
+        """
+        Add server args to parser.
+        :param parser: Base parser.
+        """
+        self.parser = parser
+        self.parser.add_argument(
+            "--log-level",
+            default="INFO",
+            help=f"Configure console logging. Options: "
+            f"{', '.join(k for k, v in sorted(LOG_LEVELS.items(), key=lambda x: x[1]))} (default: %(default)s)",
+        )
+        self.parser.add_argument(
+            "--socket",
+            type=Path,
+            default=APP_SOCKET,
+            help="Path of the Unix socket to listen on (default: %(default)s)",
+        )
+        self.parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of bisection jobs to run concurrently (default: %(default)s)",
+        )
+        self.parser.add_argument(
+            "--metrics-port",
+            type=int,
+            help="Expose probe, download and cache metrics of every job in the "
+            "Prometheus text format on the supplied local port",
+        )
+        self.parser.add_argument(
+            "--config",
+            type=Path,
+            help="Path to optional config file",
+        )
+
+    def sanity_check(self, args: Namespace) -> None:
+        """
+        Perform sanity checks.
+
+        :param args: Parsed arguments.
+        :raises SystemExit: If sanity check fails.
+        """
+        log_level = LOG_LEVELS.get(args.log_level.upper(), None)
+        if log_level is None:
+            self.parser.error(f"Invalid log-level {args.log_level!r}")
+        args.log_level = log_level
+
+        if args.workers < 1:
+            self.parser.error("--workers must be at least 1")
+
+        if args.metrics_port is not None and not 0 < args.metrics_port < 65536:
+            self.parser.error("--metrics-port must be between 1 and 65535")
+
+        args.socket = args.socket.expanduser()
+        if args.config is not None:
+            args.config = args.config.expanduser()
+            if not args.config.is_file() or not os.access(args.config, os.R_OK):
+                self.parser.error("Cannot access configuration file!")
+
+
+class SubmitArgs:
+    """Arguments for submitting a job to the bisection server."""
+
+    def __init__(self, parser: ArgumentParser):
+        """
+        Add client args to parser.
+        :param parser: Base parser.
+        """
+        self.parser = parser
+        self.parser.add_argument(
+            "--socket",
+            type=Path,
+            default=APP_SOCKET,
+            help="Path of the server socket (default: %(default)s)",
+        )
+        self.parser.add_argument(
+            "job",
+            nargs=REMAINDER,
+            help="Bisection arguments, starting with the target (firefox or js)",
+        )
+
+    def sanity_check(self, args: Namespace) -> None:
+        """
+        Perform sanity checks.
+
+        :param args: Parsed arguments.
+        :raises SystemExit: If sanity check fails.
+        """
+        if not args.job or args.job[0] not in ("firefox", "js"):
+            self.parser.error("A firefox or js bisection must be supplied")
+
+        args.socket = args.socket.expanduser()
+        args.log_level = INFO
+
+
+class ReplayArgs:
+    """Arguments for replaying a recorded bisection."""
+
+    def __init__(self, parser: ArgumentParser):
+        """
+        Add replay args to parser.
+        :param parser: Base parser.
+        """
+        self.parser = parser
+        self.parser.add_argument("recording", type=Path, help="Recorded bisection")
+        self.parser.add_argument(
+            "--log-level",
+            default="INFO",
+            help=f"Configure console logging. Options: "
+            f"{', '.join(k for k, v in sorted(LOG_LEVELS.items(), key=lambda x: x[1]))} (default: %(default)s)",
+        )
+        timing = self.parser.add_mutually_exclusive_group()
+        timing.add_argument(
+            "--time-scale",
+            type=float,
+            default=1.0,
+            help="Real seconds slept per recorded second (default: %(default)s)",
+        )
+        timing.add_argument(
+            "--instant",
+            action="store_const",
+            const=0.0,
+            dest="time_scale",
+            help="Replay without waiting for recorded lookups, downloads and "
+            "evaluations",
+        )
+
+    def sanity_check(self, args: Namespace) -> None:
+        """
+        Perform sanity checks.
+
+        :param args: Parsed arguments.
+        :raises SystemExit: If sanity check fails.
+        """
+        log_level = LOG_LEVELS.get(args.log_level.upper(), None)
+        if log_level is None:
+            self.parser.error(f"Invalid log-level {args.log_level!r}")
+        args.log_level = log_level
+
+        if args.time_scale < 0:
+            self.parser.error("--time-scale must not be negative")
+
+        args.recording = args.recording.expanduser()
+        if not args.recording.is_file() or not os.access(args.recording, os.R_OK):
+            self.parser.error("Cannot access recording!")
+
+
+class SimulateArgs:
+    """Arguments of the offline bisection simulator."""
+
+    def __init__(self, parser: ArgumentParser):
+        """
+        Add simulator args to parser.
+        :param parser: Base parser.
+        """
+        self.parser = parser
+        self.parser.add_argument(
+            "--log-level",
+            default="WARN",
+            help=f"Configure console logging. Options: "
+            f"{', '.join(k for k, v in sorted(LOG_LEVELS.items(), key=lambda x: x[1]))} (default: %(default)s)",
+        )
+        self.parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=sorted(SCENARIOS),
+            help="Scenario to simulate, may be repeated (default: all)",
+        )
+        self.parser.add_argument(
+            "--strategy",
+            action="append",
+            choices=list(STRATEGIES),
+            help="Strategy to compare, may be repeated (default: all)",
+        )
+        self.parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed of flaky results and random pivots (default: %(default)s)",
+        )
+        self.parser.add_argument(
+            "--time-scale",
+            type=float,
+            default=DEFAULT_TIME_SCALE,
+            help="Real seconds slept per simulated second (default: %(default)s)",
+        )
+        self.parser.add_argument(
+            "--json",
+            type=Path,
+            help="Write the results to the supplied file as JSON",
+        )
+
+    def sanity_check(self, args: Namespace) -> None:
+        """
+        Perform sanity checks.
+
+        :param args: Parsed arguments.
+        :raises SystemExit: If sanity check fails.
+        """
+        log_level = LOG_LEVELS.get(args.log_level.upper(), None)
+        if log_level is None:
+            self.parser.error(f"Invalid log-level {args.log_level!r}")
+        args.log_level = log_level
+
+        if args.time_scale <= 0:
+            self.parser.error("--time-scale must be positive")
+
+        if args.json is not None:
+            args.json = args.json.expanduser()
+            if not args.json.parent.is_dir():
+                self.parser.error("Cannot create results file!")
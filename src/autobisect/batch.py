@@ -0,0 +1,310 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+# pylint: disable=protected-access
+import logging
+from typing import Dict, List, Optional, Tuple, Union
+
+from fuzzfetch import Fetcher
+
+from . import metrics
+from .bisect import BisectionResult, Bisector, VerificationStatus
+from .build_manager import BuildManagerException
+from .builds import BuildDescriptor, BuildRange
+from .evaluators import EvaluatorResult
+
+LOG = logging.getLogger(__name__)
+
+
+class MultiBisector(object):
+    """
+    Bisect several testcases against the same builds.
+
+    Every testcase keeps its own boundaries and build range.  Each step probes the
+    build wanted by most of the active searches and evaluates every interested
+    testcase while the build is extracted.
+    """
+
+    def __init__(self, bisectors: List[Bisector]) -> None:
+        """
+        Instantiate a batch bisection.
+
+        :param bisectors: One bisector per testcase, all sharing the branch, flags,
+            platform and boundaries.
+        """
+        assert bisectors, "At least one testcase is required"
+        self.bisectors = bisectors
+        self.build_manager = bisectors[0].build_manager
+        self.target = bisectors[0].evaluator.target
+        # Searches with the same boundaries share the pushlog
+        for bisector in bisectors[1:]:
+            bisector._pushes = bisectors[0]._pushes
+
+        self._results: Dict[Bisector, BisectionResult] = {}
+        # Builds found for range entries, before checking each search's boundaries
+        self._found: Dict[BuildDescriptor, Optional[Fetcher]] = {}
+        self.extractions = 0
+        self.evaluations = 0
+
+    @staticmethod
+    def _name(bisector: Bisector) -> str:
+        """Return the testcase name used in log messages."""
+        return bisector.evaluator.testcase.name
+
+    def _fail(self, bisector: Bisector, status: VerificationStatus) -> None:
+        """
+        Stop the search of a testcase whose boundaries could not be verified.
+
+        :param bisector: The bisector of the testcase.
+        :param status: The verification status.
+        """
+        LOG.critical("%s: %s", self._name(bisector), status.message)
+        self._results[bisector] = BisectionResult(
+            BisectionResult.FAILED,
+            bisector.start,
+            bisector.end,
+            bisector.branch,
+            status.message,
+        )
+
+    @staticmethod
+    def _measures(bisector: Bisector, boundary: Optional[str]) -> bool:
+        """
+        Whether the reproduction rate of a testcase is measured on a boundary.
+
+        :param bisector: The bisector of the testcase.
+        :param boundary: "start", "end" or None if the build isn't a boundary.
+        """
+        if boundary is None or not bisector.adaptive_repeat:
+            return False
+        # The crashing boundary is the end one unless looking for a fix
+        return (boundary == "end") != bisector.find_fix
+
+    def evaluate(
+        self,
+        build: Fetcher,
+        bisectors: List[Bisector],
+        boundary: Optional[str] = None,
+    ) -> Dict[Bisector, EvaluatorResult]:
+        """
+        Evaluate several testcases against a build extracted only once.
+
+        :param build: The build to evaluate.
+        :param bisectors: The bisectors of the interested testcases.
+        :param boundary: "start" or "end" when verifying the boundaries.
+        :returns: The result of each testcase.
+        """
+        LOG.info(
+            "Testing build %s (%s) with %d testcase(s)",
+            build.changeset,
+            build.id,
+            len(bisectors),
+        )
+        results: Dict[Bisector, EvaluatorResult] = {}
+        pending = []
+        for bisector in bisectors:
+            if self._measures(bisector, boundary):
+                pending.append(bisector)
+                continue
+            cached = bisector.cached_result(build)
+            if cached is not None:
+                results[bisector] = cached
+            else:
+                pending.append(bisector)
+
+        # Boundaries are always launched, other builds are skipped by the testcases
+        # whose settings recently failed to launch them
+        if boundary is None:
+            broken = [b for b in pending if b.known_broken(build)]
+            results.update((b, EvaluatorResult.BUILD_FAILED) for b in broken)
+            pending = [b for b in pending if b not in broken]
+        if pending:
+            self._evaluate(build, pending, boundary, results)
+
+        for result in results.values():
+            metrics.PROBES.inc(result=result.name.lower())
+        return results
+
+    def _evaluate(
+        self,
+        build: Fetcher,
+        pending: List[Bisector],
+        boundary: Optional[str],
+        results: Dict[Bisector, EvaluatorResult],
+    ) -> None:
+        """Extract the build once and evaluate every pending testcase against it."""
+        try:
+            with self.build_manager.get_build(build, self.target) as path:
+                self.extractions += 1
+                for bisector in pending:
+                    LOG.info("> Evaluating %s", self._name(bisector))
+                    if self._measures(bisector, boundary):
+                        results[bisector] = bisector.measure(build, path)
+                    else:
+                        results[bisector] = bisector.evaluate(build, path)
+                    self.evaluations += 1
+        except BuildManagerException:
+            for bisector in pending:
+                results.setdefault(bisector, EvaluatorResult.BUILD_FAILED)
+
+    def verify_bounds(self) -> List[Bisector]:
+        """
+        Verify the boundaries of every testcase.
+
+        :returns: The bisectors of the testcases whose boundaries were verified.
+        """
+        LOG.info("Attempting to verify boundaries...")
+        active = list(self.bisectors)
+        for bisector in active:
+            bisector.record_session()
+
+        start = self.evaluate(active[0].start, active, boundary="start")
+        for bisector, result in start.items():
+            status = bisector.verify_start(result)
+            if status != VerificationStatus.SUCCESS:
+                self._fail(bisector, status)
+                active.remove(bisector)
+
+        if active:
+            end = self.evaluate(active[0].end, active, boundary="end")
+            for bisector, result in end.items():
+                status = bisector.verify_end(result)
+                if status != VerificationStatus.SUCCESS:
+                    self._fail(bisector, status)
+                    active.remove(bisector)
+
+        for bisector in active:
+            bisector._record("verified")
+
+        return active
+
+    @staticmethod
+    def select(
+        ranges: Dict[Bisector, BuildRange[BuildDescriptor]],
+    ) -> Tuple[BuildDescriptor, List[Bisector]]:
+        """
+        Select the build wanted by most searches.
+
+        Every search wants the builds within its pivot window, so searches whose
+        ranges overlap can share a probe even if their midpoints differ.
+
+        :param ranges: The non-empty build range of each active search.
+        :returns: The build to probe and the searches interested in it.
+        """
+        votes: Dict[BuildDescriptor, List[Bisector]] = {}
+        for bisector, build_range in ranges.items():
+            for index in bisector.pivot_candidates(build_range):
+                votes.setdefault(build_range[index], []).append(bisector)
+
+        # Ties are resolved in favor of the midpoint of the first search
+        return max(votes.items(), key=lambda item: len(item[1]))
+
+    def _enumerate(
+        self, name: str, phases: List[str], active: List[Bisector]
+    ) -> Dict[Bisector, BuildRange[BuildDescriptor]]:
+        """
+        Create the build range of every search taking part in a phase.
+
+        :param name: The phase.
+        :param phases: The current and remaining phases.
+        :param active: The bisectors of the active searches.
+        :returns: The build range of each search whose plan starts with the phase.
+        """
+        ranges: Dict[Bisector, BuildRange[BuildDescriptor]] = {}
+        shared: Dict[Tuple[str, str], BuildRange[BuildDescriptor]] = {}
+        for bisector in active:
+            plan = bisector._plan(phases)
+            if not plan or plan[0] != name:
+                continue
+
+            # Searches with the same boundaries share the enumeration
+            key = (bisector.start.changeset, bisector.end.changeset)
+            if key not in shared:
+                shared[key] = bisector.strategies()[name]()
+            ranges[bisector] = shared[key][:]
+            if bisector.journal is not None:
+                bisector.journal.record(
+                    "strategy",
+                    name=name,
+                    builds=[build.to_dict() for build in ranges[bisector].builds],
+                )
+
+        return ranges
+
+    def _bisect_phase(
+        self, ranges: Dict[Bisector, BuildRange[BuildDescriptor]]
+    ) -> None:
+        """
+        Reduce the build ranges of all searches taking part in a phase.
+
+        :param ranges: The build range of each search.
+        """
+        missing: List[Union[BuildDescriptor, Fetcher]] = []
+        while True:
+            ranges = {b: r for b, r in ranges.items() if r}
+            if not ranges:
+                break
+
+            entry, interested = self.select(ranges)
+            if entry not in self._found:
+                self._found[entry] = interested[0]._find(entry)
+            build = self._found[entry]
+            # Searches whose boundaries differ may reject the same build
+            accepted = [
+                b for b in interested if build and b._within_bounds(entry, build)
+            ]
+            rejected = [b for b in interested if b not in accepted]
+            if rejected and entry not in missing:
+                missing.append(entry)
+            for bisector in rejected:
+                build_range = ranges[bisector][:]
+                build_range.builds.remove(entry)
+                ranges[bisector] = build_range
+                bisector._checkpoint(build_range, entry, None)
+            if build is None or not accepted:
+                continue
+
+            for bisector, status in self.evaluate(build, accepted).items():
+                index = ranges[bisector].index(entry)
+                assert isinstance(index, int)
+                ranges[bisector] = bisector.update_range(
+                    status, build, index, ranges[bisector]
+                )
+                bisector._checkpoint(ranges[bisector], entry, status)
+
+        out_of_range = set().union(*(b._out_of_range for b in self.bisectors))
+        Bisector._log_missing(missing, out_of_range)
+
+    def bisect(self) -> List[BisectionResult]:
+        """
+        Bisect all testcases.
+
+        :returns: The bisection result of each testcase in the supplied order.
+        """
+        LOG.info("Begin batch bisection of %d testcase(s)...", len(self.bisectors))
+        LOG.info("> Start: %s", self.bisectors[0].start.changeset)
+        LOG.info("> End: %s", self.bisectors[0].end.changeset)
+
+        active = self.verify_bounds()
+        if active:
+            LOG.info("Verified boundaries of %d testcase(s)", len(active))
+            phases = list(active[0].strategies())
+            for index, name in enumerate(phases):
+                ranges = self._enumerate(name, phases[index:], active)
+                if ranges:
+                    LOG.info(
+                        "Bisecting %d testcase(s) using %s builds", len(ranges), name
+                    )
+                    self._bisect_phase(ranges)
+
+        for bisector in active:
+            self._results[bisector] = BisectionResult(
+                BisectionResult.SUCCESS, bisector.start, bisector.end, bisector.branch
+            )
+
+        LOG.info(
+            "Extracted %d build(s) for %d evaluation(s)",
+            self.extractions,
+            self.evaluations,
+        )
+        return [self._results[bisector] for bisector in self.bisectors]
@@ -1,13 +1,34 @@
 # This Source Code Form is subject to the terms of the Mozilla Public
 # License, v. 2.0. If a copy of the MPL was not distributed with this file,
 # You can obtain one at http://mozilla.org/MPL/2.0/.
+import contextvars
 import logging
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
 from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
-from typing import Generator, Optional, List, Union, TypeVar, Callable
+from typing import (
+    Any,
+    Generator,
+    Optional,
+    List,
+    Union,
+    TypeVar,
+    Callable,
+    Collection,
+    Dict,
+    Set,
+    Tuple,
+)
 
-import requests
 from fuzzfetch import (
     BuildFlags,
     BuildSearchOrder,
@@ -18,47 +39,55 @@ from fuzzfetch import (
     Product,
 )
 
+from . import metrics
 from .build_manager import BuildManager, BuildManagerException
-from .builds import BuildRange
+from .builds import BuildDescriptor, BuildRange
 from .evaluators import Evaluator, EvaluatorResult
+from .index import BuildIndex
+from .journal import BisectionJournal, JournalException
+from .pipeline import ProbePipeline
+from .planner import DAILY, PUSHDATE, TIMELINE, StrategyPlanner
+from .probabilistic import (
+    ProbabilisticBisection,
+    entropy,
+    required_repeats,
+    wilson_lower_bound,
+)
+from .resolver import resolve_concurrently
+from .recording import build_to_dict, is_recording, record
+from .results import ResultCache
+from .timeline import Push, build_timeline, get_pushes
+from .trace import span
 
 T = TypeVar("T")
 
 LOG = logging.getLogger(__name__)
 
+# Ranges spanning more days are reduced by the daily phase without consulting the
+# pushlog, which would otherwise be huge
+PUSHLOG_MAX_DAYS = 7
 
-def get_autoland_range(start: str, end: str) -> Union[List[str], None]:
-    """
-    Retrieve changeset from autoland within supplied boundary.
-
-    :param start: Starting revision.
-    :param end: Ending revision.
-    :return: List of changesets.
-    """
-    url = (
-        "https://hg.mozilla.org/mozilla-central/json-pushes"
-        f"?fromchange={start}&tochange={end}"
-    )
-    try:
-        data = requests.get(url, timeout=30)
-        data.raise_for_status()
-    except requests.exceptions.RequestException as exc:
-        LOG.error("Failed to retrieve autoland changeset %s", exc)
-        return None
-
-    json = data.json()
+# Cost estimates (in seconds) used until real timings are available
+DEFAULT_DOWNLOAD_COST = 60.0
+DEFAULT_EVALUATION_COST = 30.0
 
-    changesets = []
-    for push_id in json.keys():
-        changesets.extend(json[push_id]["changesets"])
+# Builds which fail to launch tend to come in runs, so the neighbours of a failed
+# build within this distance are suspected of being broken as well
+BROKEN_SPAN = 4
 
-    return changesets
+# Number of probes ahead whose builds are resolved speculatively, downloads are
+# only started for the builds which may be probed next
+SPECULATION_DEPTH = 2
 
 
 class StatusException(Exception):
     """Raised when an invalid status is supplied."""
 
 
+class ProbeCancelled(Exception):
+    """Raised when a probe is cancelled before the testcase is evaluated."""
+
+
 class VerificationStatus(Enum):
     """Class for storing build verification result."""
 
@@ -138,207 +167,978 @@ class Bisector(object):
         self,
         evaluator: Evaluator,
         branch: str,
-        start: Union[str, None],
-        end: Union[str, None],
+        start: Union[str, Fetcher, None],
+        end: Union[str, Fetcher, None],
         flags: BuildFlags,
         platform: Platform,
         find_fix: bool = False,
         config: Optional[Path] = None,
+        jobs: int = 1,
+        prefetch: bool = False,
+        result_cache: bool = True,
+        result_max_age: Optional[timedelta] = None,
+        resume: Optional[str] = None,
+        probabilistic: bool = False,
+        confidence: float = 0.95,
+        sensitivity: float = 0.5,
+        adaptive_repeat: bool = False,
+        pivot_window: float = 0.1,
+        build_manager: Optional[BuildManager] = None,
+        pushes: Optional[Dict[Tuple[str, str], Optional[List[Push]]]] = None,
     ):
         """
         Instantiate bisection object.
 
         :param evaluator: Object instance used to evaluate testcase.
         :param branch: Mozilla branch to use for finding builds.
-        :param start: Start revision, date, or buildid.
-        :param end: End revision, date, or buildid.
+        :param start: Start revision, date, buildid or an already resolved build.
+        :param end: End revision, date, buildid or an already resolved build.
         :param flags: Build flags (asan, tsan, debug, fuzzing, valgrind).
         :param platform: fuzzfetch.fetch.Platform instance.
         :param find_fix: Boolean identifying whether to find a fix or bisect bug.
         :param config: Path to config file.
+        :param jobs: Number of builds to evaluate concurrently.
+        :param prefetch: Download the candidates for the next probe in the background.
+        :param result_cache: Reuse results of previous evaluations of the testcase.
+        :param result_max_age: Discard cached results older than this.
+        :param resume: Identifier of an interrupted session to continue.
+        :param probabilistic: Locate the change using a posterior over all builds
+            rather than trusting every single pass.
+        :param confidence: Posterior probability at which probabilistic bisection
+            stops.
+        :param sensitivity: Probability that a single evaluation of a crashing build
+            reproduces the crash.
+        :param adaptive_repeat: Measure the reproduction rate on the crashing boundary
+            and only repeat evaluations as often as needed to reach the confidence.
+        :param pivot_window: Maximum distance from the midpoint, as a fraction of the
+            build range, at which a cheaper build may be probed instead.
+        :param build_manager: Build manager shared with other bisections.
+        :param pushes: Pushlog cache shared with other bisections.
         """
         self.evaluator: Evaluator = evaluator
         self.branch = branch
         self.platform: Platform = platform
         self.flags = flags
         self.find_fix = find_fix
+        self.jobs = jobs
+        self.probabilistic = probabilistic
+        self.confidence = confidence
+        self.sensitivity = sensitivity
+        self.adaptive_repeat = adaptive_repeat
+        self.pivot_window = pivot_window
+        self.planner = StrategyPlanner()
+        self._pushes = pushes if pushes is not None else {}
+        self._evaluation_times: List[float] = []
+        # Builds may be downloaded concurrently while only jobs are evaluated at once
+        self._evaluation_slots = threading.Semaphore(jobs)
+        # Likelihood of range entries being broken, based on failed neighbours
+        self._suspects: Dict[Any, float] = {}
+        # Entries whose build exists but was pushed outside of the boundaries
+        self._out_of_range: Set[BuildDescriptor] = set()
 
         # If no start date is supplied, default to the oldest available build
         max_days = 364 if evaluator.target == "firefox" else 89
         earliest = (datetime.utcnow() - timedelta(days=max_days)).strftime("%Y-%m-%d")
 
-        start_id = start if start else earliest
-        end_id = end if end else "latest"
+        self.build_manager = (
+            build_manager if build_manager is not None else BuildManager(config)
+        )
+        self.index: Optional[BuildIndex] = BuildIndex(
+            self.build_manager.config.index_path
+        )
 
-        self.start = Fetcher(
-            self.branch,
-            start_id,
-            self.flags,
-            targets=[self.evaluator.target],
-            platform=self.platform,
-            nearest=BuildSearchOrder.ASC,
+        if isinstance(start, Fetcher):
+            self.start = start
+        else:
+            self.start = self._get_boundary(
+                start if start else earliest, BuildSearchOrder.ASC
+            )
+        if isinstance(end, Fetcher):
+            self.end = end
+        else:
+            self.end = self._get_boundary(
+                end if end else "latest", BuildSearchOrder.DESC
+            )
+
+        self.results: Optional[ResultCache] = None
+        # Builds recorded as broken are only skipped when reusing results
+        self.skip_broken = result_cache
+        self._fingerprint = evaluator.fingerprint()
+        self._launch_fingerprint = evaluator.launch_fingerprint()
+        if result_cache and self._fingerprint is not None:
+            self.results = ResultCache(
+                self.build_manager.config.results_path, result_max_age
+            )
+
+        self.prefetch = prefetch
+        self._pipeline: Optional[ProbePipeline] = None
+        self._prefetch_hits = 0
+        self._prefetch_misses = 0
+
+        self.journal: Optional[BisectionJournal] = BisectionJournal(
+            self.build_manager.config.sessions_path, resume
         )
-        self.end = Fetcher(
-            self.branch,
-            end_id,
-            self.flags,
-            targets=[self.evaluator.target],
-            platform=self.platform,
-            nearest=BuildSearchOrder.DESC,
+        self._verified = False
+        self._ranges: Dict[str, BuildRange[BuildDescriptor]] = {}
+        if resume is not None:
+            self._restore()
+        LOG.info("Bisection session: %s", self.journal.session)
+
+    def _get_boundary(self, build_id: str, nearest: BuildSearchOrder) -> Fetcher:
+        """
+        Resolve a boundary build, using the build index when possible.
+
+        :param build_id: Revision, date or buildid of the boundary.
+        :param nearest: Search direction if no build matches the identifier.
+        :returns: The Fetcher object.
+        """
+        kind = f"nearest-{nearest.name.lower()}"
+        target = self.evaluator.target
+        begin = time.monotonic()
+        build = None
+        if self.index is not None:
+            build = self.index.get(
+                self.branch, kind, build_id, self.flags, self.platform, target
+            )
+
+        if build is None:
+            with span("resolve boundary", "resolve", build=build_id):
+                build = Fetcher(
+                    self.branch,
+                    build_id,
+                    self.flags,
+                    targets=[target],
+                    platform=self.platform,
+                    nearest=nearest,
+                )
+            # The latest build changes with every push
+            if self.index is not None and build_id != "latest":
+                self.index.put(kind, build_id, build, target)
+
+        if is_recording():
+            record(
+                "boundary",
+                build_id=build_id,
+                nearest=nearest.name,
+                build=build_to_dict(build),
+                duration=time.monotonic() - begin,
+            )
+        return build
+
+    def _lookup(self, entry: BuildDescriptor) -> Fetcher:
+        """
+        Resolve a build range entry, using the build index when possible.
+
+        :param entry: A build descriptor.
+        :raises FetcherException: If no matching build can be found.
+        :returns: The Fetcher object.
+        """
+        target = self.evaluator.target
+        begin = time.monotonic()
+        build = None
+        if self.index is not None:
+            build = self.index.get(
+                entry.branch,
+                entry.kind,
+                entry.identifier,
+                self.flags,
+                self.platform,
+                target,
+            )
+
+        if build is None:
+            try:
+                build = entry.resolve(self.flags, target, self.platform)
+            except FetcherException as e:
+                record(
+                    "lookup",
+                    entry=entry.to_dict(),
+                    build=None,
+                    error=str(e),
+                    duration=time.monotonic() - begin,
+                )
+                raise
+            if self.index is not None:
+                self.index.put(entry.kind, entry.identifier, build, target)
+
+        if is_recording():
+            record(
+                "lookup",
+                entry=entry.to_dict(),
+                build=build_to_dict(build),
+                duration=time.monotonic() - begin,
+            )
+        return build
+
+    def _record(self, event: str, **data: Any) -> None:
+        """
+        Append an event to the session journal, if any.
+
+        :param event: The event name.
+        :param data: JSON serializable event data.
+        """
+        if self.journal is not None:
+            self.journal.record(event, **data)
+
+    def _checkpoint(
+        self,
+        build_range: BuildRange[BuildDescriptor],
+        entry: Optional[BuildDescriptor],
+        status: Optional[EvaluatorResult],
+    ) -> None:
+        """
+        Record the outcome of a probe along with the remaining build range.
+
+        :param build_range: The build range remaining after the probe.
+        :param entry: The probed build range entry.
+        :param status: The result of the probe or None if no build was found.
+        """
+        if self.journal is None:
+            return
+
+        self.journal.record(
+            "probe",
+            entry=entry.to_dict() if entry is not None else None,
+            result=status.name if status is not None else None,
+            start=BuildDescriptor.from_build(self.start).to_dict(),
+            end=BuildDescriptor.from_build(self.end).to_dict(),
+            builds=[build.to_dict() for build in build_range.builds],
         )
 
-        self.build_manager = BuildManager(config)
+    def _restore(self) -> None:
+        """
+        Restore the boundaries and remaining build ranges of a previous session.
+
+        :raises JournalException: If the session doesn't match the current bisection.
+        """
+        assert self.journal is not None
+        strategy = None
+        boundaries = None
+        for event in self.journal.events():
+            if event["event"] == "session":
+                fingerprint = self.evaluator.fingerprint()
+                if (
+                    event["branch"] != self.branch
+                    or event["find_fix"] != self.find_fix
+                    or event["fingerprint"] not in (None, fingerprint)
+                ):
+                    raise JournalException(
+                        f"Session {self.journal.session} belongs to another bisection"
+                    )
+                boundaries = (event["start"], event["end"])
+            elif event["event"] == "verified":
+                self._verified = True
+            elif event["event"] == "strategy":
+                strategy = event["name"]
+                self._ranges[strategy] = BuildRange(
+                    [BuildDescriptor.from_dict(b) for b in event["builds"]]
+                )
+            elif event["event"] == "probe" and strategy is not None:
+                self._ranges[strategy] = BuildRange(
+                    [BuildDescriptor.from_dict(b) for b in event["builds"]]
+                )
+                boundaries = (event["start"], event["end"])
+
+        if boundaries is None:
+            raise JournalException(f"Session {self.journal.session} is empty")
+
+        try:
+            self.start, self.end = (
+                BuildDescriptor.from_dict(b).resolve(
+                    self.flags, self.evaluator.target, self.platform
+                )
+                for b in boundaries
+            )
+        except FetcherException as e:
+            raise JournalException(f"Unable to restore the boundaries: {e}") from e
 
-    def _get_daily_builds(self) -> BuildRange[str]:
+    def _get_daily_builds(self) -> BuildRange[BuildDescriptor]:
         """Create build range containing one build per day."""
         start = self.start.datetime + timedelta(days=1)
         end = self.end.datetime - timedelta(days=1)
         LOG.info(f"Enumerating daily builds: {start} - {end}")
 
-        return BuildRange.new(start, end)
+        dates = BuildRange.new(start, end)
+        return BuildRange(
+            [BuildDescriptor.from_date(self.branch, d) for d in dates.builds]
+        )
 
-    def _get_pushdate_builds(self) -> BuildRange[Fetcher]:
-        """Create build range containing all builds per pushdate."""
-        start = self.start.datetime
-        end = self.end.datetime
-        LOG.info(f"Enumerating pushdate builds: {start} - {end}")
+    def _get_pushdate_tasks(self, date: str) -> List[BuildTask]:
+        """
+        Retrieve all build tasks for the supplied pushdate.
 
-        builds = []
-        for dt in [start, end]:
-            date = dt.strftime("%Y-%m-%d")
+        :param date: The pushdate in YYYY-MM-DD format.
+        :returns: A list of BuildTask objects.
+        """
+        begin = time.monotonic()
+        tasks = None
+        if self.index is not None:
+            tasks = self.index.get_tasks(self.branch, date, self.flags, self.platform)
+
+        if tasks is None:
+            tasks = []
             for task in BuildTask.iterall(
                 date, self.branch, self.flags, Product("firefox"), self.platform
             ):
                 # Ignore "latest" as these are aliases for the most recent build
                 if hasattr(task, "url") and ".latest." in str(task.url):
                     continue
+                tasks.append(task)
 
-                # Only keep builds after the start and before the end boundaries
-                build = Fetcher(
-                    self.branch,
-                    task,
-                    self.flags,
-                    targets=[self.evaluator.target],
-                    platform=self.platform,
+            if self.index is not None:
+                self.index.put_tasks(
+                    self.branch, date, self.flags, self.platform, tasks
                 )
-                if self.end.datetime > build.datetime > self.start.datetime:
-                    if build.changeset not in (
-                        self.start.changeset,
-                        self.end.changeset,
-                    ):
-                        builds.append(build)
+
+        if is_recording():
+            record(
+                "tasks",
+                date=date,
+                tasks=[
+                    {
+                        "task_id": task.taskId,
+                        "rank": getattr(task, "rank", 0),
+                        "task_url": task.url,
+                        "queue_server": task.queue_server,
+                    }
+                    for task in tasks
+                ],
+                duration=time.monotonic() - begin,
+            )
+        return tasks
+
+    def _get_pushdate_builds(self) -> BuildRange[BuildDescriptor]:
+        """Create build range containing all builds per pushdate."""
+        start = self.start.datetime
+        end = self.end.datetime
+        LOG.info(f"Enumerating pushdate builds: {start} - {end}")
+
+        start_rank = getattr(self.start, "rank", 0)
+        end_rank = getattr(self.end, "rank", 0)
+        dates = dict.fromkeys(dt.strftime("%Y-%m-%d") for dt in [start, end])
+        builds = []
+        for tasks in resolve_concurrently(self._get_pushdate_tasks, dates):
+            for task in tasks:
+                build = BuildDescriptor.from_task(self.branch, task)
+                # Discard builds outside of the boundaries using the task rank.  The
+                # exact boundary check happens once a build is resolved.
+                if build.rank and start_rank and end_rank:
+                    if not start_rank < build.rank < end_rank:
+                        continue
+                builds.append(build)
 
         return BuildRange(builds)
 
-    def _get_autoland_builds(self) -> BuildRange[Fetcher]:
-        """Create build range containing all autoland builds per pushdate"""
+    def _get_timeline_builds(self) -> BuildRange[BuildDescriptor]:
+        """Create build range containing every central push and autoland changeset"""
         if self.branch != "central":
             return BuildRange([])
 
         start = self.start.datetime
         end = self.end.datetime
 
-        LOG.info(f"Enumerating autoland builds: {start} - {end}")
-        changesets = get_autoland_range(self.start.changeset, self.end.changeset)
-        if changesets is None:
+        LOG.info(f"Enumerating timeline builds: {start} - {end}")
+        pushes = self._get_pushes()
+        if pushes is None:
             return BuildRange([])
 
-        builds = []
-        for changeset in changesets:
-            try:
-                build = Fetcher(
-                    "autoland",
-                    changeset,
-                    self.flags,
-                    targets=[self.evaluator.target],
-                    platform=self.platform,
+        return build_timeline(pushes, (self.start.changeset, self.end.changeset))
+
+    def _get_pushes(self) -> Optional[List[Push]]:
+        """Retrieve the mozilla-central pushes between the current boundaries."""
+        key = (self.start.changeset, self.end.changeset)
+        if key not in self._pushes:
+            begin = time.monotonic()
+            pushes = self._pushes[key] = get_pushes(*key)
+            if is_recording():
+                record(
+                    "pushes",
+                    start=key[0],
+                    end=key[1],
+                    pushes=(
+                        [
+                            {
+                                "push_id": push.push_id,
+                                "timestamp": push.timestamp.timestamp(),
+                                "changesets": push.changesets,
+                            }
+                            for push in pushes
+                        ]
+                        if pushes is not None
+                        else None
+                    ),
+                    duration=time.monotonic() - begin,
                 )
-                builds.append(build)
-            except FetcherException:
-                LOG.warning("Unable to find build for %s", changeset)
+        return self._pushes[key]
 
-        return BuildRange(builds)
+    def _plan(self, phases: List[str]) -> List[str]:
+        """
+        Select which of the remaining phases to run.
+
+        :param phases: The remaining phases.
+        :returns: The phases to run.
+        """
+        start = self.start.datetime
+        end = self.end.datetime
+        pushes = changesets = None
+        if self.branch == "central" and (end - start).days <= PUSHLOG_MAX_DAYS:
+            pushlog = self._get_pushes()
+            if pushlog is not None:
+                pushes = len(pushlog)
+                changesets = sum(len(push.changesets) for push in pushlog)
+
+        counts = StrategyPlanner.estimate(start, end, pushes, changesets)
+        return self.planner.plan({p: counts[p] for p in phases})
+
+    def _resolve(self, entry: Union[BuildDescriptor, Fetcher]) -> Optional[Fetcher]:
+        """
+        Convert a build range entry into a Fetcher object.
+
+        :param entry: A Fetcher object or a build descriptor.
+        :returns: The Fetcher object or None if no usable build could be found.
+        """
+        build = self._find(entry)
+        if build is None or not self._within_bounds(entry, build):
+            return None
+        return build
+
+    def _find(self, entry: Union[BuildDescriptor, Fetcher]) -> Optional[Fetcher]:
+        """
+        Look up the build of a build range entry, regardless of the boundaries.
+
+        :param entry: A Fetcher object or a build descriptor.
+        :returns: The Fetcher object or None if no build could be found.
+        """
+        if isinstance(entry, Fetcher):
+            return entry
+
+        with span("resolve", "resolve", entry=str(entry)):
+            try:
+                build = self._lookup(entry)
+                entry.changeset = build.changeset
+            except FetcherException as e:
+                LOG.debug("Unable to find build for %s: %s", entry, e)
+                return None
+
+        return build
+
+    def _within_bounds(
+        self, entry: Union[BuildDescriptor, Fetcher], build: Fetcher
+    ) -> bool:
+        """
+        Whether the build found for a build range entry lies within the boundaries.
+
+        :param entry: A Fetcher object or a build descriptor.
+        :param build: The build found for the entry.
+        """
+        # Task ranks only approximate the build time so check the real boundaries
+        if isinstance(entry, BuildDescriptor) and entry.kind == BuildDescriptor.TASK:
+            if not self.start.datetime < build.datetime < self.end.datetime or (
+                build.changeset in (self.start.changeset, self.end.changeset)
+            ):
+                LOG.debug("Build %s is outside of the boundaries", entry)
+                self._out_of_range.add(entry)
+                return False
+
+        return True
+
+    @staticmethod
+    def _log_missing(
+        missing: List[Union[BuildDescriptor, Fetcher]],
+        out_of_range: Collection[BuildDescriptor] = (),
+    ) -> None:
+        """
+        Report all build range entries for which no build could be found.
+
+        :param missing: The entries which didn't resolve to a usable build.
+        :param out_of_range: Entries whose build was found outside of the
+            boundaries.  These were only discarded and aren't reported.
+        """
+        discarded = [entry for entry in missing if entry in out_of_range]
+        if discarded:
+            LOG.debug("Discarded %d builds outside of the boundaries", len(discarded))
+        missing = [entry for entry in missing if entry not in out_of_range]
+        if missing:
+            LOG.warning(
+                "Unable to find builds for %d entries: %s",
+                len(missing),
+                ", ".join(str(entry) for entry in missing),
+            )
 
     def build_iterator(
         self,
-        build_range: BuildRange[Union[str, Fetcher]],
+        build_range: BuildRange[BuildDescriptor],
         random_choice: bool,
     ) -> Generator[Fetcher, EvaluatorResult, None]:
         """Yields next build to be evaluated until all possibilities consumed."""
+        missing: List[Union[BuildDescriptor, Fetcher]] = []
         while build_range:
             if random_choice:
-                build = build_range.random
+                entry = build_range.random
             else:
-                build = build_range.mid_point
-
-            assert build is not None
-            index = build_range.index(build)
-            if not isinstance(build, Fetcher):
-                try:
-                    build = Fetcher(
-                        self.branch,
-                        build,
-                        self.flags,
-                        targets=[self.evaluator.target],
-                        platform=self.platform,
-                    )
-                except FetcherException:
-                    LOG.warning("Unable to find build for %s", build)
-                    build_range.builds.remove(build)
-                    continue
+                entry = self._select_pivot(build_range)
+
+            assert entry is not None
+            index = build_range.index(entry)
+            if self._pipeline is not None:
+                build = self._pipeline.resolve(entry)
+            else:
+                build = self._resolve(entry)
+            if build is None:
+                missing.append(entry)
+                build_range.builds.remove(entry)
+                self._checkpoint(build_range, entry, None)
+                continue
+
+            if self._pipeline is not None:
+                if self._pipeline.fetched(entry):
+                    self._prefetch_hits += 1
+                else:
+                    self._prefetch_misses += 1
+                if not random_choice:
+                    assert isinstance(index, int)
+                    self._speculate(build_range, index)
 
             status = yield build
 
             assert isinstance(index, int)
             build_range = self.update_range(status, build, index, build_range)
+            self._checkpoint(build_range, entry, status)
+
+        self._log_missing(missing, self._out_of_range)
+
+    def probabilistic_iterator(
+        self,
+        build_range: BuildRange[BuildDescriptor],
+    ) -> Generator[Fetcher, EvaluatorResult, None]:
+        """
+        Yields the most informative build until the change is located with the
+        configured confidence.  Builds may be yielded repeatedly.
+        """
+        model = ProbabilisticBisection(
+            len(build_range), self.sensitivity, self.find_fix
+        )
+        resolved: Dict[BuildDescriptor, Fetcher] = {}
+        missing: List[Union[BuildDescriptor, Fetcher]] = []
+        probes = 0
+        while build_range and model.confidence < self.confidence:
+            index = model.best_probe
+            entry = build_range[index]
+            build = resolved.get(entry) or self._resolve(entry)
+            status = None
+            if build is not None:
+                resolved[entry] = build
+                status = yield build
+                probes += 1
+
+            if status is None or status == EvaluatorResult.BUILD_FAILED:
+                if status is None:
+                    missing.append(entry)
+                model.remove(index)
+                build_range = build_range[:]
+                build_range.builds.pop(index)
+            else:
+                crashed = status == EvaluatorResult.BUILD_CRASHED
+                model.update(index, crashed)
+            LOG.debug(
+                "Most likely change at %d/%d (confidence: %.3f)",
+                model.first_bad,
+                len(build_range),
+                model.confidence,
+            )
+            self._checkpoint(build_range, entry, status)
+
+        if build_range:
+            first_bad = model.first_bad
+            LOG.info(
+                "Located change after %d probe(s) with confidence %.3f",
+                probes,
+                model.confidence,
+            )
+            for index, boundary in ((first_bad - 1, "start"), (first_bad, "end")):
+                if 0 <= index < len(build_range):
+                    entry = build_range[index]
+                    build = resolved.get(entry) or self._resolve(entry)
+                    if build is not None:
+                        setattr(self, boundary, build)
+            self._checkpoint(build_range[:0], None, None)
+
+        self._log_missing(missing, self._out_of_range)
+
+    def _is_cached(self, entry: BuildDescriptor) -> bool:
+        """
+        Whether the build referenced by the supplied entry is in the build store.
+
+        :param entry: A build range entry.
+        """
+        if not isinstance(entry, BuildDescriptor) or entry.changeset is None:
+            return False
+
+        path = self.build_manager.changeset_path(
+            entry.branch,
+            entry.changeset,
+            self.flags,
+            self.platform,
+            self.evaluator.target,
+        )
+        return path.is_dir()
+
+    def pivot_candidates(self, build_range: BuildRange[T]) -> List[int]:
+        """
+        Indices of the builds within pivot_window of the midpoint.
+
+        :param build_range: A non-empty build range.
+        :returns: The indices ordered by their distance to the midpoint.
+        """
+        size = len(build_range)
+        mid = size // 2
+        radius = int(size * self.pivot_window)
+        if build_range[mid] in self._suspects:
+            # Look past the broken stretch the midpoint likely belongs to
+            radius = max(radius, BROKEN_SPAN + 1)
+        candidates = range(max(0, mid - radius), min(size, mid + radius + 1))
+        return sorted(candidates, key=lambda i: abs(i - mid))
+
+    def _select_pivot(
+        self, build_range: BuildRange[BuildDescriptor]
+    ) -> BuildDescriptor:
+        """
+        Select the build near the midpoint which reduces the range most cheaply.
+
+        Candidates within pivot_window of the midpoint are scored by the
+        information gained from probing them divided by their estimated cost,
+        discounted by the likelihood of the build being broken.
+
+        :param build_range: A non-empty build range.
+        :returns: The build to probe.
+        """
+        candidates = self.pivot_candidates(build_range)
+        if len(candidates) == 1:
+            return build_range[candidates[0]]
+
+        size = len(build_range)
+        download = evaluation = 0.0
+        if self.pivot_window:
+            download = self.build_manager.download_estimate() or DEFAULT_DOWNLOAD_COST
+            evaluation = DEFAULT_EVALUATION_COST
+            if self._evaluation_times:
+                evaluation = sum(self._evaluation_times) / len(self._evaluation_times)
+
+        best, best_score = candidates[0], 0.0
+        # Ties are resolved in favor of the build closest to the midpoint
+        for index in candidates:
+            entry = build_range[index]
+            score = entropy((index + 1) / (size + 1))
+            score *= 1.0 - self._suspects.get(entry, 0.0)
+            if self.pivot_window:
+                cost = evaluation
+                if not self._is_cached(entry):
+                    cost += download
+                score /= cost
+            if score > best_score:
+                best, best_score = index, score
+
+        if best != candidates[0]:
+            LOG.debug("Probing %s instead of midpoint", build_range[best])
+        return build_range[best]
+
+    def _prefetch_build(self, build: Fetcher) -> None:
+        """
+        Download the supplied build into the build store.
+
+        :param build: The build to download.
+        """
+        try:
+            self.build_manager.prefetch(build, self.evaluator.target)
+        except (FetcherException, OSError) as e:
+            LOG.warning("Failed to prefetch build %s: %s", build.changeset, e)
+
+    def _speculate(self, build_range: BuildRange[BuildDescriptor], index: int) -> None:
+        """
+        Resolve the builds that may be probed after the supplied one and start
+        downloading both builds that may be probed next.
+
+        :param build_range: The current build range.
+        :param index: Index of the build currently being probed.
+        """
+        assert self._pipeline is not None
+        # Drop queued work for builds which are no longer part of the range
+        self._pipeline.retain(build_range.builds)
+
+        fetch = self.build_manager.config.persist
+        pending = [(build_range[:index], 1), (build_range[index + 1 :], 1)]
+        while pending:
+            sub_range, depth = pending.pop(0)
+            candidate = sub_range.mid_point
+            if candidate is None:
+                continue
+            LOG.debug("Prefetching %s", candidate)
+            self._pipeline.speculate(candidate, depth, fetch and depth == 1)
+            if depth < SPECULATION_DEPTH:
+                mid = len(sub_range) // 2
+                pending.append((sub_range[:mid], depth + 1))
+                pending.append((sub_range[mid + 1 :], depth + 1))
+
+    def _probe(
+        self,
+        entry: BuildDescriptor,
+        cancel: threading.Event,
+    ) -> Tuple[Optional[Fetcher], Optional[EvaluatorResult]]:
+        """
+        Resolve and evaluate a single build range entry.
+
+        :param entry: The build range entry to evaluate.
+        :param cancel: Event signalling that the result is no longer needed.
+        :returns: The resolved build and its status or (None, None) if unresolvable.
+        """
+        build = self._resolve(entry)
+        if build is None:
+            return None, None
+        if cancel.is_set():
+            raise ProbeCancelled(f"Probe of {build.changeset} was cancelled")
+
+        return build, self.test_build(build, cancel)
+
+    def parallel_bisect(self, build_range: BuildRange[BuildDescriptor]) -> None:
+        """
+        Reduce the supplied build range by evaluating several builds concurrently.
+
+        Each round splits the range into jobs + 1 segments and evaluates the pivots
+        concurrently.  Results are applied as they arrive and probes which are no
+        longer within the remaining range are cancelled.
+
+        :param build_range: The build range to reduce.
+        """
+        missing: List[Union[BuildDescriptor, Fetcher]] = []
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            while build_range:
+                probes: Dict[
+                    Future[Tuple[Optional[Fetcher], Optional[EvaluatorResult]]],
+                    Tuple[BuildDescriptor, threading.Event],
+                ] = {}
+                for entry in build_range.pivots(self.jobs):
+                    cancel = threading.Event()
+                    future = executor.submit(
+                        contextvars.copy_context().run, self._probe, entry, cancel
+                    )
+                    probes[future] = (entry, cancel)
+
+                pending = set(probes)
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        entry = probes[future][0]
+                        if future.cancelled() or entry not in build_range.builds:
+                            continue
+                        try:
+                            build, status = future.result()
+                        except ProbeCancelled:
+                            continue
+
+                        index = build_range.index(entry)
+                        assert isinstance(index, int)
+                        if build is None or status is None:
+                            missing.append(entry)
+                            build_range = build_range[:]
+                            build_range.builds.pop(index)
+                        else:
+                            build_range = self.update_range(
+                                status, build, index, build_range
+                            )
+                        self._checkpoint(build_range, entry, status)
+
+                    for future in list(pending):
+                        entry, cancel = probes[future]
+                        if entry not in build_range.builds:
+                            LOG.debug("Cancelling probe of %s", entry)
+                            cancel.set()
+                            future.cancel()
+                            pending.discard(future)
+
+        self._log_missing(missing, self._out_of_range)
+
+    def record_session(self) -> None:
+        """Record the settings and boundaries of a new session in the journal."""
+        if self.journal is not None and not self.journal.resumed:
+            self._record(
+                "session",
+                branch=self.branch,
+                find_fix=self.find_fix,
+                fingerprint=self.evaluator.fingerprint(),
+                start=BuildDescriptor.from_build(self.start).to_dict(),
+                end=BuildDescriptor.from_build(self.end).to_dict(),
+            )
+
+    def strategies(self) -> Dict[str, Callable[[], BuildRange[BuildDescriptor]]]:
+        """
+        Return the build range enumerators of each phase supported by the branch.
+
+        :returns: The enumerators ordered from the coarsest to the finest phase.
+        """
+        # Central pushes and the autoland changesets they merged form one timeline
+        strategies: Dict[str, Callable[[], BuildRange[BuildDescriptor]]] = {
+            DAILY: self._get_daily_builds,
+        }
+        if self.branch == "central":
+            strategies[TIMELINE] = self._get_timeline_builds
+        else:
+            strategies[PUSHDATE] = self._get_pushdate_builds
+        return strategies
 
     def bisect(self, random_choice: bool = False) -> BisectionResult:
         """
         Main bisection function.
 
         :param random_choice: Select builds at random during bisection (QuickSort).
+            Ignored when evaluating builds concurrently.
         :returns: Bisection result.
         """
+        if is_recording():
+            record(
+                "bisection",
+                branch=self.branch,
+                flags=list(self.flags),
+                platform=[self.platform.system, self.platform.machine],
+                target=self.evaluator.target,
+                find_fix=self.find_fix,
+                start=build_to_dict(self.start),
+                end=build_to_dict(self.end),
+                random_choice=random_choice,
+                settings=self.settings(),
+                repeat=self.evaluator.repeat,
+            )
+        result = self._bisect(random_choice)
+        record(
+            "result",
+            status=result.status,
+            start=result.start.changeset,
+            end=result.end.changeset,
+        )
+        return result
+
+    def settings(self) -> Dict[str, Any]:
+        """Return the arguments affecting how builds are searched and probed."""
+        return {
+            "jobs": self.jobs,
+            "prefetch": self.prefetch,
+            "probabilistic": self.probabilistic,
+            "confidence": self.confidence,
+            "sensitivity": self.sensitivity,
+            "adaptive_repeat": self.adaptive_repeat,
+            "pivot_window": self.pivot_window,
+        }
+
+    def _bisect(self, random_choice: bool) -> BisectionResult:
+        """Verify the boundaries and reduce the build range phase by phase."""
         LOG.info("Begin bisection...")
         LOG.info("> Start: %s (%s)", self.start.changeset, self.start.id)
         LOG.info("> End: %s (%s)", self.end.changeset, self.end.id)
 
-        verified = self.verify_bounds()
-        if verified == VerificationStatus.SUCCESS:
-            LOG.info(verified.message)
+        self.record_session()
+
+        if self._verified:
+            LOG.info("Boundaries were verified by the previous session")
         else:
-            LOG.critical(verified.message)
-            return BisectionResult(
-                BisectionResult.FAILED,
-                self.start,
-                self.end,
-                self.branch,
-                verified.message,
-            )
+            with span("verify bounds", "bisect") as details:
+                verified = self.verify_bounds()
+                details["status"] = verified.name
+            if verified != VerificationStatus.SUCCESS:
+                LOG.critical(verified.message)
+                return BisectionResult(
+                    BisectionResult.FAILED,
+                    self.start,
+                    self.end,
+                    self.branch,
+                    verified.message,
+                )
+            LOG.info(verified.message)
+            self._record("verified")
 
         LOG.info("Attempting to reduce bisection range using taskcluster binaries")
-        strategies: List[Callable[[], Union[BuildRange[str], BuildRange[Fetcher]]]] = [
-            self._get_daily_builds,
-            self._get_pushdate_builds,
-        ]
-        if self.branch == "central":
-            strategies.append(self._get_autoland_builds)
-
-        for strategy in strategies:
-            build_range = strategy()
-            generator = self.build_iterator(build_range, random_choice)  # type: ignore
-            try:
-                next_build = next(generator)
-                while True:
-                    status = self.test_build(next_build)
-                    next_build = generator.send(status)
-            except StopIteration:
-                pass
+        strategies = self.strategies()
+
+        prefetch = self.prefetch and self.jobs == 1 and not self.probabilistic
+        if prefetch and not self.build_manager.config.persist:
+            LOG.warning("Build persistence is disabled, only metadata is prefetched")
+
+        remaining = list(strategies)
+        while remaining:
+            # Phases interrupted by a previous session are always completed
+            resumed = [name for name in remaining if name in self._ranges]
+            if resumed:
+                name = resumed[0]
+            else:
+                plan = self._plan(remaining)
+                if not plan:
+                    break
+                name = plan[0]
+            remaining = remaining[remaining.index(name) + 1 :]
+
+            with span(f"{name} phase", "bisect") as details:
+                if name in self._ranges:
+                    build_range = self._ranges[name]
+                    LOG.info(
+                        "Resuming %s bisection: %d build(s) left",
+                        name,
+                        len(build_range),
+                    )
+                else:
+                    with span("enumerate", "resolve", phase=name):
+                        build_range = strategies[name]()
+                    self._record(
+                        "strategy",
+                        name=name,
+                        builds=[build.to_dict() for build in build_range.builds],
+                    )
+                details["builds"] = len(build_range)
+                self._run_phase(build_range, prefetch, random_choice)
+
+        if prefetch:
+            LOG.info(
+                "Prefetch: %d hit(s), %d miss(es)",
+                self._prefetch_hits,
+                self._prefetch_misses,
+            )
 
         return BisectionResult(
             BisectionResult.SUCCESS, self.start, self.end, self.branch
         )
 
+    def _run_phase(
+        self,
+        build_range: BuildRange[BuildDescriptor],
+        prefetch: bool,
+        random_choice: bool,
+    ) -> None:
+        """
+        Reduce the build range of a single phase.
+
+        :param build_range: The build range to reduce.
+        :param prefetch: Resolve and download builds ahead of probing them.
+        :param random_choice: Select builds at random.
+        """
+        if self.jobs > 1 and not self.probabilistic:
+            self.parallel_bisect(build_range)
+            return
+
+        if prefetch:
+            self._pipeline = ProbePipeline(self._resolve, self._prefetch_build)
+        if self.probabilistic:
+            generator = self.probabilistic_iterator(build_range)
+        else:
+            generator = self.build_iterator(build_range, random_choice)
+        try:
+            next_build = next(generator)
+            while True:
+                status = self.test_build(next_build)
+                next_build = generator.send(status)
+        except StopIteration:
+            pass
+        finally:
+            if self._pipeline is not None:
+                self._pipeline.close()
+                self._pipeline = None
+
     def update_range(
         self,
         status: EvaluatorResult,
@@ -370,50 +1170,326 @@ class Bisector(object):
             self.start = build
             return build_range[index + 1 :]
         if status == EvaluatorResult.BUILD_FAILED:
+            self._suspect_neighbours(build_range, index)
             range_copy = build_range[:]
             range_copy.builds.pop(index)
             return range_copy
 
         raise StatusException("Invalid status supplied")
 
-    def test_build(self, build: Fetcher) -> EvaluatorResult:
+    def _suspect_neighbours(self, build_range: BuildRange[T], index: int) -> None:
+        """
+        Suspect the builds surrounding one which failed to launch, with a
+        likelihood halving at each step away from it.
+
+        :param build_range: The build range containing the failed build.
+        :param index: Index of the failed build.
+        """
+        for distance in range(1, BROKEN_SPAN + 1):
+            suspicion = 0.5**distance
+            for neighbour in (index - distance, index + distance):
+                if 0 <= neighbour < len(build_range):
+                    entry = build_range[neighbour]
+                    self._suspects[entry] = max(
+                        self._suspects.get(entry, 0.0), suspicion
+                    )
+
+    def test_build(
+        self,
+        build: Fetcher,
+        cancel: Optional[threading.Event] = None,
+        verify: bool = False,
+    ) -> EvaluatorResult:
         """
         Prepare the build directory and launch the supplied build.
 
         :param build: A Fetcher object to prevent duplicate fetching
+        :param cancel: Optional event used to abandon the probe before evaluation
+        :param verify: Launch the build even if it recently failed to launch
         :return: The result of the build evaluation
         """
         LOG.info("Testing build %s (%s)", build.changeset, build.id)
+        with span("probe", "bisect", changeset=build.changeset) as details:
+            result = self._test_build(build, cancel, verify)
+            details["result"] = result.name
+        metrics.PROBES.inc(result=result.name.lower())
+        return result
+
+    def _test_build(
+        self,
+        build: Fetcher,
+        cancel: Optional[threading.Event] = None,
+        verify: bool = False,
+    ) -> EvaluatorResult:
+        """Evaluate the supplied build unless its result is already known."""
+        cached = self.cached_result(build)
+        if cached is not None:
+            return cached
+        if not verify and self.known_broken(build):
+            return EvaluatorResult.BUILD_FAILED
+
         # If persistence is enabled and a build exists, use it
         try:
             with self.build_manager.get_build(build, self.evaluator.target) as path:
-                return self.evaluator.evaluate_testcase(path)
+                with self._evaluation_slots:
+                    if cancel is not None and cancel.is_set():
+                        raise ProbeCancelled(
+                            f"Probe of {build.changeset} was cancelled"
+                        )
+                    return self.evaluate(build, path)
+        except BuildManagerException:
+            return EvaluatorResult.BUILD_FAILED
+
+    def cached_result(self, build: Fetcher) -> Optional[EvaluatorResult]:
+        """
+        Look up a previous evaluation of the testcase against the supplied build.
+
+        :param build: A Fetcher object.
+        :return: The cached result or None if the build must be evaluated.
+        """
+        if self.results is None:
+            return None
+
+        assert self._fingerprint is not None
+        cached = self.results.get(
+            self._fingerprint, build.changeset, self.flags, self.platform
+        )
+        # A pass is not conclusive when evaluating probabilistically
+        if cached is None or (
+            self.probabilistic and cached == EvaluatorResult.BUILD_PASSED
+        ):
+            metrics.CACHE_MISSES.inc(cache="result")
+            return None
+
+        metrics.CACHE_HITS.inc(cache="result")
+        LOG.info("> Using cached result: %s", cached.name)
+        return cached
+
+    def known_broken(self, build: Fetcher) -> bool:
+        """
+        Whether the supplied build recently failed to launch in any session.
+
+        :param build: A Fetcher object.
+        """
+        if (
+            self.index is None
+            or not self.skip_broken
+            or self._launch_fingerprint is None
+        ):
+            return False
+        if not self.index.is_broken(
+            build, self.evaluator.target, self._launch_fingerprint
+        ):
+            return False
+
+        LOG.info("> Skipping build which recently failed to launch")
+        return True
+
+    def evaluate(self, build: Fetcher, path: Path) -> EvaluatorResult:
+        """
+        Evaluate the testcase against an extracted build and store the result.
+
+        :param build: The Fetcher object the build was extracted from.
+        :param path: Path to the extracted build.
+        :return: The result of the build evaluation
+        """
+        start = time.monotonic()
+        with span("evaluate", "evaluate", changeset=build.changeset) as details:
+            result = self.evaluator.evaluate_testcase(path)
+            details["result"] = result.name
+        self._evaluation_times.append(time.monotonic() - start)
+        metrics.EVALUATION_SECONDS.observe(self._evaluation_times[-1])
+        record(
+            "evaluation",
+            changeset=build.changeset,
+            result=result.name,
+            duration=self._evaluation_times[-1],
+        )
+
+        if (
+            result == EvaluatorResult.BUILD_FAILED
+            and self.index is not None
+            and self._launch_fingerprint is not None
+        ):
+            self.index.mark_broken(
+                build, self.evaluator.target, self._launch_fingerprint
+            )
+
+        if self.results is not None:
+            assert self._fingerprint is not None
+            self.results.put(
+                self._fingerprint, build.changeset, self.flags, self.platform, result
+            )
+
+        return result
+
+    def measure_reproduction(
+        self,
+        build: Fetcher,
+        cancel: Optional[threading.Event] = None,
+    ) -> EvaluatorResult:
+        """
+        Evaluate the testcase repeatedly to measure its reproduction rate and adapt
+        the number of repeats used for subsequent builds.
+
+        :param build: A build expected to crash.
+        :param cancel: Optional event used to abandon the probe before evaluation
+        :return: The result of the build evaluation
+        """
+        try:
+            with self.build_manager.get_build(build, self.evaluator.target) as path:
+                with self._evaluation_slots:
+                    if cancel is not None and cancel.is_set():
+                        raise ProbeCancelled(
+                            f"Probe of {build.changeset} was cancelled"
+                        )
+                    return self.measure(build, path)
         except BuildManagerException:
             return EvaluatorResult.BUILD_FAILED
 
+    def measure(self, build: Fetcher, path: Path) -> EvaluatorResult:
+        """
+        Measure the reproduction rate against an extracted build.
+
+        :param build: The Fetcher object the build was extracted from.
+        :param path: Path to the extracted build.
+        :return: The result of the build evaluation
+        """
+        runs = self.evaluator.repeat or 1
+        LOG.info("Measuring reproduction rate on %s (%d runs)", build.changeset, runs)
+        start = time.monotonic()
+        with span("measure", "evaluate", changeset=build.changeset, runs=runs):
+            crashes, completed = self.evaluator.reproduction_rate(path, runs)
+        record(
+            "measurement",
+            changeset=build.changeset,
+            crashes=crashes,
+            completed=completed,
+            duration=time.monotonic() - start,
+        )
+        if completed == 0:
+            return EvaluatorResult.BUILD_FAILED
+        if crashes == 0:
+            return EvaluatorResult.BUILD_PASSED
+
+        rate = wilson_lower_bound(crashes, completed, self.confidence)
+        repeat = required_repeats(rate, self.confidence, runs)
+        LOG.info(
+            "> Reproduced %d/%d runs, using %d repeat(s) per build",
+            crashes,
+            completed,
+            repeat,
+        )
+        self.evaluator.repeat = repeat
+        # Results obtained with another number of repeats aren't comparable
+        if self._fingerprint is not None:
+            self._fingerprint = self.evaluator.fingerprint()
+        return EvaluatorResult.BUILD_CRASHED
+
+    def _test_boundary(
+        self, build: Fetcher, crashes: bool, cancel: threading.Event
+    ) -> EvaluatorResult:
+        """
+        Evaluate a boundary, measuring the reproduction rate on the crashing one.
+
+        :param build: The boundary build.
+        :param crashes: Whether the boundary is expected to crash.
+        :param cancel: Event signalling that the result is no longer needed.
+        :return: The result of the build evaluation
+        """
+        if crashes and self.adaptive_repeat:
+            return self.measure_reproduction(build, cancel)
+        return self.test_build(build, cancel, verify=True)
+
     def verify_bounds(self) -> VerificationStatus:
-        """Verify that the supplied bounds behave as expected"""
+        """
+        Verify that the supplied bounds behave as expected.
+
+        Both boundaries are downloaded and evaluated concurrently.  Once either of
+        them fails verification, the other probe is abandoned unless it has already
+        been evaluated.  If both fail, the start status takes precedence.
+
+        Boundaries are verified one after the other when the reproduction rate
+        measurement adapts the repeat of the evaluator shared by both.
+        """
         LOG.info("Attempting to verify boundaries...")
-        start_result = self.test_build(self.start)
-        if start_result not in set(EvaluatorResult):
+        checks = (self.verify_start, self.verify_end)
+        statuses: List[Optional[VerificationStatus]] = [None, None]
+        cancel = threading.Event()
+        boundaries = (
+            (self.start, self.find_fix),
+            (self.end, not self.find_fix),
+        )
+        if self.adaptive_repeat:
+            for check, (build, crashes) in zip(checks, boundaries):
+                verified = check(self._test_boundary(build, crashes, cancel))
+                if verified != VerificationStatus.SUCCESS:
+                    return verified
+            return VerificationStatus.SUCCESS
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    self._test_boundary,
+                    build,
+                    crashes,
+                    cancel,
+                )
+                for build, crashes in boundaries
+            ]
+            try:
+                for future in as_completed(futures):
+                    index = futures.index(future)
+                    try:
+                        result = future.result()
+                    except ProbeCancelled:
+                        continue
+                    statuses[index] = checks[index](result)
+                    if statuses[index] != VerificationStatus.SUCCESS:
+                        cancel.set()
+            finally:
+                cancel.set()
+
+        for status in statuses:
+            if status is not None and status != VerificationStatus.SUCCESS:
+                return status
+        return VerificationStatus.SUCCESS
+
+    def verify_start(self, result: EvaluatorResult) -> VerificationStatus:
+        """
+        Check the result of evaluating the start boundary.
+
+        :param result: The result of the start build evaluation.
+        :returns: The verification status.
+        """
+        if result not in set(EvaluatorResult):
             raise StatusException("Invalid status supplied")
 
-        if start_result == EvaluatorResult.BUILD_FAILED:
+        if result == EvaluatorResult.BUILD_FAILED:
             return VerificationStatus.START_BUILD_FAILED
-        if start_result == EvaluatorResult.BUILD_CRASHED and not self.find_fix:
+        if result == EvaluatorResult.BUILD_CRASHED and not self.find_fix:
             return VerificationStatus.START_BUILD_CRASHES
-        if start_result == EvaluatorResult.BUILD_PASSED and self.find_fix:
+        if result == EvaluatorResult.BUILD_PASSED and self.find_fix:
             return VerificationStatus.FIND_FIX_START_BUILD_PASSES
 
-        end_result = self.test_build(self.end)
-        if end_result not in set(EvaluatorResult):
+        return VerificationStatus.SUCCESS
+
+    def verify_end(self, result: EvaluatorResult) -> VerificationStatus:
+        """
+        Check the result of evaluating the end boundary.
+
+        :param result: The result of the end build evaluation.
+        :returns: The verification status.
+        """
+        if result not in set(EvaluatorResult):
             raise StatusException("Invalid status supplied")
 
-        if end_result == EvaluatorResult.BUILD_FAILED:
+        if result == EvaluatorResult.BUILD_FAILED:
             return VerificationStatus.END_BUILD_FAILED
-        if end_result == EvaluatorResult.BUILD_PASSED and not self.find_fix:
+        if result == EvaluatorResult.BUILD_PASSED and not self.find_fix:
             return VerificationStatus.END_BUILD_PASSES
-        if end_result == EvaluatorResult.BUILD_CRASHED and self.find_fix:
+        if result == EvaluatorResult.BUILD_CRASHED and self.find_fix:
             return VerificationStatus.FIND_FIX_END_BUILD_CRASHES
 
         return VerificationStatus.SUCCESS
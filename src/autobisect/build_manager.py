@@ -5,14 +5,26 @@ import logging
 import os
 import shutil
 import sqlite3
+import threading
 import time
 from contextlib import contextmanager
 from pathlib import Path
 from typing import List, Optional, Iterator
 
-from fuzzfetch import Fetcher
+from fuzzfetch import BuildFlags, Fetcher, Platform
 
+from autobisect import metrics
 from autobisect.config import BisectionConfig
+from autobisect.recording import record
+from autobisect.trace import span
+
+try:
+    import fcntl
+
+    HAVE_FCNTL = True
+except ImportError:  # pragma: no cover
+    # Without advisory locks, waiting processes poll the database
+    HAVE_FCNTL = False
 
 LOG = logging.getLogger(__name__)
 
@@ -21,6 +33,19 @@ class BuildManagerException(Exception):
     """Raised when a build cannot be retrieved."""
 
 
+def _directory_size(path: Path) -> int:
+    """Return the total size of the files below the supplied directory."""
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+# Columns of the builds table missing from stores created by older versions
+BUILD_COLUMNS = {
+    "size": "size INT",
+    "last_used": "last_used REAL",
+    "hits": "hits INT NOT NULL DEFAULT 0",
+}
+
+
 class DatabaseManager(object):
     """Sqlite3 wrapper class."""
 
@@ -31,6 +56,24 @@ class DatabaseManager(object):
         self.cur.execute(
             "CREATE TABLE IF NOT EXISTS download_queue (build_path TEXT primary key, pid INT)"
         )
+        self.cur.execute(
+            "CREATE TABLE IF NOT EXISTS builds (build_path TEXT primary key, "
+            "duration REAL, size INT, last_used REAL, hits INT NOT NULL DEFAULT 0)"
+        )
+        # Stores created by older versions only recorded download durations
+        columns = [row[1] for row in self.cur.execute("PRAGMA table_info(builds)")]
+        for column, definition in BUILD_COLUMNS.items():
+            if column not in columns:
+                try:
+                    self.cur.execute(f"ALTER TABLE builds ADD COLUMN {definition}")
+                except sqlite3.OperationalError:
+                    # Another process added the column first
+                    pass
+        # Eviction walks builds from the least recently used without sorting
+        self.cur.execute(
+            "CREATE INDEX IF NOT EXISTS builds_by_use ON builds (last_used, hits)"
+        )
+        self.con.commit()
 
     def close(self) -> None:
         """Closes the sqlite3 database."""
@@ -45,117 +88,415 @@ class DatabaseManager(object):
             pass
 
 
+class BuildLock(object):
+    """
+    An advisory file lock on a build, shared between processes.
+
+    The lock is released when the process holding it exits, so waiting on it
+    never outlives a crashed download.  Without fcntl, every acquisition succeeds.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """
+        Create the lock.
+
+        :param path: Path to the lock file.
+        """
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def acquire(self, exclusive: bool = True, blocking: bool = True) -> bool:
+        """
+        Acquire the lock.
+
+        :param exclusive: Exclude every other holder rather than exclusive holders.
+        :param blocking: Wait until the lock is available.
+        :returns: False if the lock is held elsewhere and blocking is disabled.
+        """
+        if not HAVE_FCNTL:
+            return True
+        operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        if not blocking:
+            operation |= fcntl.LOCK_NB
+        while True:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(self._fd, operation)
+            except BlockingIOError:
+                return False
+            # The file may have been removed while waiting on it, in which case
+            # the lock excludes nobody and the new file has to be locked instead
+            try:
+                current = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                current = None
+            if current == os.fstat(self._fd).st_ino:
+                return True
+            self.release()
+
+    def remove(self) -> None:
+        """Delete the lock file.  The lock must be held exclusively."""
+        self.path.unlink(missing_ok=True)
+
+    def release(self) -> None:
+        """Release the lock."""
+        if self._fd is not None:
+            # Closing the file releases the lock
+            os.close(self._fd)
+            self._fd = None
+
+
 class BuildManager(object):
     """A class for managing downloaded builds."""
 
+    # Seconds between checks of the build store for builds in use by other processes
+    poll_interval = 0.1
+
     def __init__(self, config: Optional[Path] = None) -> None:
         self.config = BisectionConfig(config)
         self.build_dir = self.config.store_path / "builds"
         if not Path.is_dir(self.build_dir):
             self.build_dir.mkdir(parents=True)
+        self.lock_dir = self.config.store_path / "locks"
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
 
         self.pid = os.getpid()
-        self.db = DatabaseManager(self.config.db_path)
+        self._local = threading.local()
+        self._evict_lock = threading.Lock()
+
+    @property
+    def db(self) -> DatabaseManager:
+        """Return the database connection belonging to the current thread."""
+        if not hasattr(self._local, "db"):
+            self._local.db = DatabaseManager(self.config.db_path)
+        db: DatabaseManager = self._local.db
+        return db
 
     @property
     def current_build_size(self) -> int:
-        """Return the total size of all cached builds."""
-        return sum(os.path.getsize(f) for f in self.build_dir.rglob("*") if f.exists())
+        """Return the total size of all cached builds, as recorded in the database."""
+        res = self.db.cur.execute("SELECT SUM(size) FROM builds")
+        result = res.fetchone()
+        return int(result[0]) if result is not None and result[0] is not None else 0
+
+    def update_build_sizes(self) -> None:
+        """
+        Reconcile the recorded build sizes with the builds on disk.
+
+        Only builds stored without a recorded size, such as those downloaded by
+        older versions, are measured, and their access time serves as their last
+        use.  Builds still being downloaded are measured once complete.  Records
+        of builds which no longer exist are dropped.
+        """
+        res = self.db.cur.execute("SELECT build_path, size FROM builds")
+        recorded = dict(res.fetchall())
+        for build_path in self.build_dir.iterdir():
+            path_string = os.fspath(build_path)
+            if build_path.is_dir() and recorded.pop(path_string, None) is None:
+                self._measure_build(build_path)
+        self.db.cur.executemany(
+            "DELETE FROM builds WHERE build_path = ?",
+            [(path_string,) for path_string in recorded],
+        )
+        self.db.con.commit()
+
+    def _measure_build(self, build_path: Path) -> None:
+        """
+        Record the size of a stored build unless it is being downloaded.
+
+        :param build_path: The build path.
+        """
+        path_string = os.fspath(build_path)
+        lock = self._lock(build_path, "download")
+        try:
+            if not lock.acquire(blocking=False):
+                return
+            # Processes without advisory locks only mark downloads in the database
+            res = self.db.cur.execute(
+                "SELECT COUNT(1) FROM download_queue WHERE build_path = ?",
+                (path_string,),
+            )
+            result = res.fetchone()
+            assert result is not None
+            if result[0]:
+                return
+
+            LOG.debug("Measuring build: %s", build_path)
+            self.db.cur.execute(
+                "INSERT INTO builds (build_path, size, last_used) VALUES (?, ?, ?) "
+                "ON CONFLICT (build_path) DO UPDATE SET size = excluded.size, "
+                "last_used = COALESCE(last_used, excluded.last_used)",
+                (path_string, _directory_size(build_path), build_path.stat().st_atime),
+            )
+        finally:
+            lock.release()
 
     def enumerate_builds(self) -> List[Path]:
         """
         Enumerate all available builds.
 
-        :returns: A list of all available builds sorted by access time.
+        :returns: A list of all available builds, least recently used first.
         """
-        builds = [x for x in self.build_dir.iterdir() if x.is_dir()]
-        return sorted(builds, key=lambda b: b.stat().st_atime_ns)
+        self.update_build_sizes()
+        res = self.db.cur.execute(
+            "SELECT build_path FROM builds ORDER BY last_used, hits"
+        )
+        return [Path(row[0]) for row in res.fetchall()]
 
     def remove_old_builds(self) -> None:
         """Removes stored builds to make room for newer builds."""
-        while self.current_build_size > self.config.persist_limit:
+        with self._evict_lock:
+            self._remove_old_builds()
+
+    def _remove_old_builds(self) -> None:
+        """Evict builds until the store fits within the persist limit."""
+        while True:
             builds = self.enumerate_builds()
+            if self.current_build_size <= self.config.persist_limit:
+                break
+            removed = False
             for build_path in builds:
                 if self.current_build_size < self.config.persist_limit:
                     break
-                res = self.db.cur.execute(
-                    "SELECT COUNT(1) FROM ("
-                    "SELECT build_path FROM in_use UNION ALL "
-                    "SELECT build_path FROM download_queue"
-                    ") WHERE build_path == ?",
-                    (str(build_path),),
-                )
-                result = res.fetchone()
-                assert result is not None
-                build_in_use = result[0]
-                if not build_in_use:
-                    LOG.debug("Removing build: %s", build_path)
-                    shutil.rmtree(build_path)
-                self.db.con.commit()
+                lock = self._lock(build_path, "use")
+                try:
+                    # Builds in use are skipped rather than waited on, as waiting
+                    # would stall every download behind a whole evaluation
+                    if not lock.acquire(blocking=False):
+                        continue
+                    # Builds used by older versions are only marked in the database
+                    res = self.db.cur.execute(
+                        "SELECT COUNT(1) FROM ("
+                        "SELECT build_path FROM in_use UNION ALL "
+                        "SELECT build_path FROM download_queue"
+                        ") WHERE build_path == ?",
+                        (str(build_path),),
+                    )
+                    result = res.fetchone()
+                    assert result is not None
+                    build_in_use = result[0]
+                    if not build_in_use:
+                        LOG.debug("Removing build: %s", build_path)
+                        shutil.rmtree(build_path)
+                        self._remove_locks(build_path, lock)
+                        self.db.cur.execute(
+                            "DELETE FROM builds WHERE build_path = ?",
+                            (str(build_path),),
+                        )
+                        metrics.EVICTIONS.inc()
+                        removed = True
+                    self.db.con.commit()
+                finally:
+                    lock.release()
 
-            time.sleep(0.1)
+            if not removed:
+                LOG.warning("Every stored build is in use, exceeding the persist limit")
+                break
 
-    @contextmanager
-    def get_build(self, build: Fetcher, target: str) -> Iterator[Path]:
+    def _remove_locks(self, build_path: Path, use_lock: BuildLock) -> None:
         """
-        Retrieve the build matching the supplied revision.
+        Delete the lock files of an evicted build.
+
+        :param build_path: The build path.
+        :param use_lock: The use lock of the build, held exclusively.
+        """
+        use_lock.remove()
+        # A process about to download the build again keeps its lock file
+        download_lock = self._lock(build_path, "download")
+        try:
+            if download_lock.acquire(blocking=False):
+                download_lock.remove()
+        finally:
+            download_lock.release()
+
+    def _lock(self, build_path: Path, purpose: str) -> BuildLock:
+        """
+        Return a lock on the supplied build.
+
+        :param build_path: The build path.
+        :param purpose: Either "download", held while the build is downloaded, or
+            "use", shared by the users of the build.
+        :returns: The lock, not yet acquired.
+        """
+        return BuildLock(self.lock_dir / f"{build_path.name}.{purpose}")
+
+    def build_path(self, build: Fetcher, target: str) -> Path:
+        """
+        Return the store location of the supplied build.
 
         :param build: A fuzzFetch.Fetcher build object.
         :param target: The target to retrieve (i.e. firefox, js, gtest, etc.).
-        :yields: The build path.
+        :returns: The build path.
         """
         # pylint: disable=protected-access
-        branch = f"m-{build._branch[0]}"
-        platform = build._platform.system
-        flags = build._flags.build_string()
-        rev = build.changeset[:12]
-        build_name = f"{target}-{branch}-{platform}{flags}-{rev}"
-        target_path = self.build_dir / build_name.lower()
+        return self.changeset_path(
+            build._branch, build.changeset, build._flags, build._platform, target
+        )
+
+    def changeset_path(
+        self,
+        branch: str,
+        changeset: str,
+        flags: BuildFlags,
+        platform: Platform,
+        target: str,
+    ) -> Path:
+        """
+        Return the store location of a build without creating a Fetcher object.
+
+        :param branch: The branch of the build.
+        :param changeset: The changeset of the build.
+        :param flags: The build flags.
+        :param platform: The build platform.
+        :param target: The target to retrieve (i.e. firefox, js, gtest, etc.).
+        :returns: The build path.
+        """
+        build_name = (
+            f"{target}-m-{branch[0]}-{platform.system}{flags.build_string()}"
+            f"-{changeset[:12]}"
+        )
+        return self.build_dir / build_name.lower()
+
+    def download_estimate(self) -> Optional[float]:
+        """Return the average number of seconds spent downloading a build."""
+        res = self.db.cur.execute("SELECT AVG(duration) FROM builds")
+        result = res.fetchone()
+        return result[0] if result is not None else None
+
+    def prefetch(self, build: Fetcher, target: str) -> bool:
+        """
+        Download the supplied build into the store without launching it.
+
+        :param build: A fuzzFetch.Fetcher build object.
+        :param target: The target to retrieve (i.e. firefox, js, gtest, etc.).
+        :returns: False if builds are not persisted, True otherwise.
+        """
+        if not self.config.persist or not self.config.persist_limit:
+            return False
+
+        with self.get_build(build, target):
+            pass
+
+        return True
+
+    def _fetch(self, build: Fetcher, target_path: Path) -> None:
+        """
+        Download the supplied build unless it is already stored.
+
+        :param build: A fuzzFetch.Fetcher build object.
+        :param target_path: The build path.
+        """
         path_string = os.fspath(target_path)
 
+        # Try to insert the build_path into download_queue
+        # If the insert fails, a process without advisory locks is already
+        # downloading it. Poll the database until it completes
         try:
-            # Insert build_path into in_use to prevent deletion
             self.db.cur.execute(
-                "INSERT INTO in_use VALUES (?, ?)", (path_string, self.pid)
+                "INSERT into download_queue VALUES (?, ?)",
+                (path_string, self.pid),
             )
             self.db.con.commit()
-
-            # Try to insert the build_path into download_queue
-            # If the insert fails, another process is already downloading it
-            # Poll the database until it complete
-            try:
+            # If the build doesn't exist on disk, download it
+            if not Path.is_dir(target_path):
+                metrics.CACHE_MISSES.inc(cache="build")
+                with span("evict", "download"):
+                    self.remove_old_builds()
+                start = time.monotonic()
+                # Fetcher downloads and extracts the archive in a single step
+                with span("download", "download", build=target_path.name):
+                    build.extract_build(target_path)
+                duration = time.monotonic() - start
+                # Measured once so that evictions never walk the store
+                size = _directory_size(target_path)
                 self.db.cur.execute(
-                    "INSERT into download_queue VALUES (?, ?)", (path_string, self.pid)
+                    "INSERT INTO builds (build_path, duration, size) "
+                    "VALUES (?, ?, ?) ON CONFLICT (build_path) DO UPDATE SET "
+                    "duration = excluded.duration, size = excluded.size",
+                    (path_string, duration, size),
                 )
                 self.db.con.commit()
-                # If the build doesn't exist on disk, download it
-                if not Path.is_dir(target_path):
-                    self.remove_old_builds()
-                    build.extract_build(target_path)
-            except sqlite3.IntegrityError:
+                metrics.DOWNLOAD_SECONDS.observe(duration)
+                metrics.DOWNLOAD_BYTES.inc(size)
+                record(
+                    "download",
+                    changeset=build.changeset,
+                    size=size,
+                    duration=duration,
+                )
+            else:
+                metrics.CACHE_HITS.inc(cache="build")
+        except sqlite3.IntegrityError:
+            # The failed insert leaves a transaction holding the write lock open,
+            # which would prevent the download from leaving the queue
+            self.db.con.rollback()
+            LOG.warning("Another process is attempting to download the build. Waiting")
+            with span("wait for download", "download", build=target_path.name):
+                with metrics.DOWNLOAD_WAIT_SECONDS.time():
+                    while True:
+                        res = self.db.cur.execute(
+                            "SELECT * FROM download_queue WHERE build_path = ?",
+                            (path_string,),
+                        )
+                        if res.fetchone() is None:
+                            break
+
+                        time.sleep(self.poll_interval)
+        finally:
+            self.db.cur.execute(
+                "DELETE FROM download_queue WHERE build_path = ? AND pid = ?",
+                (path_string, self.pid),
+            )
+            self.db.con.commit()
+
+    @contextmanager
+    def get_build(self, build: Fetcher, target: str) -> Iterator[Path]:
+        """
+        Retrieve the build matching the supplied revision.
+
+        :param build: A fuzzFetch.Fetcher build object.
+        :param target: The target to retrieve (i.e. firefox, js, gtest, etc.).
+        :yields: The build path.
+        """
+        target_path = self.build_path(build, target)
+        path_string = os.fspath(target_path)
+
+        # Insert build_path into in_use to prevent deletion
+        self.db.cur.execute("INSERT INTO in_use VALUES (?, ?)", (path_string, self.pid))
+        self.db.con.commit()
+        # Several threads may hold the same build so release only our own entry
+        in_use_id = self.db.cur.lastrowid
+
+        # Users share a lock on the build so that evictions skip it without polling
+        use_lock = self._lock(target_path, "use")
+        download_lock = self._lock(target_path, "download")
+        try:
+            use_lock.acquire(exclusive=False)
+            # The download lock is held by any process downloading the build, so
+            # waiting on it wakes up as soon as the download completes
+            if not download_lock.acquire(blocking=False):
                 LOG.warning(
                     "Another process is attempting to download the build. Waiting"
                 )
-                while True:
-                    res = self.db.cur.execute(
-                        "SELECT * FROM download_queue WHERE build_path = ?",
-                        (path_string,),
-                    )
-                    if res.fetchone() is None:
-                        break
+                with span("wait for download", "download", build=target_path.name):
+                    with metrics.DOWNLOAD_WAIT_SECONDS.time():
+                        download_lock.acquire()
 
-                    time.sleep(0.1)
+            try:
+                self._fetch(build, target_path)
             finally:
-                self.db.cur.execute(
-                    "DELETE FROM download_queue WHERE build_path = ? AND pid = ?",
-                    (path_string, self.pid),
-                )
-                self.db.con.commit()
+                download_lock.release()
 
-            yield target_path
-        finally:
             self.db.cur.execute(
-                "DELETE FROM in_use WHERE build_path = ? AND pid = ?",
-                (path_string, self.pid),
+                "INSERT INTO builds (build_path, last_used, hits) VALUES (?, ?, 1) "
+                "ON CONFLICT (build_path) DO UPDATE SET "
+                "last_used = excluded.last_used, hits = hits + 1",
+                (path_string, time.time()),
             )
             self.db.con.commit()
+            yield target_path
+        finally:
+            use_lock.release()
+            self.db.cur.execute("DELETE FROM in_use WHERE rowid = ?", (in_use_id,))
+            self.db.con.commit()
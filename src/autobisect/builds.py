@@ -13,14 +13,169 @@
 import copy
 import logging
 import random
-from datetime import timedelta, datetime
-from typing import List, Union, TypeVar, Generic, Type, Any, overload
+from datetime import timedelta, datetime, timezone
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    TypeVar,
+    Generic,
+    Type,
+    Any,
+    overload,
+)
+
+from fuzzfetch import BuildFlags, BuildTask, Fetcher, Platform
 
 LOG = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
 
+class BuildDescriptor(object):
+    """A lightweight reference to a build which is resolved only when probed."""
+
+    __slots__ = ("branch", "kind", "identifier", "timestamp", "changeset")
+
+    DATE = "date"
+    CHANGESET = "changeset"
+    TASK = "task"
+
+    def __init__(
+        self,
+        branch: str,
+        kind: str,
+        identifier: str,
+        timestamp: Optional[datetime] = None,
+    ):
+        """
+        Instantiate a new descriptor.
+
+        :param branch: The branch the build belongs to.
+        :param kind: One of DATE, CHANGESET or TASK.
+        :param identifier: The date (YYYY-MM-DD), changeset or taskcluster task id.
+        :param timestamp: The push time of the build, if known.
+        """
+        self.branch = branch
+        self.kind = kind
+        self.identifier = identifier
+        self.timestamp = timestamp
+        self.changeset: Optional[str] = identifier if kind == self.CHANGESET else None
+
+    @classmethod
+    def from_date(cls, branch: str, date: str) -> "BuildDescriptor":
+        """
+        Create a descriptor for the build of the supplied day.
+
+        :param branch: The branch the build belongs to.
+        :param date: The date in YYYY-MM-DD format.
+        """
+        return cls(branch, cls.DATE, date)
+
+    @classmethod
+    def from_changeset(
+        cls, branch: str, changeset: str, timestamp: Optional[datetime] = None
+    ) -> "BuildDescriptor":
+        """
+        Create a descriptor for the build of the supplied changeset.
+
+        :param branch: The branch the build belongs to.
+        :param changeset: The changeset of the build.
+        :param timestamp: The push time of the changeset.
+        """
+        return cls(branch, cls.CHANGESET, changeset, timestamp)
+
+    @classmethod
+    def from_task(cls, branch: str, task: BuildTask) -> "BuildDescriptor":
+        """
+        Create a descriptor for the supplied taskcluster task.
+
+        :param branch: The branch the build belongs to.
+        :param task: A fuzzfetch BuildTask object.
+        """
+        rank = getattr(task, "rank", 0)
+        timestamp = datetime.fromtimestamp(rank, tz=timezone.utc) if rank else None
+        return cls(branch, cls.TASK, task.taskId, timestamp)
+
+    @property
+    def rank(self) -> int:
+        """Return the taskcluster rank (push time) of the build or 0 if unknown."""
+        return int(self.timestamp.timestamp()) if self.timestamp else 0
+
+    def resolve(self, flags: BuildFlags, target: str, platform: Platform) -> Fetcher:
+        """
+        Create the Fetcher object referenced by this descriptor.
+
+        :param flags: The build flags.
+        :param target: The Fetcher target.
+        :param platform: The target platform.
+        :raises FetcherException: If no matching build can be found.
+        :returns: A Fetcher object.
+        """
+        build: Union[str, BuildTask] = self.identifier
+        if self.kind == self.TASK:
+            queue = BuildTask.TASKCLUSTER_API % ("queue",)
+            build = BuildTask(
+                f"{queue}/task/{self.identifier}",
+                queue,
+                {"taskId": self.identifier, "rank": self.rank},
+            )
+
+        return Fetcher(self.branch, build, flags, targets=[target], platform=platform)
+
+    @classmethod
+    def from_build(cls, build: Fetcher) -> "BuildDescriptor":
+        """
+        Create a descriptor referencing the task of an existing Fetcher object.
+
+        :param build: A resolved Fetcher object.
+        """
+        # pylint: disable=protected-access
+        assert build._task is not None
+        descriptor = cls.from_task(build._branch, build._task)
+        descriptor.changeset = build.changeset
+        return descriptor
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON serializable representation of the descriptor."""
+        return {
+            "branch": self.branch,
+            "kind": self.kind,
+            "identifier": self.identifier,
+            "rank": self.rank,
+            "changeset": self.changeset,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BuildDescriptor":
+        """
+        Recreate a descriptor from the output of to_dict.
+
+        :param data: The serialized descriptor.
+        """
+        rank = data.get("rank", 0)
+        timestamp = datetime.fromtimestamp(rank, tz=timezone.utc) if rank else None
+        descriptor = cls(data["branch"], data["kind"], data["identifier"], timestamp)
+        descriptor.changeset = data.get("changeset")
+        return descriptor
+
+    def _key(self) -> Tuple[str, str, str]:
+        return self.branch, self.kind, self.identifier
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, BuildDescriptor):
+            return self._key() == other._key()
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        return f"{self.branch}:{self.identifier}"
+
+
 class BuildRange(Generic[T]):
     """A class for storing a range of builds or build representations."""
 
@@ -64,6 +219,17 @@ class BuildRange(Generic[T]):
 
         return None
 
+    def pivots(self, count: int) -> List[T]:
+        """
+        Returns the builds splitting the range into count + 1 similarly sized segments.
+
+        :param count: The maximum number of pivots to return.
+        :returns: A list of unique builds in range order.
+        """
+        size = len(self)
+        indices = sorted({(size * i) // (count + 1) for i in range(1, count + 1)})
+        return [self._builds[i] for i in indices if i < size]
+
     @property
     def random(self) -> Union[T, None]:
         """Returns a random build."""
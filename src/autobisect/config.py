@@ -13,6 +13,7 @@ LOG = logging.getLogger(__name__)
 APP_CONFIG_DIR = Path(user_config_dir("autobisect"))
 APP_CONFIG_FILE = APP_CONFIG_DIR / "autobisect.ini"
 APP_CACHE_DIR = Path(user_cache_dir("autobisect"))
+APP_SOCKET = APP_CACHE_DIR / "autobisect.sock"
 
 DEFAULT_CONFIG = f"""
 [autobisect]
@@ -54,6 +55,9 @@ class BisectionConfig(object):
             raise
 
         self.db_path = self.store_path / "autobisect.db"
+        self.results_path = self.store_path / "results.db"
+        self.sessions_path = self.store_path / "sessions"
+        self.index_path = self.store_path / "index.db"
 
     @staticmethod
     def create_default_config() -> Path:
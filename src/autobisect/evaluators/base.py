@@ -1,9 +1,12 @@
 # This Source Code Form is subject to the terms of the Mozilla Public
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import hashlib
+import json
 from abc import ABC, abstractmethod
 from enum import Enum
 from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 
 class EvaluatorResult(Enum):
@@ -17,11 +20,86 @@ class EvaluatorResult(Enum):
 class Evaluator(ABC):
     """Base evaluator class."""
 
+    testcase: Path
+    repeat: Optional[int]
+
     @property
     @abstractmethod
     def target(self) -> str:
         """The corresponding Fetcher target."""
 
     @abstractmethod
-    def evaluate_testcase(self, build_path: Path) -> EvaluatorResult:
-        """Method for evaluating testcase."""
+    def evaluate_testcase(
+        self, build_path: Path, repeat: Optional[int] = None
+    ) -> EvaluatorResult:
+        """
+        Method for evaluating testcase.
+
+        :param build_path: Path to the build.
+        :param repeat: Number of launches, overriding the configured repeat.
+        :returns: Result of evaluation.
+        """
+
+    def reproduction_rate(self, build_path: Path, runs: int) -> Tuple[int, int]:
+        """
+        Evaluate the testcase once per run to measure how often it reproduces.
+
+        :param build_path: Path to the build.
+        :param runs: Number of evaluations.
+        :returns: Number of crashing runs and number of runs which launched.
+        """
+        return self._tally(
+            self.evaluate_testcase(build_path, repeat=1) for _ in range(runs)
+        )
+
+    @staticmethod
+    def _tally(results: Iterable[EvaluatorResult]) -> Tuple[int, int]:
+        """
+        Count the crashing and launching runs of a reproduction rate measurement.
+
+        :param results: Results of the single runs.
+        :returns: Number of crashing runs and number of runs which launched.
+        """
+        crashes = completed = 0
+        for result in results:
+            if result != EvaluatorResult.BUILD_FAILED:
+                completed += 1
+            if result == EvaluatorResult.BUILD_CRASHED:
+                crashes += 1
+
+        return crashes, completed
+
+    def fingerprint(self) -> Optional[str]:
+        """
+        Digest identifying the testcase and the settings affecting its result.
+
+        :returns: The digest or None if results can't be reused.
+        """
+        return None
+
+    def launch_fingerprint(self) -> Optional[str]:
+        """
+        Digest identifying the settings affecting whether a build launches.
+
+        Unlike the fingerprint, it doesn't cover the testcase, so launch failures
+        can be shared by every testcase using the same settings.
+
+        :returns: The digest or None if launch failures can't be shared.
+        """
+        return None
+
+    @staticmethod
+    def _digest(files: Iterable[Path], settings: Dict[str, Any]) -> str:
+        """
+        Create a digest of the supplied files and settings.
+
+        :param files: Files whose contents affect the evaluation result.
+        :param settings: Evaluator settings affecting the evaluation result.
+        :returns: A hex digest.
+        """
+        digest = hashlib.sha256()
+        for path in sorted(files):
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+        digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
@@ -7,7 +7,7 @@ import os
 from pathlib import Path
 from platform import system
 from tempfile import NamedTemporaryFile, TemporaryDirectory
-from typing import Optional, NoReturn, Any, List
+from typing import Optional, NoReturn, Any, List, Set, Tuple
 
 from grizzly.common.frontend import Exit
 from grizzly.common.storage import TestCase
@@ -15,6 +15,7 @@ from grizzly.replay import ReplayArgs
 from grizzly.replay.main import main as replay_main
 
 from autobisect.evaluators.base import Evaluator, EvaluatorResult
+from autobisect.trace import span
 
 LOG = logging.getLogger(__name__)
 
@@ -69,11 +70,62 @@ class BrowserEvaluator(Evaluator):
         if logging.getLogger().level != logging.DEBUG:
             logging.getLogger("grizzly").setLevel(logging.INFO)
 
+    def fingerprint(self) -> Optional[str]:
+        """
+        Digest identifying the testcase and the settings affecting its result.
+
+        :returns: The digest or None if the testcase can't be read.
+        """
+        files: Set[Path] = {self.testcase}
+        if self.scan_dir:
+            files.update(p for p in self.testcase.parent.rglob("*") if p.is_file())
+        if self.prefs:
+            files.add(Path(self.prefs))
+        settings = {
+            "target": self.target,
+            "env": self.env_vars,
+            "ignore": sorted(self.ignore) if self.ignore else None,
+            "relaunch": self.relaunch,
+            "repeat": self.repeat,
+            "timeout": self.timeout,
+            "time_limit": self.time_limit,
+            "use_harness": self.use_harness,
+            "valgrind": self.valgrind,
+        }
+        try:
+            return self._digest(files, settings)
+        except OSError:
+            return None
+
+    def launch_fingerprint(self) -> Optional[str]:
+        """
+        Digest identifying the settings used to verify builds.
+
+        :returns: The digest or None if the prefs file can't be read.
+        """
+        settings = {
+            "target": self.target,
+            "env": self.env_vars,
+            "ignore": sorted(self.ignore) if self.ignore else None,
+            "launch_attempts": self.launch_attempts,
+            "launch_timeout": self.launch_timeout,
+            "relaunch": self.relaunch,
+            "timeout": self.timeout,
+            "time_limit": self.time_limit,
+            "use_harness": self.use_harness,
+            "valgrind": self.valgrind,
+        }
+        try:
+            return self._digest([Path(self.prefs)] if self.prefs else [], settings)
+        except OSError:
+            return None
+
     def parse_args(
         self,
         binary: Path,
         test_dir: Path,
         verify: Optional[bool] = False,
+        repeat: Optional[int] = None,
     ) -> argparse.Namespace:
         """
         Parse arguments destined for grizzly.
@@ -81,8 +133,11 @@ class BrowserEvaluator(Evaluator):
         :param binary: The path to the firefox binary.
         :param test_dir: The path to the testcase.
         :param verify: Indicates if we're running a testcase or verifying the browser stability.
+        :param repeat: Number of repeats, overriding the configured repeat.
         :returns: The return code or None.
         """
+        if repeat is None:
+            repeat = self.repeat
         raw_args: List[Any] = [binary, test_dir]
 
         if self.launch_attempts:
@@ -112,8 +167,8 @@ class BrowserEvaluator(Evaluator):
                 raw_args.extend(["--output", self.logs])
             if self.pernosco:
                 raw_args.extend(["--pernosco"])
-            if self.repeat is not None:
-                raw_args.extend(["--repeat", self.repeat])
+            if repeat is not None:
+                raw_args.extend(["--repeat", repeat])
 
         return ReplayArgsNoExit().parse_args([str(arg) for arg in raw_args])
 
@@ -129,7 +184,9 @@ class BrowserEvaluator(Evaluator):
 
         try:
             LOG.info("> Verifying build...")
-            status = self.launch(binary, Path(temp.name), verify=True)
+            with span("verify build", "evaluate") as details:
+                status = self.launch(binary, Path(temp.name), verify=True)
+                details["result"] = status.name
 
             if status != EvaluatorResult.BUILD_PASSED:
                 LOG.error(">> Failed to validate build!")
@@ -140,36 +197,81 @@ class BrowserEvaluator(Evaluator):
         finally:
             os.unlink(temp.name)
 
-    def evaluate_testcase(self, build_path: Path) -> EvaluatorResult:
+    def _binary(self, build_path: Path) -> Optional[Path]:
         """
-        Validate build and launch with supplied testcase.
+        Locate the firefox binary of the supplied build.
 
-        :returns: Result of evaluation.
+        :param build_path: Path to the build.
+        :returns: Path to the binary or None if it doesn't exist.
         """
         binary = "firefox.exe" if system() == "Windows" else "firefox"
         binary_path = build_path / binary
-        result = EvaluatorResult.BUILD_FAILED
         if not binary_path.is_file():
             LOG.error("Cannot find build path!")
-            return result
+            return None
+        return binary_path
 
-        if self.verify_build(binary_path):
-            LOG.info("> Launching build with testcase...")
-            result = self.launch(binary_path, self.testcase, scan_dir=self.scan_dir)
+    def _launch_testcase(
+        self, binary_path: Path, repeat: Optional[int]
+    ) -> EvaluatorResult:
+        """
+        Launch a verified build with the testcase.
 
-            if result == EvaluatorResult.BUILD_CRASHED:
-                LOG.info(">> Build crashed!")
-            else:
-                LOG.info(">> Build did not crash!")
+        :param binary_path: The path to the firefox binary.
+        :param repeat: Number of repeats, overriding the configured repeat.
+        :returns: Result of evaluation.
+        """
+        LOG.info("> Launching build with testcase...")
+        result = self.launch(
+            binary_path, self.testcase, scan_dir=self.scan_dir, repeat=repeat
+        )
+
+        if result == EvaluatorResult.BUILD_CRASHED:
+            LOG.info(">> Build crashed!")
+        else:
+            LOG.info(">> Build did not crash!")
 
         return result
 
+    def evaluate_testcase(
+        self, build_path: Path, repeat: Optional[int] = None
+    ) -> EvaluatorResult:
+        """
+        Validate build and launch with supplied testcase.
+
+        :param build_path: Path to the build.
+        :param repeat: Number of repeats, overriding the configured repeat.
+        :returns: Result of evaluation.
+        """
+        binary_path = self._binary(build_path)
+        if binary_path is None or not self.verify_build(binary_path):
+            return EvaluatorResult.BUILD_FAILED
+
+        return self._launch_testcase(binary_path, repeat)
+
+    def reproduction_rate(self, build_path: Path, runs: int) -> Tuple[int, int]:
+        """
+        Launch the testcase once per run to measure how often it reproduces.
+
+        The build is only verified once.
+
+        :param build_path: Path to the build.
+        :param runs: Number of launches.
+        :returns: Number of crashing runs and number of runs which launched.
+        """
+        binary_path = self._binary(build_path)
+        if binary_path is None or not self.verify_build(binary_path):
+            return 0, 0
+
+        return self._tally(self._launch_testcase(binary_path, 1) for _ in range(runs))
+
     def launch(
         self,
         binary: Path,
         test_path: Path,
         verify: bool = False,
         scan_dir: bool = False,
+        repeat: Optional[int] = None,
     ) -> EvaluatorResult:
         """
         Launch firefox using the supplied binary and testcase.
@@ -178,6 +280,7 @@ class BrowserEvaluator(Evaluator):
         :param test_path: The path to the testcase.
         :param verify: Indicates if we're running a testcase or verifying the browser stability.
         :param scan_dir: Scan subdirectory for additional files to serve.
+        :param repeat: Number of repeats, overriding the configured repeat.
         :returns: The return code or None.
         """
         if not binary.is_file():
@@ -192,8 +295,13 @@ class BrowserEvaluator(Evaluator):
 
         with TemporaryDirectory() as test_dir:
             testcase.dump(Path(test_dir), include_details=True)
-            args = self.parse_args(binary, Path(test_dir), verify)
-            success = replay_main(args)
+            args = self.parse_args(binary, Path(test_dir), verify, repeat)
+            # Repeats and relaunches are handled by grizzly within a single replay
+            with span(
+                "replay", "evaluate", verify=verify, repeat=args.repeat
+            ) as details:
+                success = replay_main(args)
+                details["exit"] = getattr(success, "name", success)
 
             if success == Exit.SUCCESS:
                 return EvaluatorResult.BUILD_CRASHED
@@ -4,26 +4,61 @@
 import logging
 import os
 import re
+import threading
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
 from platform import system
 from string import Template
-from typing import List, Any
+from typing import Callable, Iterator, List, Any, Optional, Tuple
 
 import requests
-from lithium.interestingness import diff_test, hangs, outputs, timed_run
-from lithium.interestingness.timed_run import ExitStatus
+from lithium.interestingness import timed_run
+from lithium.interestingness.timed_run import ExitStatus, RunData
 
 from autobisect.evaluators.base import Evaluator, EvaluatorResult
+from autobisect.trace import span
 
 LOG = logging.getLogger(__name__)
 
 HTTP_SESSION = requests.Session()
 
+# Timeout of lithium's interestingness tests, used by the diff, hang and output modes
+INTERESTINGNESS_TIMEOUT: int = timed_run.BaseParser().get_default("timeout")
+
+# Serializes launches where the working directory can only be changed process wide
+CWD_LOCK = threading.Lock()
+
 FLAGS_URL = Template(
     "https://hg.mozilla.org/mozilla-unified/raw-file/$rev/js/src/shell/js.cpp"
 )
 
 
+@contextmanager
+def _working_directory(path: Path) -> Iterator[Optional[Callable[[], None]]]:
+    """
+    Run the commands launched within the context in the supplied directory.
+
+    The directory is changed by the child process after forking.  That isn't
+    supported on Windows, where the working directory of this process is changed
+    instead and launches are serialized.
+
+    :param path: The working directory.
+    :returns: The preexec_fn to pass to timed_run.
+    """
+    if system() != "Windows":
+        yield partial(os.chdir, path)
+        return
+
+    with CWD_LOCK:
+        previous_path = os.getcwd()
+        os.chdir(path)
+        try:
+            yield None
+        finally:
+            os.chdir(previous_path)
+
+
 def _get_rev(binary: Path) -> str:
     """
     Return either the revision specified in the fuzzmanagerconf or tip.
@@ -53,7 +88,7 @@ class JSEvaluator(Evaluator):
     def __init__(self, testcase: Path, **kwargs: Any) -> None:
         self.testcase = testcase
         self.flags = kwargs.get("flags", [])
-        self.repeat = kwargs.get("repeat", 1)
+        self.repeat: int = kwargs.get("repeat", 1)
 
         # JS Shell launch arguments
         self.timeout = kwargs.get("timeout", 60)
@@ -69,6 +104,40 @@ class JSEvaluator(Evaluator):
                 raise JSEvaluatorException("Match mode requires a match string")
             self._match = str(kwargs["match"])
 
+    def fingerprint(self) -> Optional[str]:
+        """
+        Digest identifying the testcase and the settings affecting its result.
+
+        :returns: The digest or None if the testcase can't be read.
+        """
+        settings = {
+            "target": self.target,
+            "flags": self.flags,
+            "repeat": self.repeat,
+            "timeout": self.timeout,
+            "detect": self.detect,
+            "arg_1": getattr(self, "_arg_1", None),
+            "arg_2": getattr(self, "_arg_2", None),
+            "match": getattr(self, "_match", None),
+        }
+        try:
+            return self._digest([self.testcase], settings)
+        except OSError:
+            return None
+
+    def launch_fingerprint(self) -> Optional[str]:
+        """
+        Digest identifying the settings used to verify builds.
+
+        :returns: The digest.
+        """
+        settings = {
+            "target": self.target,
+            "flags": self.flags,
+            "timeout": self.timeout,
+        }
+        return self._digest([], settings)
+
     @staticmethod
     def get_valid_flags(rev: str) -> List[str]:
         """
@@ -100,19 +169,75 @@ class JSEvaluator(Evaluator):
         """
         LOG.info("> Verifying build...")
         args = [str(binary), *flags, "-e", '"quit()"']
-        run_data = timed_run.timed_run(args, self.timeout)
+        with span("verify build", "evaluate") as details:
+            run_data = timed_run.timed_run(args, self.timeout)
+            details["status"] = run_data.status.name
         if run_data.status is not ExitStatus.NORMAL:
             LOG.error(">> Build crashed!")
             return False
 
         return True
 
-    def evaluate_testcase(self, build_path: Path) -> EvaluatorResult:
-        """Validate build and launch with supplied testcase."""
+    def _interesting(self, binary_path: Path, flags: List[str]) -> bool:
+        """
+        Launch the build with the testcase once.
+
+        The shell runs in the directory of the testcase, as some testcases load
+        files relative to it, and finds its libraries in the build directory.
+
+        :param binary_path: The path to the target binary.
+        :param flags: Runtime flags.
+        :returns: True if the configured detection matched.
+        """
+        env = dict(os.environ, LD_LIBRARY_PATH=str(binary_path.parent))
+        testcase = str(self.testcase.resolve())
+        with _working_directory(self.testcase.resolve().parent) as preexec_fn:
+
+            def run(*args: str, timeout: int = INTERESTINGNESS_TIMEOUT) -> RunData:
+                return timed_run.timed_run(
+                    [str(binary_path), *args],
+                    timeout,
+                    env=env,
+                    preexec_fn=preexec_fn,
+                )
+
+            if self.detect == "diff":
+                first = run(*self._arg_1.split(), *flags, testcase)
+                second = run(*self._arg_2.split(), *flags, testcase)
+                return (
+                    first.return_code != second.return_code
+                    or first.out != second.out
+                    or first.err != second.err
+                )
+            if self.detect == "output":
+                result = run(*flags, testcase)
+                match = re.escape(self._match.encode("utf-8"))
+                return any(
+                    re.search(match, data, flags=re.MULTILINE)
+                    for data in (result.out, result.err)
+                    if isinstance(data, bytes)
+                )
+            if self.detect == "crash":
+                result = run(*flags, testcase, timeout=self.timeout)
+                return (
+                    result.status == ExitStatus.CRASH
+                    and b"[unhandlable oom]" not in result.err
+                )
+            if self.detect == "hang":
+                return run(*flags, testcase).status == ExitStatus.TIMEOUT
+        return False
+
+    def _prepare(self, build_path: Path) -> Optional[Tuple[Path, List[str]]]:
+        """
+        Locate the binary, select the supported runtime flags and verify the build.
+
+        :param build_path: Path to the build.
+        :returns: The binary and flags or None if the build is unusable.
+        """
         binary = "js.exe" if system() == "Windows" else "js"
         binary_path = build_path / "dist" / "bin" / binary
         if not binary_path.is_file():
-            return EvaluatorResult.BUILD_FAILED
+            return None
         rev = _get_rev(binary_path)
         all_flags = self.get_valid_flags(rev)
         flags = []
@@ -120,47 +245,61 @@ class JSEvaluator(Evaluator):
             if flag.lstrip("--").split("=")[0] in all_flags:
                 flags.append(flag)
 
-        if self.verify_build(binary_path, flags):
-            common_args = [
-                str(binary_path),
-                *flags,
-                str(self.testcase),
-            ]
-
-            # Some testcases require setting the cwd to the parent dir
-            previous_path = os.getcwd()
-            os.chdir(os.path.dirname(os.path.abspath(self.testcase)))
-
-            # Set LD_LIBRARY_PATH to the build directory
-            previous_ld_path = os.environ.get("LD_LIBRARY_PATH", "")
-            os.environ["LD_LIBRARY_PATH"] = str(binary_path.parent)
-
-            try:
-                for _ in range(self.repeat):
-                    LOG.info("> Launching build with testcase...")
-                    if self.detect == "diff":
-                        args = ["-a", self._arg_1, "-b", self._arg_2] + common_args
-                        if diff_test.interesting(args):
-                            return EvaluatorResult.BUILD_CRASHED
-                    elif self.detect == "output":
-                        args = ["-s", self._match] + common_args
-                        if outputs.interesting(args):
-                            return EvaluatorResult.BUILD_CRASHED
-                    elif self.detect == "crash":
-                        args = [str(binary_path), *flags, str(self.testcase)]
-                        result = timed_run.timed_run(args, self.timeout)
-                        if result.status == ExitStatus.CRASH:
-                            if b"[unhandlable oom]" not in result.err:
-                                return EvaluatorResult.BUILD_CRASHED
-                    elif self.detect == "hang":
-                        if hangs.interesting(common_args):
-                            return EvaluatorResult.BUILD_CRASHED
-            finally:
-                # Reset cwd and LD_LIBRARY_PATH
-                os.chdir(previous_path)
-                os.environ["LD_LIBRARY_PATH"] = previous_ld_path
-
-            LOG.info("> Failed to reproduce issue!")
-            return EvaluatorResult.BUILD_PASSED
-
-        return EvaluatorResult.BUILD_FAILED
+        if not self.verify_build(binary_path, flags):
+            return None
+
+        return binary_path, flags
+
+    def launch(self, binary_path: Path, flags: List[str], repeat: int) -> bool:
+        """
+        Launch a verified build with the testcase until it reproduces.
+
+        :param binary_path: The path to the target binary.
+        :param flags: Runtime flags.
+        :param repeat: Number of launches.
+        :returns: True if the issue reproduced.
+        """
+        for run in range(repeat):
+            LOG.info("> Launching build with testcase...")
+            with span("run", "evaluate", run=run, detect=self.detect):
+                if self._interesting(binary_path, flags):
+                    return True
+
+        return False
+
+    def evaluate_testcase(
+        self, build_path: Path, repeat: Optional[int] = None
+    ) -> EvaluatorResult:
+        """
+        Validate build and launch with supplied testcase.
+
+        :param build_path: Path to the build.
+        :param repeat: Number of launches, overriding the configured repeat.
+        :returns: Result of evaluation.
+        """
+        prepared = self._prepare(build_path)
+        if prepared is None:
+            return EvaluatorResult.BUILD_FAILED
+
+        if self.launch(*prepared, self.repeat if repeat is None else repeat):
+            return EvaluatorResult.BUILD_CRASHED
+
+        LOG.info("> Failed to reproduce issue!")
+        return EvaluatorResult.BUILD_PASSED
+
+    def reproduction_rate(self, build_path: Path, runs: int) -> Tuple[int, int]:
+        """
+        Launch the testcase once per run to measure how often it reproduces.
+
+        The build is only verified once, as are the supported runtime flags.
+
+        :param build_path: Path to the build.
+        :param runs: Number of launches.
+        :returns: Number of crashing runs and number of runs which launched.
+        """
+        prepared = self._prepare(build_path)
+        if prepared is None:
+            return 0, 0
+
+        crashes = sum(self.launch(*prepared, 1) for _ in range(runs))
+        return crashes, runs
@@ -0,0 +1,315 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# pylint: disable=protected-access
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from fuzzfetch import BuildFlags, BuildTask, Fetcher, Platform
+
+LOG = logging.getLogger(__name__)
+
+# Builds of older pushes are complete and their metadata can no longer change
+IMMUTABLE_AGE = timedelta(days=2)
+
+# Launch failures may be environmental, so they are only trusted for a while
+BROKEN_MAX_AGE = timedelta(days=7)
+
+
+def is_immutable(timestamp: datetime) -> bool:
+    """
+    Whether metadata of builds pushed at the supplied time can still change.
+
+    :param timestamp: The push time.
+    """
+    return timestamp < datetime.now(timezone.utc) - IMMUTABLE_AGE
+
+
+class IndexedFetcher(Fetcher):
+    """A Fetcher object restored from the build index without network access."""
+
+    def __init__(
+        self,
+        branch: str,
+        task: BuildTask,
+        flags: BuildFlags,
+        target: str,
+        platform: Platform,
+        build_info: Dict[str, str],
+        artifact_base: str,
+    ) -> None:
+        """
+        Restore a build.
+
+        :param branch: The branch of the build.
+        :param task: The taskcluster task of the build.
+        :param flags: The build flags.
+        :param target: The Fetcher target.
+        :param platform: The build platform.
+        :param build_info: The build info artifact of the task.
+        :param artifact_base: The base name of the task artifacts.
+        """
+        self._indexed = {"build_info": build_info, "_artifact_base": artifact_base}
+        super().__init__(branch, task, flags, targets=[target], platform=platform)
+
+    @property
+    def build_info(self) -> Dict[str, str]:
+        # Fetcher.__init__ resets the memo before reading the build id
+        for key, value in self._indexed.items():
+            self._memo.setdefault(key, value)
+        return super().build_info
+
+
+class BuildIndex(object):
+    """Sqlite3 backed index of taskcluster build metadata."""
+
+    def __init__(self, db_path: Path) -> None:
+        """
+        Open the index.
+
+        :param db_path: Path to the sqlite3 database.
+        """
+        self._lock = threading.Lock()
+        self.con = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.con.execute(
+            "CREATE TABLE IF NOT EXISTS builds ("
+            "branch TEXT, flags TEXT, platform TEXT, target TEXT, kind TEXT, "
+            "identifier TEXT, task_id TEXT, rank INT, task_url TEXT, "
+            "queue_server TEXT, artifact_base TEXT, build_info TEXT, timestamp REAL, "
+            "PRIMARY KEY (branch, flags, platform, target, kind, identifier))"
+        )
+        self.con.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "branch TEXT, flags TEXT, platform TEXT, date TEXT, task_id TEXT, "
+            "rank INT, task_url TEXT, queue_server TEXT)"
+        )
+        self.con.execute(
+            "CREATE INDEX IF NOT EXISTS tasks_date ON tasks "
+            "(branch, flags, platform, date)"
+        )
+        # Dates whose tasks have been enumerated, as a day may have no tasks at all
+        self.con.execute(
+            "CREATE TABLE IF NOT EXISTS dates ("
+            "branch TEXT, flags TEXT, platform TEXT, date TEXT, "
+            "PRIMARY KEY (branch, flags, platform, date))"
+        )
+        # Launch failures depend on the runtime flags, so they are recorded per
+        # launch fingerprint.  Tables of older versions lack it and are dropped.
+        columns = [row[1] for row in self.con.execute("PRAGMA table_info(broken)")]
+        if columns and "launch_fingerprint" not in columns:
+            self.con.execute("DROP TABLE broken")
+        self.con.execute(
+            "CREATE TABLE IF NOT EXISTS broken ("
+            "branch TEXT, flags TEXT, platform TEXT, target TEXT, changeset TEXT, "
+            "launch_fingerprint TEXT, failures INT, timestamp REAL, "
+            "PRIMARY KEY "
+            "(branch, flags, platform, target, changeset, launch_fingerprint))"
+        )
+        self.con.commit()
+
+    @staticmethod
+    def _key(
+        branch: str, flags: BuildFlags, platform: Platform
+    ) -> Tuple[str, str, str]:
+        return branch, flags.build_string(), f"{platform.system}-{platform.machine}"
+
+    def get(
+        self,
+        branch: str,
+        kind: str,
+        identifier: str,
+        flags: BuildFlags,
+        platform: Platform,
+        target: str,
+    ) -> Optional[Fetcher]:
+        """
+        Restore a previously resolved build.
+
+        :param branch: The branch of the build.
+        :param kind: The kind of identifier (e.g. date, changeset or task).
+        :param identifier: The identifier the build was resolved from.
+        :param flags: The build flags.
+        :param platform: The build platform.
+        :param target: The Fetcher target.
+        :returns: The Fetcher object or None if the build isn't indexed.
+        """
+        with self._lock:
+            row = self.con.execute(
+                "SELECT task_id, rank, task_url, queue_server, artifact_base, "
+                "build_info FROM builds WHERE branch = ? AND flags = ? "
+                "AND platform = ? AND target = ? AND kind = ? AND identifier = ?",
+                (*self._key(branch, flags, platform), target, kind, identifier),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        task_id, rank, task_url, queue_server, artifact_base, build_info = row
+        task = BuildTask(task_url, queue_server, {"taskId": task_id, "rank": rank})
+        return IndexedFetcher(
+            branch, task, flags, target, platform, json.loads(build_info), artifact_base
+        )
+
+    def put(self, kind: str, identifier: str, build: Fetcher, target: str) -> None:
+        """
+        Index a resolved build, unless its metadata may still change.
+
+        :param kind: The kind of identifier (e.g. date, changeset or task).
+        :param identifier: The identifier the build was resolved from.
+        :param build: The resolved Fetcher object.
+        :param target: The Fetcher target.
+        """
+        if not is_immutable(build.datetime):
+            return
+
+        task = build._task
+        assert task is not None
+        with self._lock:
+            self.con.execute(
+                "INSERT OR REPLACE INTO builds VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    *self._key(build._branch, build._flags, build._platform),
+                    target,
+                    kind,
+                    identifier,
+                    build.task_id,
+                    getattr(task, "rank", 0),
+                    task.url,
+                    task.queue_server,
+                    build._artifact_base,
+                    json.dumps(build.build_info),
+                    build.datetime.timestamp(),
+                ),
+            )
+            self.con.commit()
+
+    def get_tasks(
+        self, branch: str, date: str, flags: BuildFlags, platform: Platform
+    ) -> Optional[List[BuildTask]]:
+        """
+        Retrieve the tasks of a previously enumerated pushdate.
+
+        :param branch: The branch of the builds.
+        :param date: The pushdate in YYYY-MM-DD format.
+        :param flags: The build flags.
+        :param platform: The build platform.
+        :returns: The tasks or None if the pushdate hasn't been enumerated.
+        """
+        key = (*self._key(branch, flags, platform), date)
+        with self._lock:
+            if (
+                self.con.execute(
+                    "SELECT 1 FROM dates WHERE branch = ? AND flags = ? "
+                    "AND platform = ? AND date = ?",
+                    key,
+                ).fetchone()
+                is None
+            ):
+                return None
+            rows = self.con.execute(
+                "SELECT task_id, rank, task_url, queue_server FROM tasks "
+                "WHERE branch = ? AND flags = ? AND platform = ? AND date = ? "
+                "ORDER BY rowid",
+                key,
+            ).fetchall()
+
+        return [
+            BuildTask(url, queue, {"taskId": task_id, "rank": rank})
+            for task_id, rank, url, queue in rows
+        ]
+
+    def put_tasks(
+        self,
+        branch: str,
+        date: str,
+        flags: BuildFlags,
+        platform: Platform,
+        tasks: List[BuildTask],
+    ) -> None:
+        """
+        Index the tasks of a pushdate, unless builds may still be added to it.
+
+        :param branch: The branch of the builds.
+        :param date: The pushdate in YYYY-MM-DD format.
+        :param flags: The build flags.
+        :param platform: The build platform.
+        :param tasks: The tasks of the pushdate.
+        """
+        end = datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        if not is_immutable(end + timedelta(days=1)):
+            return
+
+        key = (*self._key(branch, flags, platform), date)
+        rows: List[Tuple[Any, ...]] = [
+            (*key, task.taskId, getattr(task, "rank", 0), task.url, task.queue_server)
+            for task in tasks
+        ]
+        with self._lock:
+            self.con.execute(
+                "DELETE FROM tasks WHERE branch = ? AND flags = ? AND platform = ? "
+                "AND date = ?",
+                key,
+            )
+            self.con.executemany(
+                "INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self.con.execute("INSERT OR REPLACE INTO dates VALUES (?, ?, ?, ?)", key)
+            self.con.commit()
+
+    def is_broken(self, build: Fetcher, target: str, fingerprint: str) -> bool:
+        """
+        Whether the supplied build recently failed to launch with the same settings.
+
+        :param build: The resolved Fetcher object.
+        :param target: The Fetcher target.
+        :param fingerprint: Launch fingerprint of the evaluator.
+        """
+        with self._lock:
+            row = self.con.execute(
+                "SELECT 1 FROM broken WHERE branch = ? AND flags = ? "
+                "AND platform = ? AND target = ? AND changeset = ? "
+                "AND launch_fingerprint = ? AND timestamp >= ?",
+                (
+                    *self._key(build._branch, build._flags, build._platform),
+                    target,
+                    build.changeset,
+                    fingerprint,
+                    time.time() - BROKEN_MAX_AGE.total_seconds(),
+                ),
+            ).fetchone()
+        return row is not None
+
+    def mark_broken(self, build: Fetcher, target: str, fingerprint: str) -> None:
+        """
+        Record that the supplied build failed to launch.
+
+        :param build: The resolved Fetcher object.
+        :param target: The Fetcher target.
+        :param fingerprint: Launch fingerprint of the evaluator.
+        """
+        with self._lock:
+            self.con.execute(
+                "INSERT INTO broken VALUES (?, ?, ?, ?, ?, ?, 1, ?) "
+                "ON CONFLICT "
+                "(branch, flags, platform, target, changeset, launch_fingerprint) "
+                "DO UPDATE SET failures = failures + 1, timestamp = excluded.timestamp",
+                (
+                    *self._key(build._branch, build._flags, build._platform),
+                    target,
+                    build.changeset,
+                    fingerprint,
+                    time.time(),
+                ),
+            )
+            self.con.commit()
+
+    def close(self) -> None:
+        """Closes the sqlite3 database."""
+        self.con.close()
@@ -0,0 +1,70 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import json
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+LOG = logging.getLogger(__name__)
+
+
+class JournalException(Exception):
+    """Raised when a session journal cannot be used."""
+
+
+class BisectionJournal(object):
+    """Append-only record of the progress of a bisection session."""
+
+    def __init__(self, directory: Path, session: Optional[str] = None) -> None:
+        """
+        Open an existing session journal or start a new one.
+
+        :param directory: Directory containing all session journals.
+        :param session: Identifier of the session to resume.
+        """
+        if not directory.is_dir():
+            directory.mkdir(parents=True)
+
+        self.resumed = session is not None
+        self.session = session if session is not None else uuid.uuid4().hex[:12]
+        self.path = directory / f"{self.session}.jsonl"
+        if self.resumed and not self.path.is_file():
+            raise JournalException(f"Unable to find session {self.session}")
+
+        self._lock = threading.Lock()
+
+    def record(self, event: str, **data: Any) -> None:
+        """
+        Append an event to the journal and flush it to disk.
+
+        :param event: The event name.
+        :param data: JSON serializable event data.
+        """
+        line = json.dumps({"event": event, **data})
+        with self._lock, self.path.open("a") as fp:
+            fp.write(f"{line}\n")
+            fp.flush()
+            os.fsync(fp.fileno())
+
+    def events(self) -> List[Dict[str, Any]]:
+        """
+        Read all events recorded so far.
+
+        :returns: A list of events in the order they were recorded.
+        """
+        if not self.path.is_file():
+            return []
+
+        events = []
+        for line in self.path.read_text().splitlines():
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                # The last line may be truncated if the process was killed
+                LOG.warning("Ignoring corrupt journal entry: %r", line)
+
+        return events
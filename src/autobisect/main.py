@@ -1,17 +1,38 @@
 # This Source Code Form is subject to the terms of the Mozilla Public
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import json
 import logging
 import time
 from argparse import ArgumentParser, Namespace
 from datetime import timedelta
-from typing import Union, Optional, List
+from typing import Union, Optional, List, Dict, Any, Tuple
 
-from fuzzfetch import BuildFlags, Platform
+from fuzzfetch import BuildFlags, BuildSearchOrder, Platform
 from grizzly.main import configure_logging
 
+from autobisect import metrics
+from autobisect.args import ReplayArgs, ServeArgs, SimulateArgs, SubmitArgs
+from autobisect.batch import MultiBisector
 from autobisect.bisect import BisectionResult, Bisector
-from autobisect.evaluators import BrowserArgs, BrowserEvaluator, JSArgs, JSEvaluator
+from autobisect.evaluators import (
+    BrowserArgs,
+    BrowserEvaluator,
+    Evaluator,
+    JSArgs,
+    JSEvaluator,
+)
+from autobisect.journal import JournalException
+from autobisect.server import (
+    BisectionServer,
+    ServerException,
+    SharedState,
+    submit,
+)
+from autobisect.recording import RecordingException, recording
+from autobisect.replay import Replay, format_replay
+from autobisect.simulation import format_results, simulate
+from autobisect.trace import span, tracing
 
 LOG = logging.getLogger("autobisect")
 
@@ -22,32 +43,69 @@ def parse_args(argv: Optional[List[str]] = None) -> Namespace:
     subparsers = parser.add_subparsers(dest="target", required=True)
     firefox_parser = BrowserArgs(subparsers.add_parser("firefox"))
     js_parser = JSArgs(subparsers.add_parser("js"))
+    serve_parser = ServeArgs(
+        subparsers.add_parser("serve", help="Run bisection jobs received over a socket")
+    )
+    submit_parser = SubmitArgs(
+        subparsers.add_parser("submit", help="Submit a bisection job to a server")
+    )
+    simulate_parser = SimulateArgs(
+        subparsers.add_parser(
+            "simulate", help="Compare bisection strategies against synthetic builds"
+        )
+    )
+    replay_parser = ReplayArgs(
+        subparsers.add_parser("replay", help="Replay a recorded bisection offline")
+    )
 
     args = parser.parse_args(argv)
     if args.target == "firefox":
         firefox_parser.sanity_check(args)
     elif args.target == "js":
         js_parser.sanity_check(args)
+    elif args.target == "serve":
+        serve_parser.sanity_check(args)
+    elif args.target == "submit":
+        submit_parser.sanity_check(args)
+    elif args.target == "simulate":
+        simulate_parser.sanity_check(args)
+    elif args.target == "replay":
+        replay_parser.sanity_check(args)
 
     return args
 
 
-def main(argv: Optional[List[str]] = None) -> int:
+def create_evaluator(
+    target: str, kwargs: Dict[str, Any]
+) -> Union[BrowserEvaluator, JSEvaluator]:
     """
-    Main entry point.
+    Create the evaluator of a single testcase.
 
-    :param argv: Parsed arguments.
-    :returns: Exit code.
+    :param target: The bisection target.
+    :param kwargs: Parsed arguments.
+    :returns: The evaluator.
     """
-    args = parse_args(argv)
-    configure_logging(args.log_level)
+    if target == "firefox":
+        return BrowserEvaluator(**kwargs)
+    return JSEvaluator(**kwargs)
 
-    evaluator: Union[BrowserEvaluator, JSEvaluator]
-    if args.target == "firefox":
-        evaluator = BrowserEvaluator(**vars(args))
-    else:
+
+def create_bisectors(
+    args: Namespace, shared: Optional[SharedState] = None
+) -> List[Bisector]:
+    """
+    Create one bisector per testcase.
+
+    :param args: Parsed arguments.
+    :param shared: State shared with other jobs when running as a server.
+    :returns: The bisectors.
+    """
+    if args.target == "js":
         args.flags = [] if args.flags is None else args.flags.split(" ")
-        evaluator = JSEvaluator(**vars(args))
+    evaluators = [
+        create_evaluator(args.target, {**vars(args), "testcase": testcase})
+        for testcase in (args.testcases if args.batch else [args.testcase])
+    ]
 
     flags = BuildFlags(
         args.asan,
@@ -60,26 +118,213 @@ def main(argv: Optional[List[str]] = None) -> int:
         args.fuzzilli,
     )
     platform = Platform(args.os, args.cpu)
-    bisector = Bisector(
-        evaluator,
-        args.branch,
-        args.start,
-        args.end,
-        flags,
-        platform,
-        args.find_fix,
-        args.config,
-    )
+    start = args.start
+    end = args.end
+    if shared is not None:
+        # Default boundaries move over time so only explicit ones are reused
+        if start:
+            start = shared.boundary(
+                args.branch, start, flags, platform, args.target, BuildSearchOrder.ASC
+            )
+        if end:
+            end = shared.boundary(
+                args.branch, end, flags, platform, args.target, BuildSearchOrder.DESC
+            )
+
+    bisectors: List[Bisector] = []
+    for evaluator in evaluators:
+        bisectors.append(
+            Bisector(
+                evaluator,
+                args.branch,
+                start,
+                end,
+                flags,
+                platform,
+                args.find_fix,
+                args.config,
+                jobs=args.jobs,
+                prefetch=args.prefetch,
+                result_cache=args.result_cache,
+                result_max_age=(
+                    timedelta(days=args.result_max_age)
+                    if args.result_max_age is not None
+                    else None
+                ),
+                resume=args.resume,
+                probabilistic=args.probabilistic,
+                confidence=args.confidence,
+                sensitivity=args.sensitivity,
+                adaptive_repeat=args.adaptive_repeat,
+                pivot_window=args.pivot_window,
+                build_manager=shared.build_manager if shared is not None else None,
+                pushes=shared.pushes if shared is not None else None,
+            )
+        )
+        # Every testcase of a batch shares the resolved boundaries
+        start, end = bisectors[0].start, bisectors[0].end
+
+    return bisectors
+
+
+def run_bisection(
+    args: Namespace, shared: Optional[SharedState] = None
+) -> List[Tuple[Evaluator, BisectionResult]]:
+    """
+    Bisect the testcase(s) supplied on the command line.
+
+    :param args: Parsed arguments.
+    :param shared: State shared with other jobs when running as a server.
+    :returns: The result of each testcase.
+    """
+    if args.metrics is not None:
+        metrics.enable()
+    try:
+        with tracing(args.trace):
+            with recording(args.record):
+                with span("bisection", "bisect", testcase=str(args.testcase)):
+                    bisectors = create_bisectors(args, shared)
+                    if args.batch:
+                        results = MultiBisector(bisectors).bisect()
+                    else:
+                        results = [bisectors[0].bisect()]
+    finally:
+        if args.metrics is not None:
+            metrics.write_textfile(args.metrics)
+            LOG.info("Metrics written to %s", args.metrics)
+
+    return [(b.evaluator, result) for b, result in zip(bisectors, results)]
+
+
+def run_job(
+    argv: List[str], shared: SharedState
+) -> List[Tuple[Evaluator, BisectionResult]]:
+    """
+    Run a job received by the bisection server.
+
+    :param argv: The bisection arguments.
+    :param shared: State shared with other jobs.
+    :returns: The result of each testcase.
+    """
+    args = parse_args(argv)
+    if args.target not in ("firefox", "js"):
+        raise ValueError(f"Unsupported job target {args.target!r}")
+    return run_bisection(args, shared)
+
+
+def serve(args: Namespace) -> int:
+    """
+    Run bisection jobs received over a socket until interrupted.
+
+    :param args: Parsed arguments.
+    :returns: Exit code.
+    """
+    try:
+        server = BisectionServer(
+            args.socket, args.workers, run_job, SharedState(args.config)
+        )
+    except ServerException as e:
+        LOG.error("Unable to start server: %s", e)
+        return 1
+
+    with server:
+        exporter = None
+        if args.metrics_port is not None:
+            try:
+                exporter = metrics.MetricsServer(args.metrics_port)
+            except OSError as e:
+                LOG.error("Unable to expose metrics: %s", e)
+                return 1
+            LOG.info("Exposing metrics on http://127.0.0.1:%d/metrics", exporter.port)
+
+        LOG.info("Listening on %s with %d worker(s)", args.socket, args.workers)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            LOG.info("Shutting down")
+        finally:
+            if exporter is not None:
+                exporter.close()
+
+    return 0
+
+
+def run_simulation(args: Namespace) -> int:
+    """
+    Bisect synthetic scenarios with each strategy and report their cost.
+
+    :param args: Parsed arguments.
+    :returns: Exit code.
+    """
+    results = simulate(args.scenario, args.strategy, args.seed, args.time_scale)
+    print(format_results(results))
+    if args.json is not None:
+        args.json.write_text(
+            json.dumps([result.to_dict() for result in results], indent=2)
+        )
+
+    return 0
+
+
+def run_replay(args: Namespace) -> int:
+    """
+    Replay a recorded bisection and compare its cost with the recording.
+
+    :param args: Parsed arguments.
+    :returns: Exit code.
+    """
+    try:
+        result = Replay(args.recording, args.time_scale).run()
+    except RecordingException as e:
+        LOG.error(e)
+        return 1
+    for line in format_replay(result).splitlines():
+        LOG.info(line)
+
+    return 0 if result.located else 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Main entry point.
+
+    :param argv: Parsed arguments.
+    :returns: Exit code.
+    """
+    args = parse_args(argv)
+    configure_logging(args.log_level)
+
+    if args.target == "serve":
+        return serve(args)
+    if args.target == "simulate":
+        return run_simulation(args)
+    if args.target == "replay":
+        return run_replay(args)
+    if args.target == "submit":
+        try:
+            return submit(args.socket, args.job)
+        except ServerException as e:
+            LOG.error(e)
+            return 1
+
     start_time = time.time()
-    result = bisector.bisect()
+    try:
+        results = run_bisection(args)
+    except JournalException as e:
+        LOG.error("Unable to resume bisection: %s", e)
+        return 1
     end_time = time.time()
-    if result.status == BisectionResult.SUCCESS:
-        LOG.info("Reduced build range to:")
-        LOG.info("> Start: %s (%s)", result.start.changeset, result.start.id)
-        LOG.info("> End: %s (%s)", result.end.changeset, result.end.id)
-        LOG.info("> %s", result.pushlog)
-    else:
-        LOG.error("Bisection failed!")
+
+    for evaluator, result in results:
+        if args.batch:
+            LOG.info("%s:", evaluator.testcase)
+        if result.status == BisectionResult.SUCCESS:
+            LOG.info("Reduced build range to:")
+            LOG.info("> Start: %s (%s)", result.start.changeset, result.start.id)
+            LOG.info("> End: %s (%s)", result.end.changeset, result.end.id)
+            LOG.info("> %s", result.pushlog)
+        else:
+            LOG.error("Bisection failed!")
 
     elapsed = timedelta(seconds=int(end_time - start_time))
     LOG.info("Bisection completed in: %s", elapsed)
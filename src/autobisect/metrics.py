@@ -0,0 +1,330 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import TracebackType
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Type
+
+LOG = logging.getLogger(__name__)
+
+# Upper bounds (in seconds) of the duration histograms
+DURATION_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+_METRICS: List["_Metric"] = []
+# Metrics are only recorded once enabled, so that they cost a single check otherwise
+_ENABLED = False
+
+
+def enable() -> None:
+    """Start recording metrics for the rest of the process."""
+    global _ENABLED  # pylint: disable=global-statement
+    _ENABLED = True
+
+
+def enabled() -> bool:
+    """Whether metrics are being recorded."""
+    return _ENABLED
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (
+        value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for value in values
+    )
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+    return f"{{{pairs}}}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    """A named metric with one time series per combination of label values."""
+
+    kind = ""
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = ()
+    ) -> None:
+        """
+        Register the metric.
+
+        :param name: Name of the metric.
+        :param documentation: Description of the metric.
+        :param labels: Names of the labels distinguishing its time series.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        _METRICS.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        assert set(labels) == set(self.labels), f"Invalid labels for {self.name}"
+        return tuple(str(labels[name]) for name in self.labels)
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Return the sample lines of every time series."""
+
+    def render(self) -> str:
+        """Return the metric in the Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        with self._lock:
+            lines.extend(self.samples())
+        return "\n".join(lines) + "\n"
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Discard every recorded time series."""
+
+
+class Counter(_Metric):
+    """A monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """
+        Increase the count.
+
+        :param amount: The increment.
+        :param labels: Values of the labels of the metric.
+        """
+        if not _ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """
+        Return the current count.
+
+        :param labels: Values of the labels of the metric.
+        """
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(_Metric):
+    """The distribution of observed values within cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DURATION_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Bucket counts followed by the sum of the observed values
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Record an observation.
+
+        :param value: The observed value.
+        :param labels: Values of the labels of the metric.
+        """
+        if not _ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.setdefault(key, [0.0] * (len(self.buckets) + 1))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """
+        Observe the duration of the enclosed code in seconds.
+
+        :param labels: Values of the labels of the metric.
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        """
+        Return the number of observations.
+
+        :param labels: Values of the labels of the metric.
+        """
+        with self._lock:
+            counts = self._values.get(self._key(labels))
+        return int(counts[-2]) if counts is not None else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, counts in sorted(self._values.items()):
+            for bound, count in zip(self.buckets, counts):
+                labels = _format_labels(
+                    self.labels + ("le",), key + (_format_value(bound),)
+                )
+                lines.append(f"{self.name}_bucket{labels} {_format_value(count)}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(counts[-2])}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+PROBES = Counter(
+    "autobisect_probes_total", "Builds probed, by evaluation result", ("result",)
+)
+EVALUATION_SECONDS = Histogram(
+    "autobisect_evaluation_seconds", "Time spent evaluating the testcase"
+)
+CACHE_HITS = Counter(
+    "autobisect_cache_hits_total",
+    "Builds or results found in the local caches",
+    ("cache",),
+)
+CACHE_MISSES = Counter(
+    "autobisect_cache_misses_total",
+    "Builds or results missing from the local caches",
+    ("cache",),
+)
+DOWNLOAD_SECONDS = Histogram(
+    "autobisect_download_seconds", "Time spent downloading and extracting builds"
+)
+DOWNLOAD_BYTES = Counter(
+    "autobisect_download_bytes_total", "Size of the downloaded builds once extracted"
+)
+DOWNLOAD_WAIT_SECONDS = Histogram(
+    "autobisect_download_wait_seconds",
+    "Time spent waiting for builds downloaded by another process",
+)
+EVICTIONS = Counter("autobisect_evictions_total", "Builds removed from the build store")
+
+
+def render() -> str:
+    """Return every metric in the Prometheus text format."""
+    return "".join(metric.render() for metric in _METRICS)
+
+
+def clear() -> None:
+    """Discard every recorded time series."""
+    for metric in _METRICS:
+        metric.clear()
+
+
+def write_textfile(path: Path) -> None:
+    """
+    Write every metric for the node exporter textfile collector.
+
+    The file is replaced atomically so that it is never scraped half written.
+
+    :param path: Path of the .prom file.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w") as fp:
+            fp.write(render())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serve the metrics in the Prometheus text format."""
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """Respond to a scrape."""
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        # pylint: disable=redefined-builtin
+        LOG.debug(format, *args)
+
+
+class MetricsServer(object):
+    """Expose the metrics over HTTP on the loopback interface."""
+
+    def __init__(self, port: int) -> None:
+        """
+        Start serving and enable recording of metrics.
+
+        :param port: Port to listen on, or 0 to pick a free port.
+        """
+        enable()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+        self._server.daemon_threads = True
+        self.port: int = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="metrics", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self) -> "MetricsServer":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop serving."""
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
@@ -0,0 +1,301 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import asyncio
+import contextvars
+import itertools
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import TracebackType
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Set,
+    Type,
+)
+
+from fuzzfetch import Fetcher
+
+from .builds import BuildDescriptor
+
+LOG = logging.getLogger(__name__)
+
+# Priority of work a bisection is waiting for, speculative work is queued by depth
+DEMAND = 0
+
+# Taskcluster lookups are cheap so they are run further ahead than downloads,
+# whose queue is kept short as speculative downloads are rarely all needed
+RESOLVE_WORKERS = 4
+FETCH_WORKERS = 2
+RESOLVE_QUEUE_SIZE = 16
+FETCH_QUEUE_SIZE = 4
+
+
+class _Job(object):
+    """A single item of work queued in a stage."""
+
+    __slots__ = ("item", "future", "started")
+
+    def __init__(self, item: Any, future: "asyncio.Future[Any]") -> None:
+        self.item = item
+        self.future = future
+        self.started = False
+
+
+class _Stage(object):
+    """Workers running a blocking callable on the items of a bounded queue."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Any], Any],
+        workers: int,
+        queue_size: int,
+        context: contextvars.Context,
+    ) -> None:
+        """
+        Start the workers of the stage.  Must be called from the event loop.
+
+        :param name: Name of the stage.
+        :param func: Blocking callable processing a single item.
+        :param workers: Number of items processed concurrently.
+        :param queue_size: Maximum number of queued items.
+        :param context: Context the callable is run in.
+        """
+        self.name = name
+        self.func = func
+        self.context = context
+        self.queue: "asyncio.PriorityQueue[Any]" = asyncio.PriorityQueue(queue_size)
+        self.jobs: Dict[Hashable, _Job] = {}
+        self._order = itertools.count()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix=f"pipeline-{name}"
+        )
+        self._workers = [asyncio.create_task(self._work()) for _ in range(workers)]
+
+    async def submit(self, key: Hashable, item: Any, priority: int) -> Any:
+        """
+        Queue an item and wait for it to be processed.
+
+        Items are processed once per key.  Speculative items are dropped if the
+        queue is full while demanded items wait for room and overtake speculative
+        items still queued under the same key.
+
+        :param key: Key identifying the item.
+        :param item: The item to process.
+        :param priority: DEMAND or the depth of the speculation.
+        :returns: The result of the callable or None if the item was dropped.
+        """
+        job = self.jobs.get(key)
+        if job is None or job.future.cancelled() or _failed(job.future):
+            job = _Job(item, asyncio.get_running_loop().create_future())
+            self.jobs[key] = job
+            entry = (priority, next(self._order), job)
+            if priority == DEMAND:
+                await self.queue.put(entry)
+            else:
+                try:
+                    self.queue.put_nowait(entry)
+                except asyncio.QueueFull:
+                    LOG.debug("Dropping speculative %s of %s", self.name, item)
+                    del self.jobs[key]
+                    return None
+        elif priority == DEMAND and not job.started and not job.future.done():
+            await self.queue.put((DEMAND, next(self._order), job))
+
+        return await asyncio.shield(job.future)
+
+    def retain(self, keys: Collection[Hashable]) -> None:
+        """
+        Cancel queued items whose key is not within the supplied keys.
+
+        :param keys: The keys still of interest.
+        """
+        for key in [key for key in self.jobs if key not in keys]:
+            job = self.jobs.pop(key)
+            if not job.started:
+                job.future.cancel()
+
+    async def _work(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            _, _, job = await self.queue.get()
+            try:
+                if job.started or job.future.done():
+                    continue
+                job.started = True
+                try:
+                    result = await loop.run_in_executor(
+                        self._executor, self.context.copy().run, self.func, job.item
+                    )
+                except Exception as e:  # pylint: disable=broad-except
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                else:
+                    if not job.future.done():
+                        job.future.set_result(result)
+            finally:
+                self.queue.task_done()
+
+    async def stop(self) -> None:
+        """Stop the workers and abandon queued items."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        for job in self.jobs.values():
+            job.future.cancel()
+
+    def shutdown(self) -> None:
+        """Wait for running items to complete."""
+        self._executor.shutdown(cancel_futures=True)
+
+
+def _failed(future: "asyncio.Future[Any]") -> bool:
+    return future.done() and future.exception() is not None
+
+
+class ProbePipeline(object):
+    """
+    Resolve and download builds in stages overlapping their evaluation.
+
+    Each stage runs its blocking work on its own threads and is fed through a
+    bounded priority queue by an asyncio event loop running in the background.
+    While the bisection evaluates a build on its own thread, the builds which may
+    be probed next are resolved and downloaded speculatively, so the network and
+    the CPU are kept busy at the same time.  Evaluation stays on the calling
+    thread so that interrupts still reach the evaluator.  Every method is
+    synchronous and may be called from any thread.
+    """
+
+    def __init__(
+        self,
+        resolve: Callable[[BuildDescriptor], Optional[Fetcher]],
+        fetch: Callable[[Fetcher], None],
+    ) -> None:
+        """
+        Start the event loop and the stages.
+
+        :param resolve: Callable converting a build range entry into a build.
+        :param fetch: Callable downloading a build into the build store.
+        """
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="pipeline", daemon=True
+        )
+        self._thread.start()
+        self._funcs = (resolve, fetch)
+        self._speculations: Set["Future[None]"] = set()
+        # Entries of the current range, speculations outside of it are skipped
+        self._retained: Optional[Set[Hashable]] = None
+        self._stages: List[_Stage] = self._call(self._start(contextvars.copy_context()))
+
+    def __enter__(self) -> "ProbePipeline":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    async def _start(self, context: contextvars.Context) -> List[_Stage]:
+        resolve, fetch = self._funcs
+        return [
+            _Stage("resolution", resolve, RESOLVE_WORKERS, RESOLVE_QUEUE_SIZE, context),
+            _Stage("download", fetch, FETCH_WORKERS, FETCH_QUEUE_SIZE, context),
+        ]
+
+    async def _stop(self) -> None:
+        for stage in self._stages:
+            await stage.stop()
+
+    def _call(self, coro: Any) -> Any:
+        """Run a coroutine on the event loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def resolve(self, entry: BuildDescriptor) -> Optional[Fetcher]:
+        """
+        Resolve a build range entry, reusing a speculative resolution.
+
+        :param entry: The build range entry.
+        :returns: The Fetcher object or None if no usable build could be found.
+        """
+        build: Optional[Fetcher] = self._call(
+            self._stages[0].submit(entry, entry, DEMAND)
+        )
+        return build
+
+    def speculate(self, entry: BuildDescriptor, depth: int, fetch: bool) -> None:
+        """
+        Resolve and optionally download a build which may be probed later.
+
+        :param entry: The build range entry.
+        :param depth: Number of probes before the entry may be probed.
+        :param fetch: Whether to download the build as well.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._speculate(entry, depth, fetch), self._loop
+        )
+        self._speculations.add(future)
+        future.add_done_callback(self._speculations.discard)
+
+    async def _speculate(self, entry: BuildDescriptor, depth: int, fetch: bool) -> None:
+        try:
+            if not self._wanted(entry):
+                return
+            build = await self._stages[0].submit(entry, entry, depth)
+            if build is not None and fetch and self._wanted(entry):
+                await self._stages[1].submit(entry, build, depth)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:  # pylint: disable=broad-except
+            LOG.warning("Failed to prefetch %s: %s", entry, e)
+
+    def _wanted(self, entry: BuildDescriptor) -> bool:
+        return self._retained is None or entry in self._retained
+
+    def fetched(self, entry: BuildDescriptor) -> bool:
+        """
+        Whether a download of the supplied entry was started speculatively.
+
+        :param entry: The build range entry.
+        """
+        fetched: bool = self._call(self._fetched(entry))
+        return fetched
+
+    async def _fetched(self, entry: BuildDescriptor) -> bool:
+        job = self._stages[1].jobs.get(entry)
+        return job is not None and not job.future.cancelled()
+
+    def retain(self, entries: Collection[BuildDescriptor]) -> None:
+        """
+        Abandon queued speculative work for entries outside the supplied ones.
+
+        :param entries: The entries still of interest.
+        """
+        keys: Set[Hashable] = set(entries)
+        self._loop.call_soon_threadsafe(self._retain, keys)
+
+    def _retain(self, keys: Set[Hashable]) -> None:
+        self._retained = keys
+        for stage in self._stages:
+            stage.retain(keys)
+
+    def close(self) -> None:
+        """Stop the stages, waiting for running work to complete."""
+        for future in list(self._speculations):
+            future.cancel()
+        self._call(self._stop())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        for stage in self._stages:
+            stage.shutdown()
+        self._loop.close()
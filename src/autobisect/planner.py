@@ -0,0 +1,113 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import logging
+import math
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+LOG = logging.getLogger(__name__)
+
+DAILY = "daily"
+PUSHDATE = "pushdate"
+TIMELINE = "timeline"
+
+# Phases ordered from the coarsest to the finest granularity
+PHASES = (DAILY, PUSHDATE, TIMELINE)
+
+
+def expected_probes(candidates: float) -> int:
+    """
+    Number of probes needed to bisect the supplied number of candidates.
+
+    :param candidates: Number of builds between the boundaries.
+    :returns: The number of probes.
+    """
+    if candidates < 1:
+        return 0
+    return math.ceil(math.log2(candidates + 1))
+
+
+class StrategyPlanner(object):
+    """Select the bisection phases expected to require the fewest probes."""
+
+    # Probes lost at each phase transition, as the boundaries of the previous phase
+    # rarely line up with builds of the next one
+    PHASE_OVERHEAD = 1
+
+    @staticmethod
+    def estimate(
+        start: datetime,
+        end: datetime,
+        pushes: Optional[int] = None,
+        changesets: Optional[int] = None,
+    ) -> Dict[str, Optional[int]]:
+        """
+        Estimate the number of candidate builds of each phase.
+
+        :param start: Push time of the start build.
+        :param end: Push time of the end build.
+        :param pushes: Number of pushes after the start build up to the end build.
+        :param changesets: Number of changesets within those pushes.
+        :returns: The number of candidates per phase or None if unknown.
+        """
+        days = (end.date() - start.date()).days
+        return {
+            DAILY: max(days - 1, 0),
+            PUSHDATE: max(pushes - 1, 0) if pushes is not None else None,
+            TIMELINE: max(changesets - 1, 0) if changesets is not None else None,
+        }
+
+    def cost(self, plan: Sequence[str], counts: Dict[str, Optional[int]]) -> float:
+        """
+        Expected number of probes needed to complete the supplied plan.
+
+        :param plan: The phases to run.
+        :param counts: The number of candidates of each phase.
+        :returns: The number of probes or infinity if a count is unknown.
+        """
+        total = 0.0
+        previous = 0
+        for name in plan:
+            count = counts[name]
+            if count is None:
+                return math.inf
+            # The previous phase reduces the range to a single one of its intervals
+            probes = expected_probes((count + 1) / (previous + 1) - 1)
+            if probes:
+                total += probes + self.PHASE_OVERHEAD
+            previous = count
+
+        return total
+
+    def plan(self, counts: Dict[str, Optional[int]]) -> List[str]:
+        """
+        Select the phases to run out of those present in counts.
+
+        Phases without candidates are skipped.  When every count is known the
+        coarser phases are skipped as well if starting at a finer granularity
+        requires fewer probes.
+
+        :param counts: The number of candidates of each phase or None if unknown.
+        :returns: The selected phases ordered by granularity.
+        """
+        phases = [p for p in PHASES if p in counts and counts[p] != 0]
+        best = phases
+        best_cost = self.cost(phases, counts)
+        for index in range(1, len(phases)):
+            # Enumerating pushdate builds relies on a day sized range
+            if phases[index] == PUSHDATE:
+                continue
+            cost = self.cost(phases[index:], counts)
+            if cost < best_cost:
+                best, best_cost = phases[index:], cost
+
+        if best:
+            LOG.info(
+                "Bisection plan: %s (%s)",
+                " -> ".join(best),
+                ", ".join(f"{p}: {counts[p]} builds" for p in best if counts[p]),
+            )
+        else:
+            LOG.info("Bisection plan: no phase can reduce the range further")
+        return best
@@ -0,0 +1,167 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import logging
+import math
+from statistics import NormalDist
+from typing import List
+
+LOG = logging.getLogger(__name__)
+
+
+def entropy(p: float) -> float:
+    """
+    Binary entropy of a probability in bits.
+
+    :param p: The probability.
+    :returns: The entropy.
+    """
+    if p <= 0 or p >= 1:
+        return 0.0
+    return -p * math.log2(p) - (1 - p) * math.log2(1 - p)
+
+
+def wilson_lower_bound(successes: int, trials: int, confidence: float) -> float:
+    """
+    One sided Wilson score lower bound of a binomial proportion.
+
+    :param successes: Number of successful trials.
+    :param trials: Total number of trials.
+    :param confidence: Confidence level of the bound.
+    :returns: The lower bound.
+    """
+    if trials == 0:
+        return 0.0
+    z = NormalDist().inv_cdf(confidence)
+    p = successes / trials
+    centre = p + z * z / (2 * trials)
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials))
+    return max(0.0, (centre - margin) / (1 + z * z / trials))
+
+
+def required_repeats(rate: float, confidence: float, limit: int) -> int:
+    """
+    Number of consecutive passes needed to rule out a crash at the supplied
+    reproduction rate.
+
+    :param rate: Probability that a single run reproduces the crash.
+    :param confidence: Required probability of observing the crash on a bad build.
+    :param limit: Maximum number of repeats.
+    :returns: The number of repeats.
+    """
+    if rate <= 0:
+        return limit
+    if rate >= 1:
+        return 1
+    return max(1, min(limit, math.ceil(math.log(1 - confidence) / math.log(1 - rate))))
+
+
+class ProbabilisticBisection(object):
+    """
+    Posterior over the location of a behavior change within a build range.
+
+    Hypothesis k states that builds[k] is the first build which behaves like the
+    end boundary (k == len(builds) meaning the end boundary itself).  Crashes are
+    conclusive while crashing builds only reproduce the crash with the supplied
+    sensitivity, so a pass merely lowers the weight of the hypotheses under which
+    the build crashes.
+    """
+
+    def __init__(self, size: int, sensitivity: float, find_fix: bool = False):
+        """
+        Instantiate a uniform posterior.
+
+        :param size: Number of builds within the range.
+        :param sensitivity: Probability that a single probe of a crashing build
+            reproduces the crash.
+        :param find_fix: Whether builds before the change crash rather than after.
+        """
+        self.sensitivity = sensitivity
+        self.find_fix = find_fix
+        self.weights: List[float] = [1 / (size + 1)] * (size + 1)
+
+    def __len__(self) -> int:
+        """Returns the number of builds."""
+        return len(self.weights) - 1
+
+    def _crashing(self, index: int, hypothesis: int) -> bool:
+        """
+        Whether builds[index] crashes if the supplied hypothesis holds.
+
+        :param index: Index of the build.
+        :param hypothesis: Index of the first build after the change.
+        """
+        after = index >= hypothesis
+        return after != self.find_fix
+
+    def crash_probability(self, index: int) -> float:
+        """
+        Probability that builds[index] is a crashing build.
+
+        :param index: Index of the build.
+        :returns: The probability.
+        """
+        if self.find_fix:
+            return math.fsum(self.weights[index + 1 :])
+        return math.fsum(self.weights[: index + 1])
+
+    def information_gain(self, index: int) -> float:
+        """
+        Expected reduction of the posterior entropy from probing a build.
+
+        :param index: Index of the build.
+        :returns: The information gain in bits.
+        """
+        crashing = self.crash_probability(index)
+        return entropy(self.sensitivity * crashing) - crashing * entropy(
+            self.sensitivity
+        )
+
+    @property
+    def best_probe(self) -> int:
+        """Returns the index of the most informative build to probe."""
+        gains = [self.information_gain(i) for i in range(len(self))]
+        return max(range(len(self)), key=gains.__getitem__)
+
+    @property
+    def first_bad(self) -> int:
+        """Returns the most likely index of the first build after the change."""
+        return max(range(len(self.weights)), key=self.weights.__getitem__)
+
+    @property
+    def confidence(self) -> float:
+        """Returns the posterior probability of the most likely hypothesis."""
+        return max(self.weights)
+
+    def update(self, index: int, crashed: bool) -> None:
+        """
+        Apply the result of a single probe to the posterior.
+
+        :param index: Index of the probed build.
+        :param crashed: Whether the testcase crashed.
+        """
+        weights = []
+        for k, weight in enumerate(self.weights):
+            crashing = self._crashing(index, k)
+            if crashed:
+                likelihood = 1.0 if crashing else 0.0
+            else:
+                likelihood = 1 - self.sensitivity if crashing else 1.0
+            weights.append(weight * likelihood)
+
+        total = math.fsum(weights)
+        if total == 0:
+            LOG.warning("Ignoring result inconsistent with all previous results")
+            return
+
+        self.weights = [w / total for w in weights]
+
+    def remove(self, index: int) -> None:
+        """
+        Remove a build which could not be evaluated.
+
+        :param index: Index of the build.
+        """
+        # If the removed build was the first after the change, the next one is now
+        weight = self.weights.pop(index)
+        self.weights[index] += weight
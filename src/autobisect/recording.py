@@ -0,0 +1,168 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# pylint: disable=protected-access
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Type, TypeVar
+
+from fuzzfetch import BuildFlags, BuildTask, Fetcher, Platform
+
+from .index import IndexedFetcher
+
+LOG = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=IndexedFetcher)
+
+
+class RecordingException(Exception):
+    """Raised when a recording cannot be read or replayed."""
+
+
+def build_to_dict(build: Fetcher) -> Dict[str, Any]:
+    """
+    Return a JSON serializable representation of a resolved build.
+
+    :param build: The resolved Fetcher object.
+    """
+    task = build._task
+    assert task is not None
+    return {
+        "branch": build._branch,
+        "task_id": build.task_id,
+        "rank": getattr(task, "rank", 0),
+        "task_url": task.url,
+        "queue_server": task.queue_server,
+        "artifact_base": build._artifact_base,
+        "build_info": build.build_info,
+    }
+
+
+def build_from_dict(
+    data: Dict[str, Any],
+    flags: BuildFlags,
+    platform: Platform,
+    target: str,
+    cls: Type[F],
+) -> F:
+    """
+    Restore a build serialized by build_to_dict without network access.
+
+    :param data: The serialized build.
+    :param flags: The build flags.
+    :param platform: The build platform.
+    :param target: The Fetcher target.
+    :param cls: The IndexedFetcher subclass to restore the build as.
+    """
+    task = BuildTask(
+        data["task_url"],
+        data["queue_server"],
+        {"taskId": data["task_id"], "rank": data["rank"]},
+    )
+    return cls(
+        data["branch"],
+        task,
+        flags,
+        target,
+        platform,
+        data["build_info"],
+        data["artifact_base"],
+    )
+
+
+class Recorder(object):
+    """Append the inputs of a bisection to a JSON lines archive."""
+
+    def __init__(self, path: Path) -> None:
+        """
+        Create the archive, replacing any previous recording.
+
+        :param path: Path to the archive.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._fp = path.open("w")
+
+    def record(self, event: str, **data: Any) -> None:
+        """
+        Append an event to the archive.
+
+        :param event: The event name.
+        :param data: JSON serializable event data.
+        """
+        elapsed = time.monotonic() - self._start
+        line = json.dumps({"event": event, "time": elapsed, **data}, default=str)
+        with self._lock:
+            self._fp.write(f"{line}\n")
+            self._fp.flush()
+
+    def close(self) -> None:
+        """Close the archive."""
+        with self._lock:
+            self._fp.close()
+
+
+# The recorder of the running bisection, inherited by the threads it submits work to
+_RECORDER: "contextvars.ContextVar[Optional[Recorder]]" = contextvars.ContextVar(
+    "recorder", default=None
+)
+
+
+@contextmanager
+def recording(path: Optional[Path]) -> Iterator[None]:
+    """
+    Record the taskcluster lookups, downloads and evaluations of the enclosed
+    bisection so that it can be replayed offline.
+
+    :param path: Path to the archive or None to disable recording.
+    """
+    if path is None:
+        yield
+        return
+
+    recorder = Recorder(path)
+    token = _RECORDER.set(recorder)
+    try:
+        yield
+    finally:
+        _RECORDER.reset(token)
+        recorder.close()
+        LOG.info("Recording written to %s", path)
+
+
+def is_recording() -> bool:
+    """Whether the current bisection is being recorded."""
+    return _RECORDER.get() is not None
+
+
+def record(event: str, **data: Any) -> None:
+    """
+    Append an event to the recording of the current bisection, if any.
+
+    :param event: The event name.
+    :param data: JSON serializable event data.
+    """
+    recorder = _RECORDER.get()
+    if recorder is not None:
+        recorder.record(event, **data)
+
+
+def read_recording(path: Path) -> List[Dict[str, Any]]:
+    """
+    Read the events of a recording.
+
+    :param path: Path to the archive.
+    :raises RecordingException: If the archive can't be read.
+    :returns: The events in the order they were recorded.
+    """
+    try:
+        with path.open() as fp:
+            return [json.loads(line) for line in fp if line.strip()]
+    except (OSError, ValueError) as e:
+        raise RecordingException(f"Unable to read recording {path}: {e}") from e
@@ -0,0 +1,474 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import logging
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from fuzzfetch import (
+    BuildFlags,
+    BuildSearchOrder,
+    BuildTask,
+    Fetcher,
+    FetcherException,
+    Platform,
+)
+
+from .bisect import BisectionResult, Bisector
+from .build_manager import BuildManager
+from .builds import BuildDescriptor
+from .evaluators import Evaluator, EvaluatorResult
+from .index import IndexedFetcher
+from .recording import RecordingException, build_from_dict, read_recording
+from .timeline import Push
+
+LOG = logging.getLogger(__name__)
+
+# Recorded seconds which pass between checks of the build store
+POLL_INTERVAL = 1.0
+
+
+class ReplayFetcher(IndexedFetcher):
+    """A recorded build whose download only takes the recorded time."""
+
+    replay: "Replay"
+
+    def extract_build(self, path: Union[str, Path]) -> None:
+        self.replay.download(self.changeset)
+        Path(path).mkdir(parents=True)
+        (Path(path) / self.replay.target).write_text(self.changeset)
+
+
+class ReplayEvaluator(Evaluator):
+    """Return the recorded results of the testcase after the recorded time."""
+
+    def __init__(self, replay: "Replay", repeat: Optional[int]) -> None:
+        """
+        Create the evaluator.
+
+        :param replay: The replay providing the results.
+        :param repeat: The recorded number of repeats.
+        """
+        self.replay = replay
+        self.testcase = replay.path
+        self.repeat = repeat
+
+    @property
+    def target(self) -> str:
+        return self.replay.target
+
+    def evaluate_testcase(
+        self, build_path: Path, repeat: Optional[int] = None
+    ) -> EvaluatorResult:
+        return self.replay.evaluate((build_path / self.target).read_text())
+
+    def reproduction_rate(self, build_path: Path, runs: int) -> Tuple[int, int]:
+        return self.replay.measure((build_path / self.target).read_text(), runs)
+
+
+class ReplayBisector(Bisector):
+    """A Bisector answering every lookup from a recording."""
+
+    def __init__(self, replay: "Replay", config: Path, **kwargs: Any) -> None:
+        """
+        Create the bisector.
+
+        :param replay: The replay providing the recorded lookups.
+        :param config: Path to the config file of the temporary build store.
+        :param kwargs: Additional Bisector arguments.
+        """
+        self.replay = replay
+        build_manager = BuildManager(config)
+        build_manager.poll_interval = max(POLL_INTERVAL * replay.time_scale, 0.001)
+        start, end = replay.boundaries
+        super().__init__(
+            ReplayEvaluator(replay, replay.session.get("repeat")),
+            replay.session["branch"],
+            start,
+            end,
+            replay.flags,
+            replay.platform,
+            find_fix=replay.session["find_fix"],
+            config=config,
+            result_cache=False,
+            build_manager=build_manager,
+            **kwargs,
+        )
+
+    def _get_boundary(self, build_id: str, nearest: BuildSearchOrder) -> Fetcher:
+        return self.replay.boundary(build_id, nearest)
+
+    def _lookup(self, entry: BuildDescriptor) -> Fetcher:
+        return self.replay.lookup(entry)
+
+    def _get_pushdate_tasks(self, date: str) -> List[BuildTask]:
+        return self.replay.tasks(date)
+
+    def _get_pushes(self) -> Optional[List[Push]]:
+        return self.replay.pushes(self.start.changeset, self.end.changeset)
+
+
+class ReplayResult(object):
+    """Cost of a replayed bisection next to the cost of the recorded one."""
+
+    def __init__(
+        self,
+        located: bool,
+        recorded: Dict[str, float],
+        replayed: Dict[str, float],
+        unrecorded: int,
+    ) -> None:
+        """
+        Record the result.
+
+        :param located: Whether the replay located the recorded change.
+        :param recorded: Probe, download and timing counts of the recording.
+        :param replayed: The same counts for the replay.
+        :param unrecorded: Number of lookups and evaluations missing from the
+            recording, which were answered by inference.
+        """
+        self.located = located
+        self.recorded = recorded
+        self.replayed = replayed
+        self.unrecorded = unrecorded
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON serializable representation of the result."""
+        return dict(vars(self))
+
+
+class Replay(object):
+    """Rerun a recorded bisection offline, with its original timings scaled."""
+
+    def __init__(self, path: Path, time_scale: float = 1.0) -> None:
+        """
+        Load a recording.
+
+        :param path: Path to the archive.
+        :param time_scale: Real seconds slept per recorded second, 0 for instant.
+        :raises RecordingException: If the recording can't be replayed.
+        """
+        self.path = path
+        self.time_scale = time_scale
+        events = read_recording(path)
+        sessions = [
+            i for i, event in enumerate(events) if event["event"] == "bisection"
+        ]
+        if not sessions:
+            raise RecordingException(f"{path} doesn't contain a bisection")
+        if len(sessions) > 1:
+            LOG.warning("Only the first of %d bisections is replayed", len(sessions))
+            events = events[: sessions[1]]
+        self.session = events[sessions[0]]
+        self.target: str = self.session["target"]
+        self.flags = BuildFlags(*self.session["flags"])
+        self.platform = Platform(*self.session["platform"])
+
+        self._lock = threading.Lock()
+        self._boundaries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lookups: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._pushes: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._downloads: Dict[str, float] = {}
+        self._evaluations: Dict[str, List[Dict[str, Any]]] = {}
+        self._measurements: Dict[str, Dict[str, Any]] = {}
+        self._result: Optional[Dict[str, Any]] = None
+        self._recorded_builds: Dict[str, Dict[str, Any]] = {}
+        self._builds: Dict[str, ReplayFetcher] = {}
+        for event in events:
+            self._index(event)
+        end = self._result["time"] if self._result is not None else events[-1]["time"]
+        self.recorded = {
+            "probes": float(sum(len(e) for e in self._evaluations.values())),
+            "downloads": float(len(self._downloads)),
+            "wall_time": end - self.session["time"],
+        }
+        self.unrecorded = 0
+        self._evaluated: Dict[str, int] = {}
+        self._downloaded = 0
+
+    def _index(self, event: Dict[str, Any]) -> None:
+        name = event["event"]
+        for field in ("build", "start", "end"):
+            if isinstance(event.get(field), dict):
+                data = event[field]
+                self._recorded_builds[data["build_info"]["moz_source_stamp"]] = data
+
+        if name == "boundary":
+            self._boundaries[(event["build_id"], event["nearest"])] = event
+        elif name == "lookup":
+            entry = event["entry"]
+            key = (entry["branch"], entry["kind"], entry["identifier"])
+            self._lookups[key] = event
+        elif name == "tasks":
+            self._tasks[event["date"]] = event
+        elif name == "pushes":
+            self._pushes[(event["start"], event["end"])] = event
+        elif name == "download":
+            self._downloads[event["changeset"]] = event["duration"]
+        elif name == "evaluation":
+            self._evaluations.setdefault(event["changeset"], []).append(event)
+        elif name == "measurement":
+            self._measurements[event["changeset"]] = event
+        elif name == "result" and self._result is None:
+            self._result = event
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Let recorded time pass.
+
+        :param seconds: Recorded seconds.
+        """
+        if self.time_scale:
+            time.sleep(seconds * self.time_scale)
+
+    def _missing(self, what: str) -> None:
+        LOG.warning("No %s was recorded, inferring it", what)
+        with self._lock:
+            self.unrecorded += 1
+
+    def build(self, data: Dict[str, Any]) -> ReplayFetcher:
+        """
+        Restore a recorded build.
+
+        :param data: The build serialized by build_to_dict.
+        """
+        changeset = data["build_info"]["moz_source_stamp"]
+        with self._lock:
+            if changeset not in self._builds:
+                build = build_from_dict(
+                    data, self.flags, self.platform, self.target, ReplayFetcher
+                )
+                build.replay = self
+                self._builds[changeset] = build
+            return self._builds[changeset]
+
+    @property
+    def boundaries(self) -> Tuple[Union[str, Fetcher], Union[str, Fetcher]]:
+        """Return the boundaries to pass to the bisector."""
+        # Boundaries resolved by the recorded bisection are resolved again
+        resolved: Dict[str, str] = {
+            nearest: build_id for build_id, nearest in self._boundaries
+        }
+        return (
+            resolved.get(BuildSearchOrder.ASC.name)
+            or self.build(self.session["start"]),
+            resolved.get(BuildSearchOrder.DESC.name) or self.build(self.session["end"]),
+        )
+
+    def boundary(self, build_id: str, nearest: BuildSearchOrder) -> Fetcher:
+        """
+        Replay the resolution of a boundary.
+
+        :param build_id: Revision, date or buildid of the boundary.
+        :param nearest: Search direction if no build matches the identifier.
+        """
+        event = self._boundaries[(build_id, nearest.name)]
+        self.sleep(event["duration"])
+        return self.build(event["build"])
+
+    def lookup(self, entry: BuildDescriptor) -> Fetcher:
+        """
+        Replay the resolution of a build range entry.
+
+        :param entry: A build descriptor.
+        :raises FetcherException: If no build was found when recording.
+        """
+        event = self._lookups.get((entry.branch, entry.kind, entry.identifier))
+        if event is None:
+            self._missing(f"lookup of {entry}")
+            raise FetcherException(f"No build was recorded for {entry}")
+        self.sleep(event["duration"])
+        if event["build"] is None:
+            raise FetcherException(event["error"])
+        return self.build(event["build"])
+
+    def tasks(self, date: str) -> List[BuildTask]:
+        """
+        Replay the enumeration of the tasks of a pushdate.
+
+        :param date: The pushdate in YYYY-MM-DD format.
+        """
+        event = self._tasks.get(date)
+        if event is None:
+            self._missing(f"task list of {date}")
+            return []
+        self.sleep(event["duration"])
+        return [
+            BuildTask(
+                task["task_url"],
+                task["queue_server"],
+                {"taskId": task["task_id"], "rank": task["rank"]},
+            )
+            for task in event["tasks"]
+        ]
+
+    def pushes(self, start: str, end: str) -> Optional[List[Push]]:
+        """
+        Replay the retrieval of the pushlog.
+
+        :param start: Starting revision.
+        :param end: Ending revision.
+        """
+        event = self._pushes.get((start, end))
+        if event is None:
+            self._missing(f"pushlog of {start[:12]}..{end[:12]}")
+            return None
+        self.sleep(event["duration"])
+        if event["pushes"] is None:
+            return None
+        return [
+            Push(
+                push["push_id"],
+                datetime.fromtimestamp(push["timestamp"], tz=timezone.utc),
+                push["changesets"],
+            )
+            for push in event["pushes"]
+        ]
+
+    def download(self, changeset: str) -> None:
+        """
+        Replay the download of a build.
+
+        :param changeset: The changeset of the build.
+        """
+        duration = self._downloads.get(changeset)
+        if duration is None:
+            # Builds downloaded before recording cost as much as the others
+            durations = list(self._downloads.values())
+            duration = sum(durations) / len(durations) if durations else 0.0
+        self.sleep(duration)
+        with self._lock:
+            self._downloaded += 1
+
+    def _next_evaluation(self, changeset: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            run = self._evaluated.get(changeset, 0)
+            self._evaluated[changeset] = run + 1
+        evaluations = self._evaluations.get(changeset)
+        if not evaluations:
+            return None
+        # Further evaluations of a build repeat its last recorded result
+        return evaluations[min(run, len(evaluations) - 1)]
+
+    def _infer(self, changeset: str) -> EvaluatorResult:
+        """
+        Infer the result of a build which wasn't evaluated when recording, from
+        its position relative to the change located by the recorded bisection.
+
+        :param changeset: The changeset of the build.
+        """
+        self._missing(f"evaluation of {changeset[:12]}")
+        if self._result is None or self._result["status"] != BisectionResult.SUCCESS:
+            return EvaluatorResult.BUILD_FAILED
+
+        build = self.build(self._recorded_builds[changeset])
+        start = self._recorded_builds.get(self._result["start"])
+        end = self._recorded_builds.get(self._result["end"])
+        good, bad = EvaluatorResult.BUILD_PASSED, EvaluatorResult.BUILD_CRASHED
+        if self.session["find_fix"]:
+            good, bad = bad, good
+        if start is not None and build.datetime <= self.build(start).datetime:
+            return good
+        if end is not None and build.datetime >= self.build(end).datetime:
+            return bad
+        return EvaluatorResult.BUILD_FAILED
+
+    def evaluate(self, changeset: str) -> EvaluatorResult:
+        """
+        Replay an evaluation of the testcase.
+
+        :param changeset: The changeset of the evaluated build.
+        """
+        event = self._next_evaluation(changeset)
+        if event is None:
+            durations = [e["duration"] for v in self._evaluations.values() for e in v]
+            self.sleep(sum(durations) / len(durations) if durations else 0.0)
+            return self._infer(changeset)
+        self.sleep(event["duration"])
+        return EvaluatorResult[event["result"]]
+
+    def measure(self, changeset: str, runs: int) -> Tuple[int, int]:
+        """
+        Replay a measurement of the reproduction rate.
+
+        :param changeset: The changeset of the measured build.
+        :param runs: Number of evaluations.
+        """
+        event = self._measurements.get(changeset)
+        if event is None:
+            result = self.evaluate(changeset)
+            crashed = int(result == EvaluatorResult.BUILD_CRASHED)
+            return crashed * runs, 0 if result == EvaluatorResult.BUILD_FAILED else runs
+        self.sleep(event["duration"])
+        return event["crashes"], event["completed"]
+
+    def run(self) -> ReplayResult:
+        """
+        Replay the bisection in a temporary build store.
+
+        :returns: The cost of the replay next to the cost of the recording.
+        """
+        with tempfile.TemporaryDirectory(prefix="autobisect-replay-") as tmp:
+            config = Path(tmp) / "autobisect.ini"
+            config.write_text(
+                f"[autobisect]\nstorage-path: {tmp}\npersist: true\n"
+                "persist-limit: 30000\n"
+            )
+            start = time.monotonic()
+            bisector = ReplayBisector(self, config, **self.session["settings"])
+            result = bisector.bisect(random_choice=self.session["random_choice"])
+            elapsed = time.monotonic() - start
+
+        recorded = self._result
+        located = (
+            recorded is not None
+            and result.status == recorded["status"]
+            and (
+                result.status != BisectionResult.SUCCESS
+                or (
+                    result.start.changeset == recorded["start"]
+                    and result.end.changeset == recorded["end"]
+                )
+            )
+        )
+        replayed = {
+            "probes": float(sum(self._evaluated.values())),
+            "downloads": float(self._downloaded),
+            "wall_time": elapsed / self.time_scale if self.time_scale else elapsed,
+        }
+        return ReplayResult(located, self.recorded, replayed, self.unrecorded)
+
+
+def format_replay(result: ReplayResult) -> str:
+    """
+    Format the cost of a replay next to the cost of the recording as a table.
+
+    :param result: The result to format.
+    :returns: The table.
+    """
+    rows = [("", "recorded", "replayed")]
+    for name in ("probes", "downloads"):
+        rows.append(
+            (name, str(int(result.recorded[name])), str(int(result.replayed[name])))
+        )
+    rows.append(
+        (
+            "wall time",
+            str(timedelta(seconds=int(result.recorded["wall_time"]))),
+            str(timedelta(seconds=int(result.replayed["wall_time"]))),
+        )
+    )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    lines = [
+        "  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+        for row in rows
+    ]
+    lines.append(f"Same result: {'yes' if result.located else 'no'}")
+    if result.unrecorded:
+        lines.append(f"Inferred lookups and evaluations: {result.unrecorded}")
+    return "\n".join(lines)
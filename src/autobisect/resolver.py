@@ -0,0 +1,38 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, TypeVar
+
+LOG = logging.getLogger(__name__)
+
+# Taskcluster lookups are IO bound so a small pool is enough to hide latency
+# without hammering the index
+RESOLVE_WORKERS = 8
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def resolve_concurrently(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = RESOLVE_WORKERS,
+) -> List[R]:
+    """
+    Apply func to every item using a bounded thread pool.
+
+    :param func: Callable used to resolve a single item.
+    :param items: Items to resolve.
+    :param max_workers: Maximum number of concurrent resolutions.
+    :returns: Results in the same order as items.
+    """
+    entries = list(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, func, entry)
+            for entry in entries
+        ]
+        return [future.result() for future in futures]
@@ -0,0 +1,127 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import logging
+import sqlite3
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Optional, Tuple
+
+from fuzzfetch import BuildFlags, Platform
+
+from autobisect.evaluators import EvaluatorResult
+
+LOG = logging.getLogger(__name__)
+
+
+class ResultCache(object):
+    """Sqlite3 backed store of previous evaluation results."""
+
+    # Launch failures are often environmental so only reproducible results are kept
+    CACHEABLE = (EvaluatorResult.BUILD_CRASHED, EvaluatorResult.BUILD_PASSED)
+
+    def __init__(self, db_path: Path, max_age: Optional[timedelta] = None) -> None:
+        """
+        Open the result store.
+
+        :param db_path: Path to the sqlite3 database.
+        :param max_age: Discard results older than this.
+        """
+        self._lock = threading.Lock()
+        self.con = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.con.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "fingerprint TEXT, changeset TEXT, flags TEXT, platform TEXT, "
+            "result INT, timestamp REAL, "
+            "PRIMARY KEY (fingerprint, changeset, flags, platform))"
+        )
+        self.con.commit()
+        if max_age is not None:
+            self.expire(max_age)
+
+    @staticmethod
+    def _key(
+        fingerprint: str, changeset: str, flags: BuildFlags, platform: Platform
+    ) -> Tuple[str, str, str, str]:
+        return (
+            fingerprint,
+            changeset,
+            flags.build_string(),
+            f"{platform.system}-{platform.machine}",
+        )
+
+    def get(
+        self,
+        fingerprint: str,
+        changeset: str,
+        flags: BuildFlags,
+        platform: Platform,
+    ) -> Optional[EvaluatorResult]:
+        """
+        Retrieve a previous evaluation result.
+
+        :param fingerprint: Digest of the testcase and evaluator settings.
+        :param changeset: The changeset of the evaluated build.
+        :param flags: The build flags.
+        :param platform: The build platform.
+        :returns: The stored result or None.
+        """
+        with self._lock:
+            row = self.con.execute(
+                "SELECT result FROM results WHERE fingerprint = ? AND changeset = ? "
+                "AND flags = ? AND platform = ?",
+                self._key(fingerprint, changeset, flags, platform),
+            ).fetchone()
+
+        return EvaluatorResult(row[0]) if row is not None else None
+
+    def put(
+        self,
+        fingerprint: str,
+        changeset: str,
+        flags: BuildFlags,
+        platform: Platform,
+        result: EvaluatorResult,
+    ) -> None:
+        """
+        Store an evaluation result.
+
+        :param fingerprint: Digest of the testcase and evaluator settings.
+        :param changeset: The changeset of the evaluated build.
+        :param flags: The build flags.
+        :param platform: The build platform.
+        :param result: The evaluation result.
+        """
+        if result not in self.CACHEABLE:
+            return
+
+        with self._lock:
+            self.con.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    *self._key(fingerprint, changeset, flags, platform),
+                    result.value,
+                    time.time(),
+                ),
+            )
+            self.con.commit()
+
+    def expire(self, max_age: timedelta) -> None:
+        """
+        Remove all results older than max_age.
+
+        :param max_age: Maximum age of the results to keep.
+        """
+        with self._lock:
+            cur = self.con.execute(
+                "DELETE FROM results WHERE timestamp < ?",
+                (time.time() - max_age.total_seconds(),),
+            )
+            self.con.commit()
+        LOG.debug("Expired %d cached result(s)", cur.rowcount)
+
+    def close(self) -> None:
+        """Closes the sqlite3 database."""
+        self.con.close()
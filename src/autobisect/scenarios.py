@@ -0,0 +1,102 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import logging
+from typing import Any, Dict, Optional, Sequence, Set, Tuple
+
+LOG = logging.getLogger(__name__)
+
+# Simulated seconds are slept for this many real seconds, so that concurrent
+# probes and background downloads overlap as they would against real builds
+DEFAULT_TIME_SCALE = 0.001
+
+
+class Scenario(object):
+    """A synthetic build history along with the behaviour of the testcase."""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        builds: int = 128,
+        regression: Optional[int] = None,
+        reproducibility: float = 1.0,
+        repeat: int = 1,
+        broken: Sequence[Tuple[int, int]] = (),
+        download: float = 60.0,
+        evaluation: float = 30.0,
+    ) -> None:
+        """
+        Describe a scenario.
+
+        :param name: Name of the scenario.
+        :param description: Short description of the scenario.
+        :param builds: Number of builds, including both boundaries.
+        :param regression: Index of the first crashing build (default: 2/3 of the
+            way through the history).
+        :param reproducibility: Probability that a single run of the testcase
+            reproduces the crash on an affected build.
+        :param repeat: Number of runs per evaluation.
+        :param broken: Runs of builds failing to launch, as (first index, length).
+        :param download: Seconds needed to download and extract a build.
+        :param evaluation: Seconds needed for a single run of the testcase.
+        """
+        self.name = name
+        self.description = description
+        self.builds = builds
+        self.regression = regression if regression is not None else builds * 2 // 3
+        self.reproducibility = reproducibility
+        self.repeat = repeat
+        self.broken: Set[int] = {
+            index for first, length in broken for index in range(first, first + length)
+        }
+        self.download = download
+        self.evaluation = evaluation
+        assert 0 < self.regression < builds, "The boundaries must straddle the change"
+        assert not self.broken & {0, self.regression, builds - 1}
+
+    @property
+    def expected_start(self) -> int:
+        """Index of the last launching build before the regression."""
+        return max(i for i in range(self.regression) if i not in self.broken)
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario("reliable", "Deterministic crash, default latencies"),
+        Scenario(
+            "flaky",
+            "Crash reproducing 60% of the time, 3 runs per evaluation",
+            reproducibility=0.6,
+            repeat=3,
+        ),
+        Scenario(
+            "broken-runs",
+            "Runs of builds failing to launch around the midpoints",
+            broken=((60, 8), (90, 4)),
+        ),
+        Scenario(
+            "slow-downloads",
+            "Downloads dominate the cost of a probe",
+            download=300.0,
+            evaluation=10.0,
+        ),
+        Scenario(
+            "slow-evaluation",
+            "Evaluations dominate the cost of a probe",
+            download=10.0,
+            evaluation=300.0,
+        ),
+    )
+}
+
+# Bisector arguments of each strategy, random_choice is passed to bisect()
+STRATEGIES: Dict[str, Dict[str, Any]] = {
+    "midpoint": {"pivot_window": 0.0},
+    "cost-aware": {},
+    "random": {"random_choice": True},
+    "parallel": {"jobs": 3},
+    "prefetch": {"prefetch": True},
+    "probabilistic": {"probabilistic": True},
+}
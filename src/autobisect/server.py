@@ -0,0 +1,327 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import contextvars
+import itertools
+import json
+import logging
+import queue
+import socket
+import socketserver
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fuzzfetch import BuildFlags, BuildSearchOrder, Fetcher, Platform
+
+from .bisect import BisectionResult
+from .build_manager import BuildManager
+from .evaluators import Evaluator
+from .timeline import Push
+
+LOG = logging.getLogger(__name__)
+
+Message = Dict[str, Any]
+
+# Options naming files created by the job rather than existing ones
+OUTPUT_OPTIONS = ("--metrics", "--record", "--trace")
+Runner = Callable[[List[str], "SharedState"], List[Tuple[Evaluator, BisectionResult]]]
+
+# The job being run, inherited by the threads a bisection submits work to
+_JOB: "contextvars.ContextVar[Optional[int]]" = contextvars.ContextVar(
+    "job", default=None
+)
+
+
+class ServerException(Exception):
+    """Raised when the bisection server cannot be started or reached."""
+
+
+class SharedState(object):
+    """Build store and build metadata shared by every job of a server."""
+
+    def __init__(self, config: Optional[Path] = None) -> None:
+        """
+        Open the build store.
+
+        :param config: Path to config file.
+        """
+        self.build_manager = BuildManager(config)
+        self.pushes: Dict[Tuple[str, str], Optional[List[Push]]] = {}
+        self._boundaries: Dict[Tuple[str, ...], Fetcher] = {}
+        # Only jobs resolving the same boundary wait on each other
+        self._boundary_locks: Dict[Tuple[str, ...], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def boundary(
+        self,
+        branch: str,
+        build_id: str,
+        flags: BuildFlags,
+        platform: Platform,
+        target: str,
+        nearest: BuildSearchOrder,
+    ) -> Fetcher:
+        """
+        Resolve an explicitly requested boundary build, reusing earlier lookups.
+
+        :param branch: The branch of the build.
+        :param build_id: Revision, date or buildid of the build.
+        :param flags: The build flags.
+        :param platform: The build platform.
+        :param target: The target to retrieve.
+        :param nearest: Search direction if no build matches the identifier.
+        :returns: The Fetcher object.
+        """
+        key = (
+            branch,
+            build_id,
+            flags.build_string(),
+            f"{platform.system}-{platform.machine}",
+            target,
+            nearest.name,
+        )
+        with self._lock:
+            lock = self._boundary_locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in self._boundaries:
+                self._boundaries[key] = Fetcher(
+                    branch,
+                    build_id,
+                    flags,
+                    targets=[target],
+                    platform=platform,
+                    nearest=nearest,
+                )
+            return self._boundaries[key]
+
+
+def result_message(evaluator: Evaluator, result: BisectionResult) -> Message:
+    """
+    Serialize the result of a single testcase.
+
+    :param evaluator: The evaluator of the testcase.
+    :param result: The bisection result.
+    :returns: The result message.
+    """
+    message: Message = {
+        "event": "result",
+        "testcase": str(evaluator.testcase),
+        "status": "success" if result.status == BisectionResult.SUCCESS else "failed",
+        "start": result.start.changeset,
+        "end": result.end.changeset,
+        "message": result.message,
+    }
+    if result.status == BisectionResult.SUCCESS:
+        message["pushlog"] = result.pushlog
+    return message
+
+
+class _ForwardingHandler(logging.Handler):
+    """Forward the log records emitted on behalf of a single job."""
+
+    def __init__(self, job: int, emit: Callable[[Message], None]) -> None:
+        super().__init__()
+        self.job = job
+        self._emit = emit
+        self.setFormatter(logging.Formatter("%(message)s"))
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if _JOB.get() != self.job:
+            return
+        self._emit(
+            {"event": "log", "level": record.levelname, "message": self.format(record)}
+        )
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    """Accept a single job per connection and stream its progress."""
+
+    server: "BisectionServer"
+
+    def _send(self, message: Message) -> bool:
+        """
+        Send a message to the client.
+
+        :param message: The message.
+        :returns: False if the client disconnected.
+        """
+        try:
+            self.wfile.write(f"{json.dumps(message)}\n".encode())
+            self.wfile.flush()
+        except OSError:
+            return False
+        return True
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        # Connections probing whether a server is running send nothing
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+            argv = [str(arg) for arg in request["argv"]]
+        except (ValueError, KeyError, TypeError):
+            self._send({"event": "error", "message": "Invalid request"})
+            return
+
+        job = next(self.server.jobs)
+        messages: "queue.Queue[Optional[Message]]" = queue.Queue()
+        self.server.executor.submit(self.server.run_job, job, argv, messages.put)
+        LOG.info("Queued job %d: %s", job, " ".join(argv))
+
+        connected = True
+        message: Optional[Message] = {"event": "queued"}
+        while message is not None:
+            if connected and not self._send({"job": job, **message}):
+                # The job keeps running and its results are still cached
+                LOG.warning("Client of job %d disconnected", job)
+                connected = False
+            message = messages.get()
+
+
+class BisectionServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Run bisection jobs received over a Unix socket on a pool of workers."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        path: Path,
+        workers: int,
+        runner: Runner,
+        shared: SharedState,
+    ) -> None:
+        """
+        Bind the server socket.
+
+        :param path: Path of the Unix socket.
+        :param workers: Number of jobs run concurrently.
+        :param runner: Callable parsing the job arguments and running the bisection.
+        :param shared: State shared by every job.
+        :raises ServerException: If another server is listening on the socket.
+        """
+        if path.exists():
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                try:
+                    sock.connect(str(path))
+                except OSError:
+                    LOG.debug("Removing stale socket %s", path)
+                    path.unlink()
+                else:
+                    raise ServerException(f"A server is already listening on {path}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        super().__init__(str(path), _JobHandler)
+        self.path = path
+        self.runner = runner
+        self.shared = shared
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.jobs = itertools.count(1)
+
+    def run_job(
+        self, job: int, argv: List[str], emit: Callable[[Optional[Message]], None]
+    ) -> None:
+        """
+        Run a single job, forwarding its log records and results.
+
+        :param job: The job number.
+        :param argv: The bisection arguments.
+        :param emit: Callable receiving each message and None once the job is done.
+        """
+        token = _JOB.set(job)
+        handler = _ForwardingHandler(job, emit)
+        logging.getLogger().addHandler(handler)
+        try:
+            emit({"event": "started"})
+            try:
+                results = self.runner(argv, self.shared)
+            except SystemExit:
+                emit({"event": "error", "message": "Invalid bisection arguments"})
+                return
+            except Exception as e:  # pylint: disable=broad-except
+                LOG.exception("Job %d failed", job)
+                emit({"event": "error", "message": str(e)})
+                return
+
+            for evaluator, result in results:
+                emit(result_message(evaluator, result))
+            LOG.info("Completed job %d", job)
+        finally:
+            logging.getLogger().removeHandler(handler)
+            _JOB.reset(token)
+            emit(None)
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        LOG.exception("Error handling a client connection")
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.path.unlink(missing_ok=True)
+
+
+def absolute_paths(argv: List[str]) -> List[str]:
+    """
+    Make the paths within the supplied arguments independent of the working
+    directory, as the server runs elsewhere.
+
+    :param argv: The bisection arguments.
+    :returns: The arguments with existing relative paths and output paths made
+        absolute.
+    """
+    result = []
+    for previous, arg in zip([""] + argv, argv):
+        if previous in OUTPUT_OPTIONS:
+            arg = str(Path(arg).expanduser().resolve())
+        elif arg.startswith(tuple(f"{option}=" for option in OUTPUT_OPTIONS)):
+            option, path = arg.split("=", 1)
+            arg = f"{option}={Path(path).expanduser().resolve()}"
+        elif not arg.startswith("-") and Path(arg).exists():
+            arg = str(Path(arg).resolve())
+        result.append(arg)
+    return result
+
+
+def submit(path: Path, argv: List[str]) -> int:
+    """
+    Submit a job to a running server and report its progress.
+
+    :param path: Path of the server socket.
+    :param argv: The bisection arguments.
+    :returns: Exit code.
+    :raises ServerException: If the server can't be reached.
+    """
+    status = 0
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(path))
+        except OSError as e:
+            raise ServerException(f"Unable to connect to {path}: {e}") from e
+
+        request = {"argv": absolute_paths(argv)}
+        sock.sendall(f"{json.dumps(request)}\n".encode())
+        with sock.makefile() as fp:
+            for line in fp:
+                message = json.loads(line)
+                event = message["event"]
+                if event == "queued":
+                    LOG.info("Queued as job %d", message["job"])
+                elif event == "log":
+                    LOG.log(logging.getLevelName(message["level"]), message["message"])
+                elif event == "result":
+                    LOG.info(
+                        "%s: %s (%s - %s)",
+                        message["testcase"],
+                        message["status"],
+                        message["start"],
+                        message["end"],
+                    )
+                    if "pushlog" in message:
+                        LOG.info("> %s", message["pushlog"])
+                elif event == "error":
+                    LOG.error("Job failed: %s", message["message"])
+                    status = 1
+
+    return status
@@ -0,0 +1,372 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import logging
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Union
+
+from fuzzfetch import BuildFlags, BuildTask, Fetcher, Platform
+
+from .bisect import BisectionResult, Bisector
+from .build_manager import BuildManager
+from .builds import BuildDescriptor, BuildRange
+from .evaluators import Evaluator, EvaluatorResult
+from .index import IndexedFetcher
+from .scenarios import DEFAULT_TIME_SCALE, SCENARIOS, STRATEGIES, Scenario
+
+LOG = logging.getLogger(__name__)
+
+# Builds which fail to launch do so without running the testcase for long
+LAUNCH_FAILURE_COST = 5.0
+
+BRANCH = "central"
+TARGET = "js"
+# Synthetic builds are pushed hourly, long enough ago for their metadata to be final
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+class SimulatedFetcher(IndexedFetcher):
+    """A synthetic build whose download only takes time."""
+
+    def __init__(self, index: int, simulation: "Simulation") -> None:
+        """
+        Create the build.
+
+        :param index: Position of the build within the history.
+        :param simulation: The simulation the build belongs to.
+        """
+        self.index = index
+        self.simulation = simulation
+        changeset = f"{index:012x}{simulation.seed:028x}"[:40]
+        build_id = (EPOCH + timedelta(hours=index)).strftime("%Y%m%d%H%M%S")
+        task = BuildTask(
+            "https://simulated.invalid",
+            "https://simulated.invalid",
+            {"taskId": f"task-{index}", "rank": index},
+        )
+        super().__init__(
+            BRANCH,
+            task,
+            BuildFlags(),
+            TARGET,
+            Platform("Linux", "x86_64"),
+            {
+                "buildid": build_id,
+                "moz_source_stamp": changeset,
+                "moz_source_repo": "https://hg.mozilla.org/mozilla-central",
+            },
+            f"public/build/target-{index}",
+        )
+
+    def extract_build(self, path: Union[str, Path]) -> None:
+        self.simulation.sleep(self.simulation.scenario.download)
+        Path(path).mkdir(parents=True)
+        (Path(path) / "js").write_text(self.changeset)
+        self.simulation.record_download(self)
+
+
+class SimulatedEvaluator(Evaluator):
+    """Evaluate the testcase of a scenario against synthetic builds."""
+
+    def __init__(self, simulation: "Simulation") -> None:
+        """
+        Create the evaluator.
+
+        :param simulation: The simulation whose builds are evaluated.
+        """
+        self.simulation = simulation
+        self.testcase = Path("simulated.js")
+        self.repeat = simulation.scenario.repeat
+
+    @property
+    def target(self) -> str:
+        return TARGET
+
+    def evaluate_testcase(
+        self, build_path: Path, repeat: Optional[int] = None
+    ) -> EvaluatorResult:
+        build = self.simulation.build_at(build_path)
+        scenario = self.simulation.scenario
+        if build.index in scenario.broken:
+            self.simulation.sleep(LAUNCH_FAILURE_COST)
+            return EvaluatorResult.BUILD_FAILED
+
+        for _ in range((self.repeat if repeat is None else repeat) or 1):
+            self.simulation.sleep(scenario.evaluation)
+            if build.index >= scenario.regression and self.simulation.reproduces(build):
+                return EvaluatorResult.BUILD_CRASHED
+        return EvaluatorResult.BUILD_PASSED
+
+
+class SimulatedBisector(Bisector):
+    """A Bisector whose builds are enumerated and resolved from a simulation."""
+
+    def __init__(self, simulation: "Simulation", **kwargs: Any) -> None:
+        """
+        Create the bisector.
+
+        :param simulation: The simulation providing the builds.
+        :param kwargs: Additional Bisector arguments.
+        """
+        self.simulation = simulation
+        self.probes = 0
+        self._probe_lock = threading.Lock()
+        builds = simulation.builds
+        build_manager = BuildManager(simulation.config)
+        # Poll once per simulated second rather than once per real 0.1 second
+        build_manager.poll_interval = simulation.time_scale
+        super().__init__(
+            SimulatedEvaluator(simulation),
+            BRANCH,
+            builds[0],
+            builds[-1],
+            BuildFlags(),
+            Platform("Linux", "x86_64"),
+            config=simulation.config,
+            build_manager=build_manager,
+            **kwargs,
+        )
+
+    def strategies(self) -> Dict[str, Callable[[], BuildRange[BuildDescriptor]]]:
+        return {"simulated": self._get_simulated_builds}
+
+    def _get_simulated_builds(self) -> BuildRange[BuildDescriptor]:
+        """Create build range containing every build between the boundaries."""
+        return BuildRange(
+            [
+                BuildDescriptor.from_changeset(BRANCH, build.changeset, build.datetime)
+                for build in self.simulation.builds[1:-1]
+            ]
+        )
+
+    def _plan(self, phases: List[str]) -> List[str]:
+        return phases
+
+    def _lookup(self, entry: BuildDescriptor) -> Fetcher:
+        return self.simulation.by_changeset[entry.identifier]
+
+    def test_build(
+        self,
+        build: Fetcher,
+        cancel: Optional[threading.Event] = None,
+        verify: bool = False,
+    ) -> EvaluatorResult:
+        with self._probe_lock:
+            self.probes += 1
+        return super().test_build(build, cancel, verify)
+
+
+class SimulationResult(object):
+    """Outcome and cost of bisecting a scenario with a single strategy."""
+
+    def __init__(
+        self,
+        scenario: str,
+        strategy: str,
+        located: bool,
+        probes: int,
+        evaluations: int,
+        downloads: int,
+        wasted_downloads: int,
+        wall_time: float,
+    ) -> None:
+        """
+        Record the result.
+
+        :param scenario: Name of the scenario.
+        :param strategy: Name of the strategy.
+        :param located: Whether the bisection reported the expected boundaries.
+        :param probes: Number of builds probed, including the boundaries.
+        :param evaluations: Number of times the testcase was evaluated.
+        :param downloads: Number of builds downloaded.
+        :param wasted_downloads: Number of downloaded builds never evaluated.
+        :param wall_time: Simulated duration of the bisection in seconds.
+        """
+        self.scenario = scenario
+        self.strategy = strategy
+        self.located = located
+        self.probes = probes
+        self.evaluations = evaluations
+        self.downloads = downloads
+        self.wasted_downloads = wasted_downloads
+        self.wall_time = wall_time
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON serializable representation of the result."""
+        return dict(vars(self))
+
+
+class Simulation(object):
+    """Bisect a scenario against synthetic builds in a temporary build store."""
+
+    def __init__(
+        self,
+        scenario: Scenario,
+        seed: int = 0,
+        time_scale: float = DEFAULT_TIME_SCALE,
+    ) -> None:
+        """
+        Create the synthetic builds.
+
+        :param scenario: The scenario to simulate.
+        :param seed: Seed of the flaky results.
+        :param time_scale: Real seconds slept per simulated second.
+        """
+        self.scenario = scenario
+        self.seed = seed
+        self.time_scale = time_scale
+        self.config: Optional[Path] = None
+        self.builds = [SimulatedFetcher(i, self) for i in range(scenario.builds)]
+        self.by_changeset = {build.changeset: build for build in self.builds}
+        self._lock = threading.Lock()
+        self._runs: Dict[int, int] = {}
+        self._downloaded: Set[int] = set()
+        self._evaluated: Set[int] = set()
+        self.downloads = self.evaluations = 0
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Let simulated time pass.
+
+        :param seconds: Simulated seconds.
+        """
+        time.sleep(seconds * self.time_scale)
+
+    def build_at(self, path: Path) -> SimulatedFetcher:
+        """
+        Return the build extracted to the supplied path.
+
+        :param path: The build path.
+        """
+        build = self.by_changeset[(path / "js").read_text()]
+        with self._lock:
+            self._evaluated.add(build.index)
+            self.evaluations += 1
+        return build
+
+    def reproduces(self, build: SimulatedFetcher) -> bool:
+        """
+        Whether the next run of the testcase against an affected build crashes.
+
+        Runs are numbered per build so that results don't depend on the order in
+        which concurrent probes complete.
+
+        :param build: The build being evaluated.
+        """
+        with self._lock:
+            run = self._runs.get(build.index, 0)
+            self._runs[build.index] = run + 1
+        rng = random.Random(f"{self.seed}:{build.index}:{run}")
+        return rng.random() < self.scenario.reproducibility
+
+    def record_download(self, build: SimulatedFetcher) -> None:
+        """
+        Count a download of the supplied build.
+
+        :param build: The downloaded build.
+        """
+        with self._lock:
+            self._downloaded.add(build.index)
+            self.downloads += 1
+
+    def run(self, strategy: str) -> SimulationResult:
+        """
+        Bisect the scenario using one of the supported strategies.
+
+        :param strategy: Name of the strategy.
+        :returns: The outcome and cost of the bisection.
+        """
+        kwargs = dict(STRATEGIES[strategy])
+        random_choice = kwargs.pop("random_choice", False)
+        with tempfile.TemporaryDirectory(prefix="autobisect-sim-") as tmp:
+            self.config = Path(tmp) / "autobisect.ini"
+            self.config.write_text(
+                f"[autobisect]\nstorage-path: {tmp}\npersist: true\n"
+                "persist-limit: 30000\n"
+            )
+            self._runs.clear()
+            self._downloaded.clear()
+            self._evaluated.clear()
+            self.downloads = self.evaluations = 0
+            # Random pivots are drawn from the global generator
+            random.seed(f"{self.seed}:{strategy}")
+
+            bisector = SimulatedBisector(self, result_cache=False, **kwargs)
+            start = time.monotonic()
+            result = bisector.bisect(random_choice=random_choice)
+            wall_time = (time.monotonic() - start) / self.time_scale
+
+        scenario = self.scenario
+        located = (
+            result.status == BisectionResult.SUCCESS
+            and result.start.changeset == self.builds[scenario.expected_start].changeset
+            and result.end.changeset == self.builds[scenario.regression].changeset
+        )
+        return SimulationResult(
+            scenario.name,
+            strategy,
+            located,
+            bisector.probes,
+            self.evaluations,
+            self.downloads,
+            len(self._downloaded - self._evaluated),
+            wall_time,
+        )
+
+
+def simulate(
+    scenarios: Optional[Sequence[str]] = None,
+    strategies: Optional[Sequence[str]] = None,
+    seed: int = 0,
+    time_scale: float = DEFAULT_TIME_SCALE,
+) -> List[SimulationResult]:
+    """
+    Bisect every scenario with every strategy.
+
+    :param scenarios: Names of the scenarios (default: all).
+    :param strategies: Names of the strategies (default: all).
+    :param seed: Seed of the flaky results.
+    :param time_scale: Real seconds slept per simulated second.
+    :returns: The result of each combination.
+    """
+    results = []
+    for name in scenarios or list(SCENARIOS):
+        simulation = Simulation(SCENARIOS[name], seed, time_scale)
+        for strategy in strategies or list(STRATEGIES):
+            LOG.info("Simulating %s with %s", name, strategy)
+            results.append(simulation.run(strategy))
+    return results
+
+
+def format_results(results: Sequence[SimulationResult]) -> str:
+    """
+    Format results as a table.
+
+    :param results: The results to format.
+    :returns: The table.
+    """
+    header = ("scenario", "strategy", "located", "probes", "evals", "dl", "wasted")
+    rows = [header + ("wall time",)]
+    for result in results:
+        rows.append(
+            (
+                result.scenario,
+                result.strategy,
+                "yes" if result.located else "no",
+                str(result.probes),
+                str(result.evaluations),
+                str(result.downloads),
+                str(result.wasted_downloads),
+                str(timedelta(seconds=int(result.wall_time))),
+            )
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join(
+        "  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+        for row in rows
+    )
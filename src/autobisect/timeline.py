@@ -0,0 +1,97 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import logging
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+import requests
+
+from .builds import BuildDescriptor, BuildRange
+
+LOG = logging.getLogger(__name__)
+
+PUSHLOG_URL = "https://hg.mozilla.org/mozilla-central/json-pushes"
+
+
+class Push(object):
+    """A single mozilla-central push."""
+
+    __slots__ = ("push_id", "timestamp", "changesets")
+
+    def __init__(self, push_id: int, timestamp: datetime, changesets: List[str]):
+        """
+        Instantiate a new push.
+
+        :param push_id: The pushlog id.
+        :param timestamp: The push time.
+        :param changesets: The pushed changesets, oldest first.
+        """
+        self.push_id = push_id
+        self.timestamp = timestamp
+        self.changesets = changesets
+
+    @property
+    def head(self) -> str:
+        """Return the changeset the push was built from."""
+        return self.changesets[-1]
+
+
+def get_pushes(start: str, end: str) -> Optional[List[Push]]:
+    """
+    Retrieve the mozilla-central pushes after start up to and including end.
+
+    :param start: Starting revision.
+    :param end: Ending revision.
+    :return: List of pushes ordered by push id.
+    """
+    url = f"{PUSHLOG_URL}?fromchange={start}&tochange={end}"
+    try:
+        data = requests.get(url, timeout=30)
+        data.raise_for_status()
+    except requests.exceptions.RequestException as exc:
+        LOG.error("Failed to retrieve pushlog: %s", exc)
+        return None
+
+    json = data.json()
+
+    return [
+        Push(
+            int(push_id),
+            datetime.fromtimestamp(json[push_id]["date"], tz=timezone.utc),
+            json[push_id]["changesets"],
+        )
+        for push_id in sorted(json, key=int)
+    ]
+
+
+def build_timeline(
+    pushes: Iterable[Push], exclude: Iterable[str] = ()
+) -> BuildRange[BuildDescriptor]:
+    """
+    Create a single build range covering every change within the supplied pushes.
+
+    Each push contributes the autoland builds of the changesets merged by it,
+    followed by the mozilla-central build of its head.  Entries are only resolved
+    when probed, so changesets without a build cost a lookup rather than a probe.
+
+    :param pushes: The mozilla-central pushes ordered by push id.
+    :param exclude: Changesets to leave out, such as the boundaries.
+    :returns: A build range ordered by push time.
+    """
+    excluded = set(exclude)
+    builds = []
+    for push in pushes:
+        for changeset in push.changesets[:-1]:
+            if changeset not in excluded:
+                builds.append(
+                    BuildDescriptor.from_changeset(
+                        "autoland", changeset, push.timestamp
+                    )
+                )
+        if push.head not in excluded:
+            builds.append(
+                BuildDescriptor.from_changeset("central", push.head, push.timestamp)
+            )
+
+    return BuildRange(builds)
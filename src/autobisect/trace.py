@@ -0,0 +1,148 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set
+
+LOG = logging.getLogger(__name__)
+
+
+class Tracer(object):
+    """Write timing spans to a Chrome trace or a JSON lines file."""
+
+    def __init__(self, path: Path) -> None:
+        """
+        Open the trace file.
+
+        Files ending in .jsonl receive one span per line and are appended to, so
+        that the spans of many runs can be aggregated.  Any other file is
+        overwritten with a trace viewable in chrome://tracing or Perfetto.
+
+        :param path: Path to the trace file.
+        """
+        self.path = path
+        self.jsonl = path.suffix == ".jsonl"
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._threads: Set[int] = set()
+        self._empty = True
+        self._fp = path.open("a" if self.jsonl else "w")
+        if not self.jsonl:
+            self._fp.write("[\n")
+
+    def _write(self, event: Dict[str, Any]) -> None:
+        if not self.jsonl and not self._empty:
+            self._fp.write(",\n")
+        self._fp.write(json.dumps(event, default=str))
+        if self.jsonl:
+            self._fp.write("\n")
+        self._empty = False
+
+    def write(
+        self, name: str, category: str, start: int, duration: int, args: Dict[str, Any]
+    ) -> None:
+        """
+        Record a completed span.
+
+        :param name: Name of the span.
+        :param category: Category of the span (e.g. download or evaluate).
+        :param start: Start time in microseconds since the epoch.
+        :param duration: Duration in microseconds.
+        :param args: Details of the span.
+        """
+        thread = threading.current_thread()
+        tid = thread.ident or 0
+        with self._lock:
+            if not self.jsonl and tid not in self._threads:
+                # Label the timeline of each thread
+                self._threads.add(tid)
+                self._write(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": self._pid,
+                        "tid": tid,
+                        "args": {"name": thread.name},
+                    }
+                )
+            self._write(
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": start,
+                    "dur": duration,
+                    "pid": self._pid,
+                    "tid": tid,
+                    "args": args,
+                }
+            )
+            self._fp.flush()
+
+    def close(self) -> None:
+        """Complete and close the trace file."""
+        with self._lock:
+            if not self.jsonl:
+                self._fp.write("\n]\n")
+            self._fp.close()
+
+
+# The tracer of the running bisection, inherited by the threads it submits work to
+_TRACER: "contextvars.ContextVar[Optional[Tracer]]" = contextvars.ContextVar(
+    "tracer", default=None
+)
+
+
+@contextmanager
+def tracing(path: Optional[Path]) -> Iterator[None]:
+    """
+    Record the spans of the enclosed code to a trace file.
+
+    :param path: Path to the trace file or None to disable tracing.
+    """
+    if path is None:
+        yield
+        return
+
+    tracer = Tracer(path)
+    token = _TRACER.set(tracer)
+    try:
+        yield
+    finally:
+        _TRACER.reset(token)
+        tracer.close()
+        LOG.info("Trace written to %s", path)
+
+
+@contextmanager
+def span(name: str, category: str, **args: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Time the enclosed code if tracing is enabled.
+
+    :param name: Name of the span.
+    :param category: Category of the span (e.g. download or evaluate).
+    :param args: Details of the span.
+    :yields: The details, to which results may be added.
+    """
+    tracer = _TRACER.get()
+    if tracer is None:
+        yield args
+        return
+
+    start = time.time_ns() // 1000
+    begin = time.perf_counter_ns()
+    try:
+        yield args
+    except BaseException as e:
+        args["error"] = type(e).__name__
+        raise
+    finally:
+        duration = (time.perf_counter_ns() - begin) // 1000
+        tracer.write(name, category, start, duration, args)
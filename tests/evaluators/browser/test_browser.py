@@ -36,6 +36,46 @@ def test_verify_build_status(mocker):
     assert browser.verify_build(Path("firefox")) is False
 
 
+def test_browser_evaluator_fingerprint(tmp_path):
+    """Test that the fingerprint covers served files and prefs."""
+    test = tmp_path / "testcase.html"
+    test.write_text("<html></html>")
+    prefs = tmp_path / "prefs.js"
+    prefs.write_text("pref_a")
+    fingerprint = BrowserEvaluator(test, scan_dir=True, prefs=prefs).fingerprint()
+
+    (tmp_path / "helper.js").write_text("foo()")
+    assert (
+        fingerprint != BrowserEvaluator(test, scan_dir=True, prefs=prefs).fingerprint()
+    )
+    fingerprint = BrowserEvaluator(test, scan_dir=True, prefs=prefs).fingerprint()
+    prefs.write_text("pref_b")
+    assert (
+        fingerprint != BrowserEvaluator(test, scan_dir=True, prefs=prefs).fingerprint()
+    )
+
+
+def test_browser_evaluator_launch_fingerprint(tmp_path):
+    """Test that the launch fingerprint covers prefs but not the testcase."""
+    prefs = tmp_path / "prefs.js"
+    prefs.write_text("pref_a")
+    fingerprint = BrowserEvaluator(
+        tmp_path / "a.html", prefs=prefs
+    ).launch_fingerprint()
+
+    assert (
+        fingerprint
+        == BrowserEvaluator(
+            tmp_path / "b.html", prefs=prefs, repeat=10
+        ).launch_fingerprint()
+    )
+    prefs.write_text("pref_b")
+    assert (
+        fingerprint
+        != BrowserEvaluator(tmp_path / "a.html", prefs=prefs).launch_fingerprint()
+    )
+
+
 @pytest.mark.parametrize("scan_dir", (True, False))
 def test_evaluate_testcase_simple(mocker, tmp_path, scan_dir):
     """Test that evaluate_testcase works correctly and passes scan_dir to launch."""
@@ -56,6 +96,27 @@ def test_evaluate_testcase_simple(mocker, tmp_path, scan_dir):
     assert second_call_kwargs.get("scan_dir") == scan_dir
 
 
+def test_reproduction_rate(mocker, tmp_path):
+    """Test that the build is verified once and launched once per run."""
+    mock_launch = mocker.patch(
+        "autobisect.BrowserEvaluator.launch",
+        side_effect=[
+            EvaluatorResult.BUILD_PASSED,
+            EvaluatorResult.BUILD_CRASHED,
+            EvaluatorResult.BUILD_FAILED,
+            EvaluatorResult.BUILD_PASSED,
+        ],
+    )
+    browser = BrowserEvaluator(Path("testcase.html"), repeat=10)
+    binary_name = "firefox.exe" if system() == "Windows" else "firefox"
+    (tmp_path / binary_name).touch()
+
+    assert browser.reproduction_rate(tmp_path, 3) == (1, 2)
+    assert mock_launch.call_args_list[0][1].get("verify")
+    assert all(call[1]["repeat"] == 1 for call in mock_launch.call_args_list[1:])
+    assert browser.repeat == 10
+
+
 def test_evaluate_testcase_non_existent_binary(tmp_path):
     """Test that the binary path is calculated as "firefox.exe" on windows."""
     browser = BrowserEvaluator(Path("testcase.html"))
@@ -187,7 +248,9 @@ def test_grizzly_arg_parsing(
         pernosco=pernosco,
         repeat=10,
     )
-    evaluator.parse_args(binary, tmp_path, verify=False)
+    args = evaluator.parse_args(binary, tmp_path, verify=False)
+    assert args.repeat == 10
+    assert evaluator.parse_args(binary, tmp_path, repeat=1).repeat == 1
 
     # Verify scan_dir attribute is set correctly
     assert evaluator.scan_dir == scan_dir
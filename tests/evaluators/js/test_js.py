@@ -2,14 +2,17 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 # pylint: disable=protected-access
+import os
+import sys
 from pathlib import Path
 from platform import system
 
 import pytest
-from lithium.interestingness.timed_run import ExitStatus, RunData
+from lithium.interestingness.timed_run import ExitStatus, RunData, timed_run
 
 from autobisect.evaluators.base import EvaluatorResult
 from autobisect.evaluators.js import _get_rev, JSEvaluator, JSEvaluatorException
+from autobisect.evaluators.js.js import INTERESTINGNESS_TIMEOUT, _working_directory
 
 
 def test_get_rev_with_valid_fuzzmanagerconf(tmp_path):
@@ -21,6 +24,32 @@ def test_get_rev_with_valid_fuzzmanagerconf(tmp_path):
     assert _get_rev(binary_path) == "3096b15a785a"
 
 
+@pytest.mark.skipif(system() == "Windows", reason="Unsupported on Windows")
+def test_working_directory(tmp_path):
+    """Test that only launched commands run in the supplied directory."""
+    script = "import os; print(os.getcwd(), os.environ['AUTOBISECT_TEST'], end='')"
+    env = dict(os.environ, AUTOBISECT_TEST="value")
+    with _working_directory(tmp_path) as preexec_fn:
+        result = timed_run(
+            [sys.executable, "-c", script], 10, env=env, preexec_fn=preexec_fn
+        )
+
+    assert result.status == ExitStatus.NORMAL
+    assert result.out == f"{tmp_path} value".encode()
+    assert os.getcwd() != str(tmp_path)
+    assert "AUTOBISECT_TEST" not in os.environ
+
+
+def test_working_directory_windows(mocker, tmp_path):
+    """Test that the working directory is changed process wide on Windows."""
+    mocker.patch("autobisect.evaluators.js.js.system", return_value="Windows")
+    previous = os.getcwd()
+    with _working_directory(tmp_path) as preexec_fn:
+        assert preexec_fn is None
+        assert Path.cwd() == tmp_path.resolve()
+    assert os.getcwd() == previous
+
+
 def test_get_rev_with_missing_fuzzmanagerconf(tmp_path):
     """Test that _get_rev returns tip when it cannot find the product_version."""
     binary_path = tmp_path / "test_binary.exe"
@@ -41,6 +70,37 @@ def test_js_evaluator_init(tmp_path):
     assert evaluator.detect == "crash"
 
 
+def test_js_evaluator_fingerprint(tmp_path):
+    """Test that the fingerprint depends on the testcase and detection settings."""
+    test = tmp_path / "testcase.js"
+    test.write_text("foo()")
+    fingerprint = JSEvaluator(test, flags=["--x"]).fingerprint()
+
+    assert fingerprint == JSEvaluator(test, flags=["--x"]).fingerprint()
+    assert fingerprint != JSEvaluator(test, flags=["--y"]).fingerprint()
+    assert fingerprint != JSEvaluator(test, flags=["--x"], repeat=5).fingerprint()
+    test.write_text("bar()")
+    assert fingerprint != JSEvaluator(test, flags=["--x"]).fingerprint()
+    assert JSEvaluator(tmp_path / "missing.js").fingerprint() is None
+
+
+def test_js_evaluator_launch_fingerprint(tmp_path):
+    """Test that the launch fingerprint only depends on the launch settings."""
+    fingerprint = JSEvaluator(tmp_path / "a.js", flags=["--x"]).launch_fingerprint()
+
+    assert (
+        fingerprint
+        == JSEvaluator(
+            tmp_path / "b.js", flags=["--x"], repeat=5, detect="hang"
+        ).launch_fingerprint()
+    )
+    assert fingerprint != JSEvaluator(tmp_path / "a.js").launch_fingerprint()
+    assert (
+        fingerprint
+        != JSEvaluator(tmp_path / "a.js", flags=["--x"], timeout=5).launch_fingerprint()
+    )
+
+
 def test_js_evaluator_init_diff_mode(tmp_path):
     """Test initialization of diff mode."""
     test = tmp_path / "testcase.js"
@@ -312,26 +372,33 @@ def test_js_evaluator_evaluate_testcase(mocker, tmp_path, mode, ext_args, verifi
     mock_run_data.status = ExitStatus.NORMAL
     if mode == "diff":
         type(mock_run_data).return_code = mocker.PropertyMock(side_effect=[1, 2])
-        patch_path = "lithium.interestingness.diff_test.timed_run"
     elif mode == "hang":
         mock_run_data.status = ExitStatus.TIMEOUT
-        patch_path = "lithium.interestingness.hangs.timed_run"
     elif mode == "output":
         mock_run_data.err = b""
         mock_run_data.out = b"magic string"
-        patch_path = "lithium.interestingness.outputs.timed_run"
     else:
         mock_run_data.err = b""
         mock_run_data.status = ExitStatus.CRASH
-        patch_path = "lithium.interestingness.timed_run.timed_run"
 
-    mocker.patch(patch_path, return_value=mock_run_data)
+    run = mocker.patch(
+        "autobisect.evaluators.js.js.timed_run.timed_run", return_value=mock_run_data
+    )
 
     result = evaluator.evaluate_testcase(tmp_path)
     if not verified:
         assert result == EvaluatorResult.BUILD_FAILED
     else:
         assert result == EvaluatorResult.BUILD_CRASHED
+        # Crashes keep the configured timeout, other modes use lithium's default
+        timeout = evaluator.timeout if mode == "crash" else INTERESTINGNESS_TIMEOUT
+        assert run.call_args.args[1] == timeout == (60 if mode == "crash" else 120)
+        # The libraries and testcase directory are passed to the shell only
+        env = run.call_args.kwargs["env"]
+        assert env["LD_LIBRARY_PATH"] == str(tmp_path / "dist" / "bin")
+        if system() != "Windows":
+            preexec_fn = run.call_args.kwargs["preexec_fn"]
+            assert preexec_fn.args == (tmp_path.resolve(),)
 
 
 def test_js_evaluator_evaluate_testcase_invalid_binary(tmp_path):
@@ -341,3 +408,24 @@ def test_js_evaluator_evaluate_testcase_invalid_binary(tmp_path):
     evaluator = JSEvaluator(test, detect="crash")
 
     assert evaluator.evaluate_testcase(binary) == EvaluatorResult.BUILD_FAILED
+
+
+def test_js_evaluator_reproduction_rate(mocker, tmp_path):
+    """Test that the reproduction rate is measured using single launches."""
+    evaluator = JSEvaluator(tmp_path / "testcase.js", repeat=5)
+    prepare = mocker.patch.object(
+        evaluator, "_prepare", return_value=(tmp_path / "js", [])
+    )
+    launch = mocker.patch.object(
+        evaluator, "launch", side_effect=[True, False, False, True]
+    )
+
+    assert evaluator.reproduction_rate(tmp_path, 4) == (2, 4)
+    assert prepare.call_count == 1
+    assert all(call.args[2] == 1 for call in launch.call_args_list)
+    assert evaluator.repeat == 5
+
+    # Builds failing verification don't launch at all
+    prepare.return_value = None
+    assert evaluator.reproduction_rate(tmp_path, 4) == (0, 0)
+    assert launch.call_count == 4
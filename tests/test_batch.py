@@ -0,0 +1,168 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+# pylint: disable=protected-access
+from datetime import datetime, timedelta, timezone
+
+from fuzzfetch import BuildFlags, Platform
+
+from autobisect import EvaluatorResult
+from autobisect.batch import MultiBisector
+from autobisect.bisect import BisectionResult
+from autobisect.build_manager import BuildManagerException
+from autobisect.builds import BuildDescriptor, BuildRange
+from autobisect.index import BuildIndex
+
+from .test_bisect import MockBisector, MockFetcher
+
+
+def create_bisector(mocker, first_bad):
+    """Create a bisector whose testcase crashes from the supplied build onward."""
+
+    def evaluate(build, _path):
+        if build.changeset == "start":
+            return EvaluatorResult.BUILD_PASSED
+        if build.changeset == "end" or int(build.changeset) >= first_bad:
+            return EvaluatorResult.BUILD_CRASHED
+        return EvaluatorResult.BUILD_PASSED
+
+    bisector = MockBisector(datetime.now(), datetime.now())
+    bisector.start = MockFetcher(changeset="start")
+    bisector.end = MockFetcher(changeset="end")
+    bisector.build_manager = mocker.MagicMock()
+    mocker.patch.object(bisector, "evaluate", side_effect=evaluate)
+    mocker.patch.object(bisector, "_find", side_effect=lambda b: b)
+    mocker.patch.object(bisector, "_plan", side_effect=lambda phases: phases)
+    return bisector
+
+
+def test_multi_bisector_select():
+    """Test that the build wanted by most searches is selected"""
+    builds = [MockFetcher(changeset=str(i)) for i in range(10)]
+    searches = [MockBisector(datetime.now(), datetime.now()) for _ in range(3)]
+    ranges = {
+        searches[0]: BuildRange(builds[:3]),
+        searches[1]: BuildRange(builds[:]),
+        searches[2]: BuildRange(builds[2:9]),
+    }
+
+    entry, interested = MultiBisector.select(ranges)
+
+    assert entry == builds[5]
+    assert interested == searches[1:]
+
+
+def test_multi_bisector_bisect(mocker):
+    """Test that every testcase is bisected while sharing extracted builds"""
+    builds = [MockFetcher(changeset=str(i)) for i in range(16)]
+    thresholds = [5, 6, 12]
+    bisectors = [create_bisector(mocker, t) for t in thresholds]
+    for bisector in bisectors:
+        mocker.patch.object(
+            bisector,
+            "strategies",
+            return_value={"daily": lambda: BuildRange(builds[:])},
+        )
+
+    multi = MultiBisector(bisectors)
+    results = multi.bisect()
+
+    for result, threshold in zip(results, thresholds):
+        assert result.status == BisectionResult.SUCCESS
+        assert result.start == builds[threshold - 1]
+        assert result.end == builds[threshold]
+    assert multi.extractions < multi.evaluations
+    assert bisectors[0].build_manager.get_build.call_count == multi.extractions
+
+
+def test_multi_bisector_verification_failure(mocker):
+    """Test that testcases with invalid boundaries don't stop the others"""
+    builds = [MockFetcher(changeset=str(i)) for i in range(4)]
+    bisectors = [create_bisector(mocker, 2), create_bisector(mocker, 0)]
+    bisectors[1].evaluate.side_effect = lambda *_: EvaluatorResult.BUILD_CRASHED
+    for bisector in bisectors:
+        mocker.patch.object(
+            bisector,
+            "strategies",
+            return_value={"daily": lambda: BuildRange(builds[:])},
+        )
+
+    results = MultiBisector(bisectors).bisect()
+
+    assert results[0].status == BisectionResult.SUCCESS
+    assert results[0].end == builds[2]
+    assert results[1].status == BisectionResult.FAILED
+    assert results[1].message == "Testcase reproduces on start build!"
+
+
+def test_multi_bisector_evaluate_failed_build(mocker):
+    """Test that a build which can't be extracted fails for every testcase"""
+    bisectors = [create_bisector(mocker, 1) for _ in range(2)]
+    bisectors[0].build_manager.get_build.side_effect = BuildManagerException()
+
+    results = MultiBisector(bisectors).evaluate(MockFetcher(changeset="1"), bisectors)
+
+    assert set(results.values()) == {EvaluatorResult.BUILD_FAILED}
+    assert bisectors[0].evaluate.call_count == 0
+
+
+def test_multi_bisector_evaluate_known_broken(mocker, tmp_path):
+    """Test that recorded launch failures only apply to the matching testcases"""
+    bisectors = [create_bisector(mocker, 1) for _ in range(2)]
+    index = BuildIndex(tmp_path / "index.db")
+    for bisector, fingerprint in zip(bisectors, ("a", "b")):
+        bisector.index = index
+        bisector._launch_fingerprint = fingerprint
+    build = MockFetcher(changeset="1")
+    build._branch = "central"
+    build._flags = BuildFlags()
+    build._platform = Platform("Linux", "x86_64")
+    index.mark_broken(build, bisectors[0].evaluator.target, "a")
+
+    multi = MultiBisector(bisectors)
+    results = multi.evaluate(build, bisectors)
+    assert results[bisectors[0]] == EvaluatorResult.BUILD_FAILED
+    assert results[bisectors[1]] == EvaluatorResult.BUILD_CRASHED
+    assert bisectors[0].evaluate.call_count == 0
+
+    # Boundaries are launched regardless
+    results = multi.evaluate(build, bisectors, boundary="end")
+    assert results[bisectors[0]] == EvaluatorResult.BUILD_CRASHED
+    assert bisectors[0].evaluate.call_count == 1
+
+
+def test_multi_bisector_bounds_per_search(mocker):
+    """Test that builds are only evaluated by searches whose boundaries contain them"""
+    start = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+    bisectors = [
+        MockBisector(start, start + timedelta(hours=hours)) for hours in (4, 2)
+    ]
+    tested = {bisector: [] for bisector in bisectors}
+    for bisector in bisectors:
+        bisector.build_manager = mocker.MagicMock()
+        mocker.patch.object(
+            bisector,
+            "_lookup",
+            side_effect=lambda entry: MockFetcher(
+                start + timedelta(hours=int(entry.identifier)),
+                f"{entry.identifier:0>40}",
+            ),
+        )
+        mocker.patch.object(
+            bisector,
+            "evaluate",
+            side_effect=lambda build, _path, b=bisector: tested[b].append(build)
+            or EvaluatorResult.BUILD_FAILED,
+        )
+    entries = [
+        BuildDescriptor("autoland", BuildDescriptor.TASK, f"{i}") for i in range(1, 4)
+    ]
+
+    MultiBisector(bisectors)._bisect_phase(
+        {bisector: BuildRange(entries[:]) for bisector in bisectors}
+    )
+
+    assert sorted(b.datetime.hour for b in tested[bisectors[0]]) == [13, 14, 15]
+    assert [b.datetime.hour for b in tested[bisectors[1]]] == [13]
+    assert bisectors[0]._out_of_range == set()
+    assert bisectors[1]._out_of_range == set(entries[1:])
@@ -3,20 +3,26 @@
 # You can obtain one at http://mozilla.org/MPL/2.0/.
 # pylint: disable=protected-access
 import re
+import threading
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 import pytest
-from fuzzfetch import BuildFlags, Fetcher, Platform
+from fuzzfetch import BuildFlags, BuildTask, Fetcher, FetcherException, Platform
 
-from autobisect import EvaluatorResult, BrowserEvaluator
+from autobisect import EvaluatorResult, BrowserEvaluator, metrics
+from autobisect.build_manager import BuildManager
 from autobisect.bisect import (
     Bisector,
     StatusException,
     VerificationStatus,
-    get_autoland_range,
 )
-from autobisect.builds import BuildRange
+from autobisect.builds import BuildDescriptor, BuildRange
+from autobisect.journal import BisectionJournal
+from autobisect.pipeline import ProbePipeline
+from autobisect.planner import StrategyPlanner
+from autobisect.results import ResultCache
+from autobisect.timeline import Push
 
 
 class MockFetcher:
@@ -25,6 +31,11 @@ class MockFetcher:
     def __init__(self, dt=None, changeset=None):
         self.datetime = dt
         self.changeset = changeset
+        self.rank = int(dt.timestamp()) if dt else 0
+        self.id = changeset
+        self.build_info = {"moz_source_repo": "https://hg.mozilla.org/mozilla-central"}
+        self._branch = "central"
+        self._task = BuildTask("url", "queue", {"taskId": changeset, "rank": self.rank})
 
 
 class MockBisector(Bisector):
@@ -39,6 +50,29 @@ class MockBisector(Bisector):
         self.flags = BuildFlags()
         self.platform = Platform("Linux", "x86_64")
         self.evaluator = BrowserEvaluator(Path("testcase.html"))
+        self.jobs = 1
+        self.probabilistic = False
+        self.adaptive_repeat = False
+        self.pivot_window = 0
+        self.planner = StrategyPlanner()
+        self._pushes = {}
+        self._evaluation_times = []
+        self._evaluation_slots = threading.Semaphore(1)
+        self._suspects = {}
+        self._out_of_range = set()
+        self.skip_broken = True
+        self.confidence = 0.95
+        self.prefetch = False
+        self._pipeline = None
+        self._prefetch_hits = 0
+        self._prefetch_misses = 0
+        self.results = None
+        self._fingerprint = None
+        self._launch_fingerprint = None
+        self.journal = None
+        self.index = None
+        self._verified = False
+        self._ranges = {}
 
 
 @pytest.mark.freeze_time("2024-05-30")
@@ -52,7 +86,8 @@ def test_bisect_get_daily_builds_simple(delta, expected):
     builds = bisector._get_daily_builds()
 
     assert isinstance(builds, BuildRange)
-    assert all(re.match(r"\d{4}-\d{2}-\d{2}", b) is not None for b in builds)
+    assert all(isinstance(b, BuildDescriptor) for b in builds)
+    assert all(re.match(r"\d{4}-\d{2}-\d{2}", b.identifier) for b in builds)
     assert len(builds) == expected
 
 
@@ -69,14 +104,15 @@ def test_bisect_get_pushdate_builds_simple():
     assert len(builds) == 2
     assert isinstance(builds, BuildRange)
     for build in builds:
-        assert isinstance(build, Fetcher)
+        assert isinstance(build, BuildDescriptor)
+        assert build.kind == BuildDescriptor.TASK
 
 
 @pytest.mark.freeze_time("2024-05-30")
 @pytest.mark.vcr()
 @pytest.mark.skip(reason="Cassette is too large")
-def test_bisect_get_autoland_builds_simple(browser_evaluator, opt_flags, platform):
-    """Test that get_autoland_builds returns the expected build range."""
+def test_bisect_get_timeline_builds_simple(browser_evaluator, opt_flags, platform):
+    """Test that get_timeline_builds returns the expected build range."""
     start = "abdb14987e23f88107f437b130d0817eea873199"
     end = "b05a24f158503b7ea175520ef383fa005a4c41b7"
     bisector = Bisector(
@@ -87,30 +123,108 @@ def test_bisect_get_autoland_builds_simple(browser_evaluator, opt_flags, platfor
         opt_flags,
         platform,
     )
-    builds = bisector._get_autoland_builds()
-    repo_url = "https://hg.mozilla.org/integration/autoland"
+    builds = bisector._get_timeline_builds()
 
     assert isinstance(builds, BuildRange)
-    assert len(builds) == 10
-    assert all(b.build_info["moz_source_repo"] == repo_url for b in builds)
+    assert len(builds) == 34
+    assert builds[-1].branch == "central"
+
+
+def test_bisect_get_timeline_builds_lazy(mocker):
+    """Test that timeline builds are not resolved while enumerating."""
+    changesets = [f"{i:040x}" for i in range(6)]
+    pushes = [
+        Push(1, datetime.now(), changesets[:3]),
+        Push(2, datetime.now(), changesets[3:]),
+    ]
+    mocker.patch("autobisect.bisect.get_pushes", return_value=pushes)
+    fetcher = mocker.patch("autobisect.builds.Fetcher")
+    bisector = MockBisector(datetime.now(), datetime.now())
+    bisector.start.changeset = "a" * 40
+    bisector.end.changeset = changesets[-1]
 
+    builds = bisector._get_timeline_builds()
 
-@pytest.mark.vcr()
-def test_get_autoland_range_simple():
-    """Test that get_autoland_range returns a list of changesets."""
-    start = "abdb14987e23f88107f437b130d0817eea873199"
-    end = "b05a24f158503b7ea175520ef383fa005a4c41b7"
-    changesets = get_autoland_range(start, end)
+    assert [b.changeset for b in builds] == changesets[:-1]
+    assert [b.branch for b in builds] == ["autoland"] * 2 + ["central"] + [
+        "autoland"
+    ] * 2
+    assert fetcher.call_count == 0
 
-    assert isinstance(changesets, list)
-    assert len(changesets) == 35
-    assert all(isinstance(c, str) and len(c) == 40 for c in changesets)
+
+def test_build_iterator_missing_builds(mocker, caplog):
+    """Test that unresolvable builds are dropped and reported once."""
+    builds = [BuildDescriptor.from_changeset("autoland", f"{i:040x}") for i in range(6)]
+
+    def fetcher(_branch, changeset, *_args, **_kwargs):
+        if int(changeset, 16) % 2:
+            raise FetcherException("missing")
+        return MockFetcher(changeset=changeset)
+
+    mocker.patch("autobisect.builds.Fetcher", side_effect=fetcher)
+    bisector = MockBisector(datetime.now(), datetime.now())
+    generator = bisector.build_iterator(BuildRange(builds[:]), False)
+    tested = []
+    try:
+        tested.append(next(generator))
+        while True:
+            tested.append(generator.send(EvaluatorResult.BUILD_FAILED))
+    except StopIteration:
+        pass
+
+    assert sorted(b.changeset for b in tested) == [b.changeset for b in builds[::2]]
+    warnings = [r for r in caplog.records if "Unable to find builds" in r.message]
+    assert len(warnings) == 1
+    assert "3 entries" in warnings[0].message
+
+
+def test_build_iterator_out_of_range_builds(mocker, caplog):
+    """Test that pushdate builds outside of the boundaries aren't reported missing"""
+    start = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+    bisector = MockBisector(start, start + timedelta(hours=4))
+    builds = [
+        BuildDescriptor("autoland", BuildDescriptor.TASK, f"{i}") for i in range(6)
+    ]
+    mocker.patch.object(
+        bisector,
+        "_lookup",
+        side_effect=lambda entry: MockFetcher(
+            start + timedelta(hours=int(entry.identifier)), f"{entry.identifier:0>40}"
+        ),
+    )
+    generator = bisector.build_iterator(BuildRange(builds[:]), False)
+    tested = []
+    try:
+        tested.append(next(generator))
+        while True:
+            tested.append(generator.send(EvaluatorResult.BUILD_FAILED))
+    except StopIteration:
+        pass
+
+    assert sorted(b.datetime.hour for b in tested) == [13, 14, 15]
+    assert not [r for r in caplog.records if "Unable to find builds" in r.message]
 
 
 @pytest.mark.vcr()
-def test_get_autoland_range_invalid_revs():
-    """Test that get_autoland_range returns None when using invalid revisions."""
-    assert get_autoland_range("foo", "bar") is None
+@pytest.mark.parametrize(
+    "days, pushes, expected",
+    [
+        (20, None, ["daily", "timeline"]),
+        (1, [["a"], ["b", "c"]], ["timeline"]),
+        (1, [["a", "b", "c"]], ["timeline"]),
+        (3, [["a", "b"]] * 8 + [["c"] * 5], ["timeline"]),
+    ],
+)
+def test_bisect_plan(mocker, days, pushes, expected):
+    """Test that phases which can't reduce the range are skipped."""
+    if pushes is not None:
+        pushes = [Push(i, datetime.now(), c) for i, c in enumerate(pushes)]
+    get_pushes = mocker.patch("autobisect.bisect.get_pushes", return_value=pushes)
+    end = datetime(2024, 1, 20, 12)
+    bisector = MockBisector(end - timedelta(days=days), end)
+
+    assert bisector._plan(["daily", "timeline"]) == expected
+    assert get_pushes.call_count == int(pushes is not None)
 
 
 @pytest.mark.parametrize("status", EvaluatorResult)
@@ -148,8 +262,9 @@ def test_verify_bounds_simple(mocker, start_result, end_result, find_fix):
     bisector = MockBisector(datetime.now(), datetime.now())
     bisector.find_fix = find_fix
 
-    mocker.patch(
-        "autobisect.bisect.Bisector.test_build", side_effect=[start_result, end_result]
+    results = {bisector.start: start_result, bisector.end: end_result}
+    mocker.patch.object(
+        bisector, "test_build", side_effect=lambda build, _cancel, **_: results[build]
     )
     result = bisector.verify_bounds()
 
@@ -169,6 +284,97 @@ def test_verify_bounds_simple(mocker, start_result, end_result, find_fix):
         assert result == VerificationStatus.SUCCESS
 
 
+@pytest.mark.parametrize(
+    "crashes, completed, expected, repeat",
+    [
+        (10, 10, EvaluatorResult.BUILD_CRASHED, 2),
+        (3, 10, EvaluatorResult.BUILD_CRASHED, 10),
+        (0, 10, EvaluatorResult.BUILD_PASSED, 10),
+        (0, 0, EvaluatorResult.BUILD_FAILED, 10),
+    ],
+)
+def test_measure_reproduction(mocker, tmp_path, crashes, completed, expected, repeat):
+    """Test that the reproduction rate determines the number of repeats."""
+    bisector = MockBisector(datetime.now(), datetime.now())
+    bisector.evaluator = BrowserEvaluator(tmp_path / "testcase.html")
+    bisector.evaluator.testcase.touch()
+    bisector.build_manager = mocker.MagicMock()
+    bisector.evaluator.repeat = 10
+    mocker.patch.object(
+        bisector.evaluator, "reproduction_rate", return_value=(crashes, completed)
+    )
+
+    bisector._fingerprint = bisector.evaluator.fingerprint()
+    fingerprint = bisector._fingerprint
+
+    assert bisector.measure_reproduction(MockFetcher(changeset="a")) == expected
+    assert bisector.evaluator.repeat == repeat
+    # Results are stored under the number of repeats used to obtain them
+    assert bisector._fingerprint == bisector.evaluator.fingerprint()
+    assert (bisector._fingerprint == fingerprint) == (repeat == 10)
+
+
+@pytest.mark.parametrize("find_fix", [True, False])
+def test_verify_bounds_adaptive_repeat(mocker, find_fix):
+    """Test that the reproduction rate is measured on the crashing boundary."""
+    bisector = MockBisector(datetime.now(), datetime.now())
+    bisector.find_fix = find_fix
+    bisector.adaptive_repeat = True
+    measure = mocker.patch.object(
+        bisector, "measure_reproduction", return_value=EvaluatorResult.BUILD_CRASHED
+    )
+    test_build = mocker.patch.object(
+        bisector, "test_build", return_value=EvaluatorResult.BUILD_PASSED
+    )
+
+    assert bisector.verify_bounds() == VerificationStatus.SUCCESS
+    crashing, passing = bisector.start, bisector.end
+    if not find_fix:
+        crashing, passing = passing, crashing
+    assert measure.call_args.args[0] is crashing
+    assert test_build.call_args.args[0] is passing
+
+
+def test_verify_bounds_sequential(mocker):
+    """Test that boundaries sharing evaluator state are verified one at a time."""
+    bisector = MockBisector(datetime.now(), datetime.now())
+    bisector.adaptive_repeat = True
+    mocker.patch.object(
+        bisector, "measure_reproduction", return_value=EvaluatorResult.BUILD_CRASHED
+    )
+    executor = mocker.patch("autobisect.bisect.ThreadPoolExecutor")
+    test_build = mocker.patch.object(
+        bisector, "test_build", return_value=EvaluatorResult.BUILD_CRASHED
+    )
+
+    # The end boundary isn't evaluated once the start boundary fails
+    assert bisector.verify_bounds() == VerificationStatus.START_BUILD_CRASHES
+    assert test_build.call_count == 1
+    executor.assert_not_called()
+
+
+def test_verify_bounds_cancel(mocker):
+    """Test that the other boundary is abandoned once one fails verification."""
+    bisector = MockBisector(datetime.now(), datetime.now())
+    bisector.build_manager = mocker.MagicMock()
+    start_evaluated = threading.Event()
+
+    def evaluate(build, cancel, verify=False):
+        if build is bisector.start:
+            start_evaluated.set()
+            return EvaluatorResult.BUILD_CRASHED
+        start_evaluated.wait()
+        assert cancel.wait(5)
+        return Bisector.test_build(bisector, build, cancel, verify)
+
+    mocker.patch.object(bisector, "test_build", side_effect=evaluate)
+    testcase = mocker.patch.object(bisector.evaluator, "evaluate_testcase")
+
+    assert bisector.verify_bounds() == VerificationStatus.START_BUILD_CRASHES
+    assert bisector.build_manager.get_build.call_count == 1
+    testcase.assert_not_called()
+
+
 @pytest.mark.parametrize(
     "test_results",
     [[EvaluatorResult.BUILD_PASSED, None], [None, EvaluatorResult.BUILD_CRASHED]],
@@ -203,6 +409,289 @@ def test_build_iterator_random(mocker):
     assert spy.call_count == 3
 
 
+@pytest.mark.parametrize("jobs", [2, 3, 7])
+@pytest.mark.parametrize("find_fix", [True, False])
+def test_parallel_bisect(mocker, jobs, find_fix):
+    """Test that parallel_bisect converges on the same boundaries as bisection."""
+    builds = [MockFetcher(changeset=str(i)) for i in range(40)]
+    bad = builds[27]
+
+    def evaluate(build, _cancel=None):
+        crashes = int(build.changeset) >= int(bad.changeset)
+        if find_fix:
+            crashes = not crashes
+        return (
+            EvaluatorResult.BUILD_CRASHED if crashes else EvaluatorResult.BUILD_PASSED
+        )
+
+    bisector = MockBisector(datetime.now(), datetime.now())
+    bisector.find_fix = find_fix
+    bisector.jobs = jobs
+    mocker.patch.object(bisector, "_resolve", side_effect=lambda b: b)
+    mocker.patch.object(bisector, "test_build", side_effect=evaluate)
+    bisector.parallel_bisect(BuildRange(builds[:]))
+
+    assert bisector.start == builds[26]
+    assert bisector.end == bad
+
+
+def test_parallel_bisect_removes_failed_builds(mocker):
+    """Test that builds which fail to launch are dropped from the range."""
+    builds = [MockFetcher(changeset=str(i)) for i in range(10)]
+
+    def evaluate(build, _cancel=None):
+        if build.changeset in ("4", "5"):
+            return EvaluatorResult.BUILD_FAILED
+        if int(build.changeset) >= 5:
+            return EvaluatorResult.BUILD_CRASHED
+        return EvaluatorResult.BUILD_PASSED
+
+    bisector = MockBisector(datetime.now(), datetime.now())
+    bisector.jobs = 2
+    mocker.patch.object(bisector, "_resolve", side_effect=lambda b: b)
+    mocker.patch.object(bisector, "test_build", side_effect=evaluate)
+    bisector.parallel_bisect(BuildRange(builds[:]))
+
+    assert bisector.start == builds[3]
+    assert bisector.end == builds[6]
+
+
+@pytest.mark.parametrize("find_fix", [True, False])
+def test_probabilistic_iterator(mocker, find_fix):
+    """Test that probabilistic bisection tolerates intermittent crashes."""
+    builds = [MockFetcher(changeset=str(i)) for i in range(30)]
+    results = iter([True, False] * 200)
+    runs = []
+
+    def evaluate(build):
+        runs.append(build)
+        crashes = int(build.changeset) >= 17
+        if find_fix:
+            crashes = not crashes
+        # Crashing builds only reproduce every other run
+        if crashes and next(results):
+            return EvaluatorResult.BUILD_CRASHED
+        return EvaluatorResult.BUILD_PASSED
+
+    bisector = MockBisector(datetime.now(), datetime.now())
+    bisector.find_fix = find_fix
+    bisector.probabilistic = True
+    bisector.confidence = 0.99
+    bisector.sensitivity = 0.5
+    mocker.patch.object(bisector, "_resolve", side_effect=lambda b: b)
+    generator = bisector.probabilistic_iterator(BuildRange(builds[:]))
+    try:
+        build = next(generator)
+        while True:
+            build = generator.send(evaluate(build))
+    except StopIteration:
+        pass
+
+    assert bisector.start == builds[16]
+    assert bisector.end == builds[17]
+    assert len(runs) < 60
+
+
+@pytest.mark.parametrize("cached, expected", [(None, 10), (9, 9), (2, 10)])
+def test_select_pivot(config_fixture, cached, expected):
+    """Test that cached builds near the midpoint are preferred."""
+    builds = [
+        BuildDescriptor.from_changeset("autoland", f"{i:02}" * 20) for i in range(20)
+    ]
+    bisector = MockBisector(datetime.now(), datetime.now())
+    bisector.build_manager = BuildManager(config_fixture)
+    bisector.pivot_window = 0.1
+    if cached is not None:
+        bisector.build_manager.changeset_path(
+            "autoland",
+            builds[cached].changeset,
+            bisector.flags,
+            bisector.platform,
+            "firefox",
+        ).mkdir()
+
+    assert bisector._select_pivot(BuildRange(builds)) == builds[expected]
+
+
+def test_select_pivot_avoids_broken():
+    """Test that probes move away from the neighbours of a build failing to launch."""
+    builds = [
+        BuildDescriptor.from_changeset("autoland", f"{i:02}" * 20) for i in range(20)
+    ]
+    bisector = MockBisector(datetime.now(), datetime.now())
+    build_range = bisector.update_range(
+        EvaluatorResult.BUILD_FAILED, builds[10], 10, BuildRange(builds)
+    )
+
+    assert bisector._suspects[builds[9]] == 0.5
+    assert builds[15] not in bisector._suspects
+    assert bisector._select_pivot(build_range) == builds[5]
+
+
+def test_build_iterator_prefetch(mocker):
+    """Test that both candidates for the next probe are prefetched."""
+    builds = BuildRange([MockFetcher(changeset=str(i)) for i in range(7)])
+    bisector = MockBisector(datetime.now(), datetime.now())
+    bisector.build_manager = mocker.Mock()
+    bisector._pipeline = mocker.Mock(spec=ProbePipeline)
+    bisector._pipeline.resolve.side_effect = lambda b: b
+    bisector._pipeline.fetched.side_effect = [False, True]
+
+    generator = bisector.build_iterator(builds, False)
+    assert next(generator) == builds[3]
+    submitted = [c.args for c in bisector._pipeline.speculate.call_args_list]
+    # Both candidates are downloaded while the following ones are only resolved
+    assert submitted == [
+        (builds[1], 1, True),
+        (builds[5], 1, True),
+        (builds[0], 2, False),
+        (builds[2], 2, False),
+        (builds[4], 2, False),
+        (builds[6], 2, False),
+    ]
+    assert bisector._prefetch_misses == 1
+
+    # The next probe was prefetched
+    assert generator.send(EvaluatorResult.BUILD_PASSED) == builds[5]
+    assert bisector._prefetch_hits == 1
+
+
+def test_test_build_result_cache(mocker, tmp_path):
+    """Test that cached results are reused without downloading the build."""
+    bisector = MockBisector(datetime.now(), datetime.now())
+    bisector.results = ResultCache(tmp_path / "results.db")
+    bisector._fingerprint = "abc"
+    bisector.build_manager = mocker.MagicMock()
+    evaluate = mocker.patch.object(
+        bisector.evaluator,
+        "evaluate_testcase",
+        return_value=EvaluatorResult.BUILD_CRASHED,
+    )
+    build = mocker.Mock(spec=Fetcher, changeset="a" * 40, id="20240101")
+
+    assert bisector.test_build(build) == EvaluatorResult.BUILD_CRASHED
+    assert bisector.test_build(build) == EvaluatorResult.BUILD_CRASHED
+    assert evaluate.call_count == 1
+    assert bisector.build_manager.get_build.call_count == 1
+
+
+def test_test_build_metrics(mocker, monkeypatch, tmp_path):
+    """Test that probes, evaluations and result cache lookups are counted."""
+    monkeypatch.setattr(metrics, "_ENABLED", True)
+    bisector = MockBisector(datetime.now(), datetime.now())
+    bisector.results = ResultCache(tmp_path / "results.db")
+    bisector._fingerprint = "abc"
+    bisector.build_manager = mocker.MagicMock()
+    mocker.patch.object(
+        bisector.evaluator,
+        "evaluate_testcase",
+        return_value=EvaluatorResult.BUILD_CRASHED,
+    )
+    build = mocker.Mock(spec=Fetcher, changeset="a" * 40, id="20240101")
+
+    try:
+        bisector.test_build(build)
+        bisector.test_build(build)
+        assert metrics.PROBES.value(result="build_crashed") == 2
+        assert metrics.EVALUATION_SECONDS.count() == 1
+        assert metrics.CACHE_MISSES.value(cache="result") == 1
+        assert metrics.CACHE_HITS.value(cache="result") == 1
+    finally:
+        metrics.clear()
+
+
+def test_bisect_resume(mocker, tmp_path):
+    """Test that a resumed session continues from the last probe."""
+    builds = [BuildDescriptor.from_changeset("autoland", f"{i:040x}") for i in range(8)]
+
+    def fetcher(_branch, build, *_args, **_kwargs):
+        return MockFetcher(changeset=getattr(build, "taskId", build))
+
+    def evaluate(build, _cancel=None):
+        tested.append(int(build.changeset, 16))
+        if len(tested) == interrupt_at:
+            raise KeyboardInterrupt()
+        if int(build.changeset, 16) >= 5:
+            return EvaluatorResult.BUILD_CRASHED
+        return EvaluatorResult.BUILD_PASSED
+
+    def create(session=None):
+        bisector = MockBisector(datetime.now(), datetime.now())
+        bisector.start = MockFetcher(changeset="start")
+        bisector.end = MockFetcher(changeset="end")
+        bisector.journal = BisectionJournal(tmp_path, session)
+        if session is not None:
+            bisector._restore()
+        mocker.patch.object(bisector, "verify_bounds", return_value=SUCCESS)
+        mocker.patch.object(bisector, "test_build", side_effect=evaluate)
+        mocker.patch.object(
+            bisector, "_get_daily_builds", return_value=BuildRange(builds[:])
+        )
+        mocker.patch.object(bisector, "_get_pushdate_builds", return_value=EMPTY)
+        mocker.patch.object(bisector, "_get_timeline_builds", return_value=EMPTY)
+        mocker.patch.object(bisector, "_plan", side_effect=lambda phases: phases)
+        return bisector
+
+    SUCCESS = VerificationStatus.SUCCESS
+    EMPTY = BuildRange([])
+    mocker.patch("autobisect.builds.Fetcher", side_effect=fetcher)
+    tested = []
+    interrupt_at = 2
+    bisector = create()
+    with pytest.raises(KeyboardInterrupt):
+        bisector.bisect()
+    assert tested == [4, 6]
+
+    tested.clear()
+    interrupt_at = 0
+    resumed = create(bisector.journal.session)
+    resumed.bisect()
+
+    resumed.verify_bounds.assert_not_called()
+    resumed._get_daily_builds.assert_not_called()
+    assert tested == [6, 5]
+    assert resumed.start.changeset == f"{4:040x}"
+    assert resumed.end.changeset == f"{5:040x}"
+
+
+def test_bisect_prefetch(mocker):
+    """Test that builds are downloaded ahead of being probed."""
+    builds = [
+        BuildDescriptor.from_changeset("autoland", f"{i:040x}") for i in range(15)
+    ]
+    resolved = {b: MockFetcher(changeset=b.changeset) for b in builds}
+    bisector = MockBisector(datetime.now(), datetime.now())
+    bisector.prefetch = True
+    bisector.build_manager = mocker.Mock()
+    mocker.patch.object(
+        bisector, "verify_bounds", return_value=VerificationStatus.SUCCESS
+    )
+    mocker.patch.object(
+        bisector, "strategies", return_value={"daily": lambda: BuildRange(builds[:])}
+    )
+    mocker.patch.object(bisector, "_plan", return_value=["daily"])
+    mocker.patch.object(bisector, "_resolve", side_effect=resolved.get)
+    mocker.patch.object(
+        bisector,
+        "test_build",
+        side_effect=lambda build: (
+            EvaluatorResult.BUILD_CRASHED
+            if int(build.changeset, 16) >= 9
+            else EvaluatorResult.BUILD_PASSED
+        ),
+    )
+
+    result = bisector.bisect()
+
+    assert result.status == result.SUCCESS
+    assert bisector.start is resolved[builds[8]]
+    assert bisector.end is resolved[builds[9]]
+    prefetched = [c.args[0] for c in bisector.build_manager.prefetch.call_args_list]
+    assert set(prefetched) <= set(resolved.values())
+    assert bisector._prefetch_hits + bisector._prefetch_misses == 4
+    assert bisector._pipeline is None
+
+
 def test_verification_status_message():
     """Test that VerificationStatus always returns a message."""
     assert len(VerificationStatus) == 7
@@ -2,11 +2,13 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 import sqlite3
+import threading
 from pathlib import Path
 
 import pytest
 from fuzzfetch import Fetcher, BuildFlags, Platform
 
+from autobisect import build_manager
 from autobisect.build_manager import (
     BuildManager,
     DatabaseManager,
@@ -60,15 +62,67 @@ def test_build_manager_init_with_config(config_fixture):
 
 def test_build_manager_build_size(mocker, config_fixture):
     """Simple test of BuildManager.build_size"""
-    # Patch getsize to return a static value of 1MB
-    mocker.patch("os.path.getsize", return_value=1024 * 1024)
+    # Patch the build size to return a static value of 1MB
+    measure = mocker.patch.object(
+        build_manager, "_directory_size", return_value=1024 * 1024
+    )
 
     manager = BuildManager(config_fixture)
     total = 10
     for i in range(total):
         build_dir = Path(manager.build_dir / str(i))
         build_dir.mkdir()
+    assert manager.current_build_size == 0
+
+    manager.update_build_sizes()
     assert manager.current_build_size == 1024 * 1024 * total
+    assert measure.call_count == total
+
+    # Recorded sizes are not measured again and removed builds are forgotten
+    (manager.build_dir / "0").rmdir()
+    manager.update_build_sizes()
+    assert manager.current_build_size == 1024 * 1024 * (total - 1)
+    assert measure.call_count == total
+
+
+def test_build_manager_build_size_downloading(mocker, config_fixture):
+    """Test that builds being downloaded are only measured once complete"""
+    measure = mocker.patch.object(
+        build_manager, "_directory_size", return_value=1024 * 1024
+    )
+    manager = BuildManager(config_fixture)
+    locked = manager.build_dir / "locked"
+    queued = manager.build_dir / "queued"
+    locked.mkdir()
+    queued.mkdir()
+    lock = manager._lock(locked, "download")  # pylint: disable=protected-access
+    assert lock.acquire()
+    manager.db.cur.execute("INSERT INTO download_queue VALUES (?, ?)", (str(queued), 0))
+    manager.db.con.commit()
+
+    manager.update_build_sizes()
+    assert manager.current_build_size == 0
+    assert measure.call_count == 0
+
+    lock.release()
+    manager.db.cur.execute("DELETE FROM download_queue")
+    manager.db.con.commit()
+    manager.update_build_sizes()
+    assert manager.current_build_size == 2 * 1024 * 1024
+
+
+def test_database_manager_adds_size_column(tmp_path):
+    """Test that stores created without build sizes and uses are upgraded"""
+    db_path = tmp_path / "foo.db"
+    con = sqlite3.connect(str(db_path))
+    con.execute("CREATE TABLE builds (build_path TEXT primary key, duration REAL)")
+    con.execute("INSERT INTO builds VALUES ('build', 1.0)")
+    con.commit()
+    con.close()
+
+    db = DatabaseManager(db_path)
+    res = db.cur.execute("SELECT build_path, duration, size, hits FROM builds")
+    assert res.fetchall() == [("build", 1.0, None, 0)]
 
 
 def test_build_manager_enumerate_builds(config_fixture):
@@ -89,8 +143,8 @@ def test_build_manager_enumerate_builds(config_fixture):
 
 def test_build_manager_remove_old_builds(mocker, config_fixture):
     """Simple test of BuildManager.remove_old_builds"""
-    # Patch getsize to return a static value of 1MB
-    mocker.patch("os.path.getsize", return_value=1024 * 1024)
+    # Patch the build size to return a static value of 1MB
+    mocker.patch.object(build_manager, "_directory_size", return_value=1024 * 1024)
 
     # Create 10 mock builds for a total of 10MBs
     manager = BuildManager(config_fixture)
@@ -109,8 +163,8 @@ def test_build_manager_remove_old_builds(mocker, config_fixture):
 
 def test_build_manager_remove_old_builds_in_use(mocker, config_fixture):
     """Test that in_use builds are not removed"""
-    # Patch getsize to return a static value of 1MB
-    mocker.patch("os.path.getsize", return_value=1024 * 1024)
+    # Patch the build size to return a static value of 1MB
+    mocker.patch.object(build_manager, "_directory_size", return_value=1024 * 1024)
 
     manager = BuildManager(config_fixture)
     total = 6
@@ -128,6 +182,27 @@ def test_build_manager_remove_old_builds_in_use(mocker, config_fixture):
     assert manager.build_dir / "firefox_0" not in manager.enumerate_builds()
 
 
+def test_build_manager_remove_old_builds_lru(mocker, config_fixture):
+    """Test that the least recently used builds are removed first"""
+    mocker.patch.object(build_manager, "_directory_size", return_value=1024 * 1024)
+
+    manager = BuildManager(config_fixture)
+    total = 6
+    for i in range(total):
+        build_dir = manager.build_dir / f"firefox_{i}"
+        build_dir.mkdir()
+        # The first build is the most recently used, regardless of its atime
+        manager.db.cur.execute(
+            "INSERT INTO builds (build_path, size, last_used) VALUES (?, ?, ?)",
+            (str(build_dir), 1024 * 1024, 100 if i == 0 else i),
+        )
+    manager.db.con.commit()
+
+    manager.remove_old_builds()
+    remaining = [build.name for build in manager.enumerate_builds()]
+    assert remaining == ["firefox_3", "firefox_4", "firefox_5", "firefox_0"]
+
+
 @pytest.mark.vcr()
 @pytest.mark.parametrize("platform", ["Linux", "Windows"])
 def test_build_manager_get_build(mocker, config_fixture, platform):
@@ -148,3 +223,160 @@ def test_build_manager_get_build(mocker, config_fixture, platform):
     # The build should no longer be marked as in_use
     res = execute("SELECT * FROM in_use WHERE build_path == ?", (str(build),))
     assert res.fetchone() is None
+
+    # The download time and use of the build should be recorded
+    assert manager.download_estimate() is not None
+    res = execute(
+        "SELECT hits, last_used FROM builds WHERE build_path == ?", (str(build),)
+    )
+    hits, last_used = res.fetchone()
+    assert hits == 1
+    assert last_used is not None
+    assert build == manager.changeset_path(
+        "central", fetcher.changeset, flags, Platform(platform), "firefox"
+    )
+
+
+@pytest.mark.parametrize("persist", [True, False])
+def test_build_manager_prefetch(mocker, config_fixture, persist):
+    """Test that prefetch downloads the build only when persistence is enabled"""
+    manager = BuildManager(config_fixture)
+    manager.config.persist = persist
+    get_build = mocker.patch.object(manager, "get_build")
+
+    assert manager.prefetch(mocker.Mock(spec=Fetcher), "firefox") is persist
+    assert get_build.call_count == int(persist)
+
+
+def test_build_manager_wait_for_download(mocker, config_fixture):
+    """Test that waiting for another download doesn't block it from completing"""
+    manager = BuildManager(config_fixture)
+    manager.poll_interval = 0.01
+    path = manager.build_dir / "firefox"
+    mocker.patch.object(manager, "build_path", return_value=path)
+    manager.db.cur.execute("INSERT INTO download_queue VALUES (?, ?)", (str(path), 0))
+    manager.db.con.commit()
+    waiting = threading.Event()
+    mocker.patch.object(
+        build_manager.LOG, "warning", side_effect=lambda *args: waiting.set()
+    )
+
+    def get_build():
+        with manager.get_build(mocker.Mock(spec=Fetcher), "firefox"):
+            pass
+
+    thread = threading.Thread(target=get_build, daemon=True)
+    thread.start()
+    assert waiting.wait(5)
+    manager.db.con.execute("PRAGMA busy_timeout = 100")
+    manager.db.cur.execute("DELETE FROM download_queue")
+    manager.db.con.commit()
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_build_manager_wait_for_download_lock(mocker, config_fixture):
+    """Test that waiting for a download blocks on its lock rather than polling"""
+    manager = BuildManager(config_fixture)
+    path = manager.build_dir / "firefox"
+    mocker.patch.object(manager, "build_path", return_value=path)
+    sleep = mocker.patch.object(build_manager.time, "sleep")
+    waiting = threading.Event()
+    mocker.patch.object(
+        build_manager.LOG, "warning", side_effect=lambda *args: waiting.set()
+    )
+    fetcher = mocker.Mock(spec=Fetcher)
+
+    # Another process is downloading the build
+    lock = manager._lock(path, "download")  # pylint: disable=protected-access
+    assert lock.acquire()
+
+    def get_build():
+        with manager.get_build(fetcher, "firefox"):
+            pass
+
+    thread = threading.Thread(target=get_build, daemon=True)
+    thread.start()
+    assert waiting.wait(5)
+    path.mkdir()
+    lock.release()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert fetcher.extract_build.call_count == 0
+    assert sleep.call_count == 0
+
+
+def test_build_manager_remove_old_builds_skips_busy(mocker, config_fixture):
+    """Test that evictions skip builds in use instead of waiting for them"""
+    mocker.patch.object(build_manager, "_directory_size", return_value=1024 * 1024)
+    sleep = mocker.patch.object(build_manager.time, "sleep")
+
+    manager = BuildManager(config_fixture)
+    for i in range(6):
+        build_dir = manager.build_dir / f"firefox_{i}"
+        build_dir.mkdir()
+        manager.db.cur.execute(
+            "INSERT INTO builds (build_path, size, last_used) VALUES (?, ?, ?)",
+            (str(build_dir), 1024 * 1024, i),
+        )
+    manager.db.con.commit()
+
+    # The least recently used build is in use by another process
+    lock = manager._lock(  # pylint: disable=protected-access
+        manager.build_dir / "firefox_0", "use"
+    )
+    assert lock.acquire(exclusive=False)
+    try:
+        manager.remove_old_builds()
+    finally:
+        lock.release()
+
+    remaining = [build.name for build in manager.enumerate_builds()]
+    assert remaining == ["firefox_0", "firefox_3", "firefox_4", "firefox_5"]
+    assert sleep.call_count == 0
+    # Lock files of evicted builds are removed with them
+    if build_manager.HAVE_FCNTL:
+        assert sorted(p.name for p in manager.lock_dir.iterdir()) == ["firefox_0.use"]
+
+
+@pytest.mark.skipif(not build_manager.HAVE_FCNTL, reason="Requires fcntl")
+def test_build_lock_removed(tmp_path):
+    """Test that waiters on a removed lock file lock the new file instead"""
+    path = tmp_path / "build.use"
+    holder = build_manager.BuildLock(path)
+    waiter = build_manager.BuildLock(path)
+    assert holder.acquire()
+    # The waiter opened the file which is about to be removed
+    assert not waiter.acquire(exclusive=False, blocking=False)
+
+    holder.remove()
+    holder.release()
+    try:
+        assert waiter.acquire(exclusive=False, blocking=False)
+        assert path.exists()
+        # The new file excludes others
+        assert not holder.acquire(blocking=False)
+    finally:
+        waiter.release()
+        holder.release()
+
+
+def test_build_manager_remove_old_builds_all_busy(mocker, config_fixture):
+    """Test that evictions give up when every build is in use"""
+    mocker.patch.object(build_manager, "_directory_size", return_value=1024 * 1024)
+    manager = BuildManager(config_fixture)
+    locks = []
+    for i in range(6):
+        build_dir = manager.build_dir / f"firefox_{i}"
+        build_dir.mkdir()
+        locks.append(
+            manager._lock(build_dir, "use")
+        )  # pylint: disable=protected-access
+        assert locks[-1].acquire(exclusive=False)
+
+    try:
+        manager.remove_old_builds()
+    finally:
+        for lock in locks:
+            lock.release()
+    assert len(manager.enumerate_builds()) == 6
@@ -4,7 +4,9 @@
 import random
 from datetime import datetime, timedelta
 
-from autobisect.builds import BuildRange
+from fuzzfetch import BuildFlags, BuildTask, Platform
+
+from autobisect.builds import BuildDescriptor, BuildRange
 
 
 def test_build_range_basic_operation():
@@ -39,6 +41,15 @@ def test_build_range_mid_point():
         assert BuildRange(list(range(i))).mid_point == mid_point
 
 
+def test_build_range_pivots():
+    """Test that pivots split the range into evenly sized segments"""
+    build_range = BuildRange(list(range(11)))
+    assert build_range.pivots(1) == [build_range.mid_point]
+    assert build_range.pivots(3) == [2, 5, 8]
+    assert BuildRange([0, 1]).pivots(3) == [0, 1]
+    assert not BuildRange([]).pivots(3)
+
+
 def test_build_range_random():
     """Test to ensure random returns element in list"""
     builds = list(range(10))
@@ -65,3 +76,55 @@ def test_build_range_new_classmethod():
     days = random.randint(1, 100)
     build_range = BuildRange.new(datetime.now(), datetime.now() + timedelta(days=days))
     assert len(build_range) == days + 1
+
+
+def test_build_descriptor_equality():
+    """Test that descriptors compare by branch, kind and identifier"""
+    first = BuildDescriptor.from_changeset("autoland", "a" * 40)
+    second = BuildDescriptor.from_changeset("autoland", "a" * 40, datetime.now())
+    assert first == second
+    assert len({first, second}) == 1
+    assert first != BuildDescriptor.from_changeset("central", "a" * 40)
+    assert not hasattr(first, "__dict__")
+
+
+def test_build_descriptor_from_task():
+    """Test that task descriptors keep the task id and rank"""
+    task = BuildTask("url", "queue", {"taskId": "abc", "rank": 1700000000})
+    descriptor = BuildDescriptor.from_task("central", task)
+    assert descriptor.kind == BuildDescriptor.TASK
+    assert descriptor.identifier == "abc"
+    assert descriptor.rank == 1700000000
+    assert descriptor.changeset is None
+
+
+def test_build_descriptor_resolve(mocker):
+    """Test that resolving a descriptor creates the matching Fetcher"""
+    fetcher = mocker.patch("autobisect.builds.Fetcher")
+    descriptor = BuildDescriptor.from_date("central", "2024-01-01")
+    build = descriptor.resolve(BuildFlags(), "firefox", Platform("Linux", "x86_64"))
+    assert build is fetcher.return_value
+    assert fetcher.call_args[0][1] == "2024-01-01"
+
+
+def test_build_descriptor_resolve_task(mocker):
+    """Test that task descriptors resolve without an index lookup"""
+    fetcher = mocker.patch("autobisect.builds.Fetcher")
+    task = BuildTask("url", "queue", {"taskId": "abc", "rank": 1700000000})
+    descriptor = BuildDescriptor.from_task("central", task)
+    descriptor.resolve(BuildFlags(), "firefox", Platform("Linux", "x86_64"))
+    resolved = fetcher.call_args[0][1]
+    assert isinstance(resolved, BuildTask)
+    assert resolved.taskId == "abc"
+    assert resolved.rank == 1700000000
+
+
+def test_build_descriptor_serialization():
+    """Test that descriptors survive a round trip through to_dict"""
+    task = BuildTask("url", "queue", {"taskId": "abc", "rank": 1700000000})
+    descriptor = BuildDescriptor.from_task("central", task)
+    descriptor.changeset = "c" * 40
+    restored = BuildDescriptor.from_dict(descriptor.to_dict())
+    assert restored == descriptor
+    assert restored.timestamp == descriptor.timestamp
+    assert restored.changeset == descriptor.changeset
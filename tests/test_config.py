@@ -20,6 +20,7 @@ def test_config_init_no_config_file(tmp_path):
     )
     result = config.BisectionConfig()
     assert result.db_path == tmp_path / "autobisect.db"
+    assert result.results_path == tmp_path / "results.db"
     assert result.persist is True
     assert result.persist_limit == 31457280000
     assert result.store_path == tmp_path
@@ -0,0 +1,217 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# pylint: disable=protected-access
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fuzzfetch import BuildFlags, BuildTask, Fetcher, Platform
+
+from autobisect.builds import BuildDescriptor
+from autobisect.evaluators import EvaluatorResult, JSEvaluator
+from autobisect.index import BuildIndex
+
+from .test_bisect import MockBisector
+
+PLATFORM = Platform("Linux", "x86_64")
+QUEUE = BuildTask.TASKCLUSTER_API % ("queue",)
+
+
+def mock_build(mocker, age=timedelta(days=30)):
+    """Create a resolved build pushed the supplied time ago."""
+    pushed = datetime.now(timezone.utc) - age
+    build = mocker.Mock(spec=Fetcher)
+    build._branch = "central"
+    build._flags = BuildFlags()
+    build._platform = PLATFORM
+    build._task = BuildTask(
+        f"{QUEUE}/task/abc", QUEUE, {"taskId": "abc", "rank": int(pushed.timestamp())}
+    )
+    build._artifact_base = "public/build/target"
+    build.task_id = "abc"
+    build.changeset = "a" * 40
+    build.datetime = pushed
+    build.build_info = {
+        "buildid": pushed.strftime("%Y%m%d%H%M%S"),
+        "moz_source_stamp": "a" * 40,
+        "moz_source_repo": "https://hg.mozilla.org/mozilla-central",
+    }
+    return build
+
+
+def test_build_index_put_get(mocker, tmp_path):
+    """Test that indexed builds are restored without network access"""
+    get_url = mocker.patch("fuzzfetch.core.get_url")
+    index = BuildIndex(tmp_path / "index.db")
+    build = mock_build(mocker)
+    index.put("changeset", "a" * 40, build, "js")
+
+    restored = index.get("central", "changeset", "a" * 40, BuildFlags(), PLATFORM, "js")
+
+    assert isinstance(restored, Fetcher)
+    assert restored.changeset == "a" * 40
+    assert restored.id == build.build_info["buildid"]
+    assert restored.task_id == "abc"
+    assert restored.rank == build._task.rank
+    assert restored.artifact_url("json").endswith("/public/build/target.json")
+    assert get_url.call_count == 0
+
+
+def test_build_index_key(mocker, tmp_path):
+    """Test that builds are keyed by flags, platform and target"""
+    index = BuildIndex(tmp_path / "index.db")
+    index.put("changeset", "a" * 40, mock_build(mocker), "js")
+
+    for flags, platform, target in (
+        (BuildFlags(asan=True), PLATFORM, "js"),
+        (BuildFlags(), Platform("Windows", "x86_64"), "js"),
+        (BuildFlags(), PLATFORM, "firefox"),
+    ):
+        assert (
+            index.get("central", "changeset", "a" * 40, flags, platform, target) is None
+        )
+
+
+def test_build_index_recent_builds(mocker, tmp_path):
+    """Test that builds whose metadata may still change aren't indexed"""
+    index = BuildIndex(tmp_path / "index.db")
+    index.put("date", "2024-01-01", mock_build(mocker, timedelta(hours=1)), "js")
+
+    assert (
+        index.get("central", "date", "2024-01-01", BuildFlags(), PLATFORM, "js") is None
+    )
+
+
+@pytest.mark.parametrize("tasks", [0, 3])
+def test_build_index_tasks(tmp_path, tasks):
+    """Test that the tasks of past pushdates are indexed, even if there are none"""
+    index = BuildIndex(tmp_path / "index.db")
+    date = (datetime.now(timezone.utc) - timedelta(days=10)).strftime("%Y-%m-%d")
+    stored = [
+        BuildTask(f"{QUEUE}/task/{i}", QUEUE, {"taskId": str(i), "rank": i})
+        for i in range(tasks)
+    ]
+    assert index.get_tasks("central", date, BuildFlags(), PLATFORM) is None
+
+    index.put_tasks("central", date, BuildFlags(), PLATFORM, stored)
+    restored = index.get_tasks("central", date, BuildFlags(), PLATFORM)
+
+    assert restored is not None
+    assert [(t.taskId, t.rank, t.url) for t in restored] == [
+        (t.taskId, t.rank, t.url) for t in stored
+    ]
+
+
+def test_build_index_recent_tasks(tmp_path):
+    """Test that pushdates which may still receive builds aren't indexed"""
+    index = BuildIndex(tmp_path / "index.db")
+    date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    index.put_tasks("central", date, BuildFlags(), PLATFORM, [])
+
+    assert index.get_tasks("central", date, BuildFlags(), PLATFORM) is None
+
+
+def test_bisector_resolve_uses_index(mocker, tmp_path):
+    """Test that range entries are only resolved over the network once"""
+    build = mock_build(mocker)
+    resolve = mocker.patch.object(BuildDescriptor, "resolve", return_value=build)
+    mocker.patch("fuzzfetch.core.get_url")
+    bisector = MockBisector(datetime.now(), datetime.now())
+    bisector.index = BuildIndex(tmp_path / "index.db")
+    bisector.platform = PLATFORM
+
+    first = bisector._resolve(BuildDescriptor.from_changeset("central", "a" * 40))
+    second = bisector._resolve(BuildDescriptor.from_changeset("central", "a" * 40))
+
+    assert first is build
+    assert second.changeset == "a" * 40
+    assert resolve.call_count == 1
+
+
+def test_build_index_broken(mocker, tmp_path):
+    """Test that builds failing to launch are recorded for a limited time"""
+    index = BuildIndex(tmp_path / "index.db")
+    build = mock_build(mocker)
+    assert not index.is_broken(build, "js", "a")
+
+    index.mark_broken(build, "js", "a")
+    index.mark_broken(build, "js", "a")
+    assert index.is_broken(build, "js", "a")
+    assert not index.is_broken(build, "firefox", "a")
+    # Failures with other runtime flags or testcases don't apply
+    assert not index.is_broken(build, "js", "b")
+
+    mocker.patch("autobisect.index.BROKEN_MAX_AGE", timedelta(0))
+    assert not index.is_broken(build, "js", "a")
+
+
+def test_build_index_broken_legacy(mocker, tmp_path):
+    """Test that failures recorded without a fingerprint are discarded"""
+    con = sqlite3.connect(str(tmp_path / "index.db"))
+    con.execute(
+        "CREATE TABLE broken (branch TEXT, flags TEXT, platform TEXT, "
+        "target TEXT, changeset TEXT, failures INT, timestamp REAL)"
+    )
+    con.commit()
+    con.close()
+
+    index = BuildIndex(tmp_path / "index.db")
+    build = mock_build(mocker)
+    index.mark_broken(build, "js", "a")
+    assert index.is_broken(build, "js", "a")
+
+
+def test_bisector_skips_broken_builds(mocker, tmp_path):
+    """Test that builds which failed to launch elsewhere aren't downloaded"""
+    build = mock_build(mocker)
+    build.id = build.build_info["buildid"]
+    bisector = MockBisector(datetime.now(), datetime.now())
+    bisector.index = BuildIndex(tmp_path / "index.db")
+    bisector.build_manager = mocker.MagicMock()
+    bisector._launch_fingerprint = "a"
+    mocker.patch.object(
+        bisector.evaluator,
+        "evaluate_testcase",
+        return_value=EvaluatorResult.BUILD_FAILED,
+    )
+
+    assert bisector.test_build(build) == EvaluatorResult.BUILD_FAILED
+    assert bisector.test_build(build) == EvaluatorResult.BUILD_FAILED
+    assert bisector.build_manager.get_build.call_count == 1
+
+    # Boundaries are always launched
+    bisector.test_build(build, verify=True)
+    assert bisector.build_manager.get_build.call_count == 2
+
+    # Unless results of previous sessions are ignored
+    bisector.skip_broken = False
+    bisector.test_build(build)
+    assert bisector.build_manager.get_build.call_count == 3
+
+
+def test_bisector_shares_broken_builds(mocker, tmp_path):
+    """Test that launch failures are shared by testcases with the same flags"""
+    build = mock_build(mocker)
+    build.id = build.build_info["buildid"]
+    index = BuildIndex(tmp_path / "index.db")
+    bisectors = []
+    for name in ("a.js", "b.js"):
+        (tmp_path / name).write_text(name)
+        bisector = MockBisector(datetime.now(), datetime.now())
+        bisector.evaluator = JSEvaluator(tmp_path / name, flags=["--x"])
+        bisector._fingerprint = bisector.evaluator.fingerprint()
+        bisector._launch_fingerprint = bisector.evaluator.launch_fingerprint()
+        bisector.index = index
+        bisector.build_manager = mocker.MagicMock()
+        bisectors.append(bisector)
+    assert bisectors[0]._fingerprint != bisectors[1]._fingerprint
+    mocker.patch.object(
+        bisectors[0].evaluator,
+        "evaluate_testcase",
+        return_value=EvaluatorResult.BUILD_FAILED,
+    )
+
+    assert bisectors[0].test_build(build) == EvaluatorResult.BUILD_FAILED
+    assert bisectors[1].test_build(build) == EvaluatorResult.BUILD_FAILED
+    assert bisectors[1].build_manager.get_build.call_count == 0
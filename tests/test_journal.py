@@ -0,0 +1,37 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import pytest
+
+from autobisect.journal import BisectionJournal, JournalException
+
+
+def test_journal_record_events(tmp_path):
+    """Test that recorded events can be read back by a resumed session"""
+    journal = BisectionJournal(tmp_path / "sessions")
+    assert not journal.resumed
+    journal.record("session", branch="central")
+    journal.record("verified")
+
+    resumed = BisectionJournal(tmp_path / "sessions", journal.session)
+    assert resumed.resumed
+    assert resumed.events() == [
+        {"event": "session", "branch": "central"},
+        {"event": "verified"},
+    ]
+
+
+def test_journal_truncated_event(tmp_path):
+    """Test that a partially written event is ignored"""
+    journal = BisectionJournal(tmp_path)
+    journal.record("verified")
+    with journal.path.open("a") as fp:
+        fp.write('{"event": "pro')
+
+    assert journal.events() == [{"event": "verified"}]
+
+
+def test_journal_unknown_session(tmp_path):
+    """Test that resuming an unknown session raises"""
+    with pytest.raises(JournalException, match="Unable to find session"):
+        BisectionJournal(tmp_path, "missing")
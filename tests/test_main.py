@@ -36,6 +36,14 @@ def test_parse_args_invalid_target():
         (["firefox", "--log-level", "INVALID"], "Invalid log-level"),
         (["firefox", "--config", "404.ini"], "Cannot access configuration file!"),
         (["firefox", "--fuzzilli"], "Fuzzilli builds are not available for firefox"),
+        (["firefox", "--jobs", "0"], "--jobs must be at least 1"),
+        (["firefox", "--confidence", "1"], "--confidence must be between 0 and 1"),
+        (["firefox", "--result-max-age", "0"], "--result-max-age must be positive"),
+        (
+            ["firefox", "--probabilistic", "--jobs", "2"],
+            "--probabilistic cannot be combined with --jobs",
+        ),
+        (["firefox", "--batch", "--jobs", "2"], "--batch cannot be combined with"),
     ],
 )
 def test_parse_args_raises_with_invalid_args(capsys, tmp_path, args):
@@ -50,6 +58,59 @@ def test_parse_args_raises_with_invalid_args(capsys, tmp_path, args):
     assert args[1] in err
 
 
+@pytest.mark.parametrize("manifest", [True, False])
+def test_parse_args_batch(tmp_path, manifest):
+    """Test that parse_args collects the testcases of a batch"""
+    testcases = tmp_path / "testcases"
+    testcases.mkdir()
+    for name in ("b.js", "a.js", ".hidden"):
+        (testcases / name).touch()
+    path = testcases
+    if manifest:
+        path = tmp_path / "manifest.txt"
+        path.write_text("# comment\ntestcases/a.js\n\ntestcases/b.js\n")
+
+    args = parse_args(["js", "--batch", str(path)])
+    assert args.testcases == [testcases / "a.js", testcases / "b.js"]
+
+
+def test_parse_args_batch_empty(capsys, tmp_path):
+    """Test that parse_args raises when a batch contains no testcases"""
+    with pytest.raises(SystemExit):
+        parse_args(["js", "--batch", str(tmp_path)])
+
+    _, err = capsys.readouterr()
+    assert "No testcases found in batch!" in err
+
+
+def test_parse_args_serve(tmp_path):
+    """Test that parse_args accepts server and client arguments"""
+    sock = tmp_path / "server.sock"
+    args = parse_args(["serve", "--socket", str(sock), "--workers", "2"])
+    assert args.socket == sock
+    assert args.workers == 2
+
+    args = parse_args(["submit", "--socket", str(sock), "js", "testcase.js"])
+    assert args.job == ["js", "testcase.js"]
+
+
+@pytest.mark.parametrize(
+    "args, message",
+    [
+        (["serve", "--workers", "0"], "--workers must be at least 1"),
+        (["submit"], "A firefox or js bisection must be supplied"),
+        (["submit", "serve"], "A firefox or js bisection must be supplied"),
+    ],
+)
+def test_parse_args_serve_invalid(capsys, args, message):
+    """Test that parse_args raises when using invalid server or client arguments"""
+    with pytest.raises(SystemExit):
+        parse_args(args)
+
+    _, err = capsys.readouterr()
+    assert message in err
+
+
 @pytest.mark.skipif(platform.system() != "Windows", reason="Windows only")
 def test_parse_args_windows_defaults(mocker, tmp_path):
     """Test that parse_args sets the expected windows defaults"""
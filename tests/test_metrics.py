@@ -0,0 +1,96 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+from fuzzfetch import Fetcher
+
+from autobisect import metrics
+from autobisect.build_manager import BuildManager
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    """Record metrics for the duration of a test."""
+    monkeypatch.setattr(metrics, "_ENABLED", True)
+    yield
+    metrics.clear()
+
+
+def test_metrics_disabled():
+    """Test that nothing is recorded unless metrics are enabled"""
+    metrics.PROBES.inc(result="build_passed")
+    metrics.EVALUATION_SECONDS.observe(1.0)
+    assert metrics.PROBES.value(result="build_passed") == 0
+    assert metrics.EVALUATION_SECONDS.count() == 0
+
+
+def test_metrics_render(enabled):
+    """Test the Prometheus text format of counters and histograms"""
+    metrics.PROBES.inc(result="build_failed")
+    metrics.PROBES.inc(result="build_failed")
+    metrics.EVALUATION_SECONDS.observe(3.0)
+    with metrics.EVALUATION_SECONDS.time():
+        pass
+
+    text = metrics.render()
+    assert "# TYPE autobisect_probes_total counter" in text
+    assert 'autobisect_probes_total{result="build_failed"} 2.0' in text
+    assert "# TYPE autobisect_evaluation_seconds histogram" in text
+    assert 'autobisect_evaluation_seconds_bucket{le="1.0"} 1.0' in text
+    assert 'autobisect_evaluation_seconds_bucket{le="5.0"} 2.0' in text
+    assert 'autobisect_evaluation_seconds_bucket{le="+Inf"} 2.0' in text
+    assert "autobisect_evaluation_seconds_count 2.0" in text
+    assert metrics.EVALUATION_SECONDS.count() == 2
+
+
+def test_metrics_textfile(enabled, tmp_path):
+    """Test that the textfile is replaced without leaving temporary files"""
+    path = tmp_path / "autobisect.prom"
+    path.write_text("stale")
+    metrics.EVICTIONS.inc()
+    metrics.write_textfile(path)
+
+    assert "autobisect_evictions_total 1.0" in path.read_text()
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_metrics_server():
+    """Test that metrics are exposed over HTTP"""
+    try:
+        with metrics.MetricsServer(0) as server:
+            metrics.CACHE_HITS.inc(cache="build")
+            url = f"http://127.0.0.1:{server.port}"
+            with urlopen(f"{url}/metrics") as response:
+                text = response.read().decode()
+            with pytest.raises(HTTPError):
+                urlopen(f"{url}/other")
+    finally:
+        metrics._ENABLED = False  # pylint: disable=protected-access
+        metrics.clear()
+
+    assert 'autobisect_cache_hits_total{cache="build"} 1.0' in text
+
+
+def test_metrics_build_manager(enabled, mocker, config_fixture):
+    """Test that downloads and build store hits are counted"""
+    manager = BuildManager(config_fixture)
+    path = manager.build_dir / "firefox"
+    mocker.patch.object(manager, "build_path", return_value=path)
+    build = mocker.Mock(spec=Fetcher)
+    build.extract_build.side_effect = lambda p: (
+        p.mkdir(),
+        (p / "firefox").write_bytes(b"x" * 10),
+    )
+
+    for _ in range(2):
+        with manager.get_build(build, "firefox"):
+            pass
+
+    assert build.extract_build.call_count == 1
+    assert metrics.CACHE_MISSES.value(cache="build") == 1
+    assert metrics.CACHE_HITS.value(cache="build") == 1
+    assert metrics.DOWNLOAD_BYTES.value() == 10
+    assert metrics.DOWNLOAD_SECONDS.count() == 1
@@ -0,0 +1,71 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+import threading
+
+from autobisect.pipeline import ProbePipeline
+
+
+def test_pipeline_speculation_is_reused():
+    """Test that speculatively resolved and downloaded builds are reused"""
+    resolved = []
+    fetched = threading.Event()
+
+    def resolve(entry):
+        resolved.append(entry)
+        return f"build-{entry}"
+
+    with ProbePipeline(resolve, lambda build: fetched.set()) as pipeline:
+        pipeline.speculate("a", 1, True)
+        assert fetched.wait(5)
+        assert pipeline.fetched("a")
+        assert not pipeline.fetched("b")
+        assert pipeline.resolve("a") == "build-a"
+        assert pipeline.resolve("b") == "build-b"
+
+    assert resolved == ["a", "b"]
+
+
+def test_pipeline_retain(mocker):
+    """Test that queued work outside of the range is abandoned"""
+    mocker.patch("autobisect.pipeline.RESOLVE_WORKERS", 1)
+    started = threading.Event()
+    gate = threading.Event()
+    resolved = []
+
+    def resolve(entry):
+        resolved.append(entry)
+        started.set()
+        assert gate.wait(5)
+        return entry
+
+    with ProbePipeline(resolve, lambda build: None) as pipeline:
+        pipeline.speculate("a", 1, False)
+        assert started.wait(5)
+        pipeline.speculate("b", 2, False)
+        pipeline.speculate("c", 2, False)
+        pipeline.retain(["a", "c"])
+        gate.set()
+        assert pipeline.resolve("c") == "c"
+
+    assert resolved == ["a", "c"]
+
+
+def test_pipeline_speculation_failure(caplog):
+    """Test that failed speculative work is retried on demand"""
+    calls = []
+
+    def resolve(entry):
+        calls.append(entry)
+        if len(calls) == 1:
+            raise OSError("unreachable")
+        return entry
+
+    with ProbePipeline(resolve, lambda build: None) as pipeline:
+        pipeline.speculate("a", 1, True)
+        while "Failed to prefetch" not in caplog.text:
+            threading.Event().wait(0.01)
+        assert pipeline.resolve("a") == "a"
+
+    assert calls == ["a", "a"]
+    assert "Failed to prefetch a: unreachable" in caplog.text
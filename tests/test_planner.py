@@ -0,0 +1,61 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+from datetime import datetime
+
+import pytest
+
+from autobisect.planner import (
+    DAILY,
+    PUSHDATE,
+    TIMELINE,
+    StrategyPlanner,
+    expected_probes,
+)
+
+
+@pytest.mark.parametrize(
+    "candidates, expected", [(0, 0), (0.5, 0), (1, 1), (3, 2), (4, 3), (1000, 10)]
+)
+def test_expected_probes(candidates, expected):
+    """Test the number of probes needed to bisect a range"""
+    assert expected_probes(candidates) == expected
+
+
+def test_planner_estimate():
+    """Test that candidates exclude the boundaries"""
+    counts = StrategyPlanner.estimate(
+        datetime(2024, 1, 1, 23), datetime(2024, 1, 5, 1), 10, 40
+    )
+    assert counts == {DAILY: 3, PUSHDATE: 9, TIMELINE: 39}
+    counts = StrategyPlanner.estimate(datetime(2024, 1, 1), datetime(2024, 1, 2))
+    assert counts == {DAILY: 0, PUSHDATE: None, TIMELINE: None}
+
+
+@pytest.mark.parametrize(
+    "counts, expected",
+    [
+        # Unknown counts keep every phase which may reduce the range
+        ({DAILY: 30, PUSHDATE: None, TIMELINE: None}, [DAILY, PUSHDATE, TIMELINE]),
+        ({DAILY: 30, PUSHDATE: None}, [DAILY, PUSHDATE]),
+        # Empty phases are skipped
+        ({DAILY: 0, PUSHDATE: 0, TIMELINE: 5}, [TIMELINE]),
+        ({DAILY: 0, PUSHDATE: 0, TIMELINE: 0}, []),
+        # Bisecting a few changesets directly needs fewer probes
+        ({DAILY: 2, PUSHDATE: 8, TIMELINE: 20}, [TIMELINE]),
+        # Pushdate builds can't be enumerated for ranges spanning several days
+        ({DAILY: 2, PUSHDATE: 8, TIMELINE: None}, [DAILY, PUSHDATE, TIMELINE]),
+    ],
+)
+def test_planner_plan(counts, expected):
+    """Test phase selection"""
+    assert StrategyPlanner().plan(counts) == expected
+
+
+def test_planner_cost():
+    """Test that each phase only bisects a single interval of the previous one"""
+    planner = StrategyPlanner()
+    counts = {DAILY: 3, PUSHDATE: 15, TIMELINE: 63}
+    # 2 daily, 2 pushdate and 2 timeline probes plus one transition per phase
+    assert planner.cost([DAILY, PUSHDATE, TIMELINE], counts) == 9
+    assert planner.cost([TIMELINE], counts) == 7
@@ -0,0 +1,76 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import pytest
+
+from autobisect.probabilistic import (
+    ProbabilisticBisection,
+    entropy,
+    required_repeats,
+    wilson_lower_bound,
+)
+
+
+def test_entropy():
+    """Test binary entropy boundaries"""
+    assert entropy(0) == 0
+    assert entropy(1) == 0
+    assert entropy(0.5) == pytest.approx(1)
+
+
+def test_wilson_lower_bound():
+    """Test that the lower bound is conservative and tightens with more trials"""
+    assert wilson_lower_bound(0, 0, 0.95) == 0
+    assert wilson_lower_bound(0, 10, 0.95) == 0
+    assert 0 < wilson_lower_bound(5, 10, 0.95) < 0.5
+    assert wilson_lower_bound(5, 10, 0.95) < wilson_lower_bound(50, 100, 0.95)
+
+
+@pytest.mark.parametrize(
+    "rate, expected",
+    [(0, 20), (1, 1), (0.5, 5), (0.2, 14), (0.01, 20)],
+)
+def test_required_repeats(rate, expected):
+    """Test the number of passes required to rule out a crash"""
+    assert required_repeats(rate, 0.95, 20) == expected
+
+
+def test_probabilistic_bisection_midpoint():
+    """Test that the first probe of a uniform posterior splits the range"""
+    model = ProbabilisticBisection(9, 1.0)
+    assert model.best_probe == 4
+    assert model.confidence == pytest.approx(0.1)
+
+
+@pytest.mark.parametrize("find_fix", [True, False])
+def test_probabilistic_bisection_update(find_fix):
+    """Test that crashes are conclusive and passes only shift the weights"""
+    model = ProbabilisticBisection(4, 0.5, find_fix)
+    model.update(1, crashed=True)
+    if find_fix:
+        assert model.weights[:2] == [0, 0]
+    else:
+        assert model.weights[2:] == [0, 0, 0]
+
+    model = ProbabilisticBisection(4, 0.5, find_fix)
+    prior = model.crash_probability(1)
+    model.update(1, crashed=False)
+    assert all(w > 0 for w in model.weights)
+    assert model.crash_probability(1) < prior
+
+
+def test_probabilistic_bisection_perfect_sensitivity():
+    """Test that a fully reproducible testcase behaves like binary bisection"""
+    model = ProbabilisticBisection(3, 1.0)
+    model.update(1, crashed=False)
+    model.update(2, crashed=True)
+    assert model.first_bad == 2
+    assert model.confidence == pytest.approx(1)
+
+
+def test_probabilistic_bisection_remove():
+    """Test that removing a build keeps the posterior normalized"""
+    model = ProbabilisticBisection(4, 0.5)
+    model.remove(1)
+    assert len(model) == 3
+    assert sum(model.weights) == pytest.approx(1)
@@ -0,0 +1,58 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+import pytest
+from fuzzfetch import BuildFlags, BuildTask, Platform
+
+from autobisect.index import IndexedFetcher
+from autobisect.recording import (
+    RecordingException,
+    build_from_dict,
+    build_to_dict,
+    is_recording,
+    read_recording,
+    record,
+    recording,
+)
+
+
+def test_build_round_trip():
+    """Test that recorded builds are restored without network access"""
+    flags = BuildFlags()
+    platform = Platform("Linux", "x86_64")
+    build = IndexedFetcher(
+        "autoland",
+        BuildTask("url", "queue", {"taskId": "task", "rank": 3}),
+        flags,
+        "js",
+        platform,
+        {"buildid": "20240101000000", "moz_source_stamp": "a" * 40},
+        "public/build/target",
+    )
+    restored = build_from_dict(
+        build_to_dict(build), flags, platform, "js", IndexedFetcher
+    )
+
+    assert restored.changeset == build.changeset
+    assert restored.datetime == build.datetime
+    assert restored.task_id == "task"
+    assert restored._branch == "autoland"  # pylint: disable=protected-access
+
+
+def test_recording(tmp_path):
+    """Test that events are only recorded within a recording"""
+    path = tmp_path / "recording.jsonl"
+    record("ignored")
+    with recording(path):
+        assert is_recording()
+        record("download", changeset="abc", size=1)
+    assert not is_recording()
+
+    events = read_recording(path)
+    assert [event["event"] for event in events] == ["download"]
+    assert events[0]["changeset"] == "abc"
+    assert events[0]["time"] >= 0
+
+    path.write_text("not json\n")
+    with pytest.raises(RecordingException, match="Unable to read recording"):
+        read_recording(path)
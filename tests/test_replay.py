@@ -0,0 +1,118 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+import json
+from datetime import timedelta
+
+import pytest
+from fuzzfetch import BuildFlags, Platform
+
+from autobisect.bisect import BisectionResult, Bisector
+from autobisect.builds import BuildDescriptor
+from autobisect.main import main
+from autobisect.recording import RecordingException, recording
+from autobisect.replay import Replay, format_replay
+from autobisect.simulation import Scenario, Simulation, SimulatedEvaluator
+from autobisect.timeline import Push
+
+
+@pytest.fixture
+def recorded(mocker, tmp_path):
+    """A bisection of synthetic builds recorded with the network mocked"""
+    simulation = Simulation(
+        Scenario("test", "test", builds=16, regression=11), time_scale=0.0001
+    )
+    builds = simulation.builds
+    pushes = [
+        Push(i, build.datetime, [build.changeset]) for i, build in enumerate(builds)
+    ]
+    mocker.patch("autobisect.bisect.get_pushes", return_value=pushes[1:])
+    mocker.patch.object(
+        BuildDescriptor,
+        "resolve",
+        autospec=True,
+        side_effect=lambda entry, *_: simulation.by_changeset[entry.identifier],
+    )
+
+    config = tmp_path / "autobisect.ini"
+    config.write_text(
+        f"[autobisect]\nstorage-path: {tmp_path}\npersist: true\n"
+        "persist-limit: 30000\n"
+    )
+    path = tmp_path / "recording.jsonl"
+    with recording(path):
+        result = Bisector(
+            SimulatedEvaluator(simulation),
+            "central",
+            builds[0],
+            builds[-1],
+            BuildFlags(),
+            Platform("Linux", "x86_64"),
+            config=config,
+            result_cache=False,
+        ).bisect()
+
+    assert result.status == BisectionResult.SUCCESS
+    assert result.end.changeset == builds[11].changeset
+    mocker.stopall()
+    return path
+
+
+def test_recording_events(recorded):
+    """Test that every input of the bisection is recorded"""
+    events = [json.loads(line) for line in recorded.read_text().splitlines()]
+    names = {event["event"] for event in events}
+
+    assert events[0]["event"] == "bisection"
+    assert events[-1]["event"] == "result"
+    assert {"pushes", "lookup", "download", "evaluation"} <= names
+    assert all(event["time"] >= 0 for event in events)
+
+
+def test_replay_instant(recorded):
+    """Test that a replay reaches the recorded result with the recorded cost"""
+    replay = Replay(recorded, time_scale=0)
+    result = replay.run()
+
+    assert result.located
+    assert result.unrecorded == 0
+    assert result.replayed["probes"] == result.recorded["probes"]
+    assert result.replayed["downloads"] == result.recorded["downloads"]
+    assert "Same result: yes" in format_replay(result)
+
+
+def test_replay_missing_evaluations(recorded, tmp_path):
+    """Test that evaluations missing from a recording are inferred"""
+    edited = tmp_path / "edited.jsonl"
+    lines = recorded.read_text().splitlines()
+    edited.write_text(
+        "\n".join(line for line in lines if '"evaluation"' not in line) + "\n"
+    )
+
+    result = Replay(edited, time_scale=0).run()
+    assert result.located
+    assert result.unrecorded == result.replayed["probes"]
+
+
+def test_replay_scaled(recorded):
+    """Test that recorded durations are replayed at the requested scale"""
+    result = Replay(recorded, time_scale=0.5).run()
+    assert result.located
+    recorded_time = timedelta(seconds=result.recorded["wall_time"])
+    assert timedelta(seconds=result.replayed["wall_time"]) >= recorded_time / 2
+
+
+def test_replay_without_bisection(tmp_path):
+    """Test that recordings without a bisection are rejected"""
+    path = tmp_path / "empty.jsonl"
+    path.write_text('{"event": "download", "time": 0}\n')
+    with pytest.raises(RecordingException, match="doesn't contain a bisection"):
+        Replay(path)
+
+
+def test_replay_main(mocker, recorded):
+    """Test the replay subcommand"""
+    mocker.patch("autobisect.main.configure_logging")
+    assert main(["replay", str(recorded), "--instant"]) == 0
+    with pytest.raises(SystemExit):
+        main(["replay", str(recorded.parent / "missing.jsonl")])
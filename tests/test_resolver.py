@@ -0,0 +1,16 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import time
+
+from autobisect.resolver import resolve_concurrently
+
+
+def test_resolve_concurrently_preserves_order():
+    """Test that results are returned in the order of the supplied items"""
+
+    def _resolve(item):
+        time.sleep(0.01 * (5 - item))
+        return item * 2
+
+    assert resolve_concurrently(_resolve, range(5), max_workers=5) == [0, 2, 4, 6, 8]
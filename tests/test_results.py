@@ -0,0 +1,46 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+from datetime import timedelta
+
+import pytest
+from fuzzfetch import BuildFlags, Platform
+
+from autobisect import EvaluatorResult
+from autobisect.results import ResultCache
+
+PLATFORM = Platform("Linux", "x86_64")
+
+
+@pytest.mark.parametrize("result", EvaluatorResult)
+def test_result_cache_put_get(tmp_path, result):
+    """Test that reproducible results are stored and launch failures are not"""
+    cache = ResultCache(tmp_path / "results.db")
+    cache.put("abc", "rev", BuildFlags(), PLATFORM, result)
+
+    stored = cache.get("abc", "rev", BuildFlags(), PLATFORM)
+    if result == EvaluatorResult.BUILD_FAILED:
+        assert stored is None
+    else:
+        assert stored == result
+
+
+def test_result_cache_key(tmp_path):
+    """Test that results are keyed by flags and platform"""
+    cache = ResultCache(tmp_path / "results.db")
+    cache.put("abc", "rev", BuildFlags(), PLATFORM, EvaluatorResult.BUILD_CRASHED)
+
+    assert cache.get("abc", "rev", BuildFlags(asan=True), PLATFORM) is None
+    assert cache.get("abc", "rev", BuildFlags(), Platform("Windows")) is None
+    assert cache.get("def", "rev", BuildFlags(), PLATFORM) is None
+
+
+def test_result_cache_expire(tmp_path, mocker):
+    """Test that old results are discarded"""
+    cache = ResultCache(tmp_path / "results.db")
+    mocker.patch("autobisect.results.time.time", return_value=0)
+    cache.put("abc", "rev", BuildFlags(), PLATFORM, EvaluatorResult.BUILD_PASSED)
+    mocker.stopall()
+
+    cache = ResultCache(tmp_path / "results.db", timedelta(days=1))
+    assert cache.get("abc", "rev", BuildFlags(), PLATFORM) is None
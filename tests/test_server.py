@@ -0,0 +1,208 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+import contextvars
+import logging
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from fuzzfetch import BuildFlags, BuildSearchOrder, Platform
+
+from autobisect import BrowserEvaluator
+from autobisect.bisect import BisectionResult
+from autobisect.server import (
+    BisectionServer,
+    ServerException,
+    SharedState,
+    absolute_paths,
+    submit,
+)
+
+from .test_bisect import MockFetcher
+
+
+@pytest.fixture
+def serve(tmp_path, mocker):
+    """Run a server using the supplied runner in a background thread."""
+    servers = []
+
+    def start(runner):
+        shared = mocker.Mock(spec=SharedState)
+        server = BisectionServer(tmp_path / "server.sock", 1, runner, shared)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        servers.append((server, thread))
+        return server
+
+    yield start
+    for server, thread in servers:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def test_server_submit(serve, caplog):
+    """Test that log records and results are streamed to the client"""
+    received = []
+
+    def runner(argv, _shared):
+        received.append(argv)
+        log = logging.getLogger("autobisect.bisect")
+        log.info("Testing build abc")
+        with ThreadPoolExecutor() as executor:
+            run = contextvars.copy_context().run
+            executor.submit(run, log.info, "Testing build def").result()
+        result = BisectionResult(
+            BisectionResult.SUCCESS,
+            MockFetcher(changeset="a"),
+            MockFetcher(changeset="b"),
+            "central",
+        )
+        return [(BrowserEvaluator(Path("testcase.html")), result)]
+
+    server = serve(runner)
+    caplog.set_level(logging.INFO)
+
+    assert submit(server.path, ["firefox", "--flag"]) == 0
+    assert received == [["firefox", "--flag"]]
+    messages = [r.message for r in caplog.records if r.name == "autobisect.server"]
+    assert "Queued as job 1" in messages
+    assert "Testing build abc" in messages
+    # Records of threads working on behalf of the job are forwarded as well
+    assert "Testing build def" in messages
+    assert "testcase.html: success (a - b)" in messages
+
+
+@pytest.mark.parametrize("error", [SystemExit(2), ValueError("boom")])
+def test_server_submit_error(serve, error):
+    """Test that failing jobs are reported to the client"""
+
+    def runner(_argv, _shared):
+        raise error
+
+    server = serve(runner)
+    assert submit(server.path, ["js"]) == 1
+
+
+def test_server_already_running(serve, mocker, caplog):
+    """Test that a second server can't listen on the same socket"""
+    server = serve(lambda *_: [])
+    handled = threading.Event()
+    shutdown_request = server.shutdown_request
+
+    def close(request):
+        shutdown_request(request)
+        handled.set()
+
+    mocker.patch.object(server, "shutdown_request", side_effect=close)
+    with pytest.raises(ServerException, match="already listening"):
+        BisectionServer(server.path, 1, lambda *_: [], server.shared)
+
+    # The running server ignores the probing connection
+    assert handled.wait(5)
+    assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+
+
+def test_server_client_disconnected(serve, mocker, caplog):
+    """Test that jobs of clients disconnecting after submitting keep running"""
+    done = threading.Event()
+    server = serve(lambda *_: done.set() or [])
+    handled = threading.Event()
+    shutdown_request = server.shutdown_request
+
+    def close(request):
+        shutdown_request(request)
+        handled.set()
+
+    mocker.patch.object(server, "shutdown_request", side_effect=close)
+    mocker.patch(
+        "autobisect.server._JobHandler._send", autospec=True, return_value=False
+    )
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(server.path))
+        sock.sendall(b'{"argv": ["js"]}\n')
+
+    assert handled.wait(5)
+    assert done.is_set()
+    assert "Client of job 1 disconnected" in caplog.messages
+    assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+
+
+def test_server_stale_socket(tmp_path, mocker):
+    """Test that a socket left behind by a dead server is replaced"""
+    path = tmp_path / "server.sock"
+    path.touch()
+    server = BisectionServer(path, 1, lambda *_: [], mocker.Mock())
+    server.server_close()
+    assert not path.exists()
+
+
+def test_submit_no_server(tmp_path):
+    """Test that an unreachable server raises"""
+    with pytest.raises(ServerException, match="Unable to connect"):
+        submit(tmp_path / "missing.sock", ["js"])
+
+
+def test_shared_state_boundary(mocker, config_fixture):
+    """Test that explicit boundaries are only resolved once"""
+    fetcher = mocker.patch("autobisect.server.Fetcher")
+    shared = SharedState(config_fixture)
+    platform = Platform("Linux", "x86_64")
+    for _ in range(2):
+        shared.boundary(
+            "central", "abc", BuildFlags(), platform, "js", BuildSearchOrder.ASC
+        )
+    shared.boundary(
+        "central", "abc", BuildFlags(), platform, "js", BuildSearchOrder.DESC
+    )
+
+    assert fetcher.call_count == 2
+
+
+def test_shared_state_boundary_concurrent(mocker, config_fixture):
+    """Test that a slow boundary lookup doesn't block other boundaries"""
+    release = threading.Event()
+
+    def fetcher(_branch, build_id, *_args, **_kwargs):
+        if build_id == "slow":
+            assert release.wait(5)
+        return build_id
+
+    mocker.patch("autobisect.server.Fetcher", side_effect=fetcher)
+    shared = SharedState(config_fixture)
+    args = (BuildFlags(), Platform("Linux", "x86_64"), "js", BuildSearchOrder.ASC)
+    thread = threading.Thread(target=shared.boundary, args=("central", "slow", *args))
+    thread.start()
+    try:
+        assert shared.boundary("central", "fast", *args) == "fast"
+        assert thread.is_alive()
+    finally:
+        release.set()
+        thread.join(5)
+
+
+def test_absolute_paths(tmp_path, monkeypatch):
+    """Test that existing relative paths are made absolute"""
+    (tmp_path / "testcase.js").touch()
+    monkeypatch.chdir(tmp_path)
+
+    assert absolute_paths(["js", "testcase.js", "--start", "2024-01-01"]) == [
+        "js",
+        str(tmp_path / "testcase.js"),
+        "--start",
+        "2024-01-01",
+    ]
+
+
+def test_absolute_paths_output(tmp_path, monkeypatch):
+    """Test that output paths are made absolute even if they don't exist yet"""
+    monkeypatch.chdir(tmp_path)
+
+    assert absolute_paths(["--trace", "a.json", "--trace=b.jsonl"]) == [
+        "--trace",
+        str(tmp_path / "a.json"),
+        f"--trace={tmp_path / 'b.jsonl'}",
+    ]
@@ -0,0 +1,67 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+import json
+import math
+
+import pytest
+
+from autobisect.main import main, parse_args
+from autobisect.simulation import STRATEGIES, Scenario, Simulation
+
+TIME_SCALE = 0.0001
+
+
+@pytest.mark.parametrize("strategy", list(STRATEGIES))
+def test_simulation_strategies(strategy):
+    """Test that every strategy locates a deterministic regression"""
+    scenario = Scenario("test", "test", builds=32, download=10.0, evaluation=5.0)
+    result = Simulation(scenario, time_scale=TIME_SCALE).run(strategy)
+
+    assert result.located
+    assert result.probes > 2
+    if strategy != "parallel":
+        # Concurrent probes are cancelled before evaluating once they are obsolete
+        assert result.evaluations >= result.probes
+    assert result.downloads >= result.wasted_downloads
+    if strategy == "midpoint":
+        # Both boundaries are verified before bisecting the 30 builds between them
+        assert result.probes <= 2 + math.ceil(math.log2(31))
+
+
+def test_simulation_broken_runs():
+    """Test that builds failing to launch are bisected around"""
+    scenario = Scenario("test", "test", builds=32, regression=20, broken=((15, 5),))
+    assert scenario.expected_start == 14
+
+    result = Simulation(scenario, time_scale=TIME_SCALE).run("midpoint")
+    assert result.located
+
+
+def test_simulation_is_reproducible():
+    """Test that flaky results only depend on the seed"""
+    scenario = Scenario("test", "test", builds=32, reproducibility=0.5)
+    results = [
+        Simulation(scenario, seed=seed, time_scale=TIME_SCALE).run("midpoint")
+        for seed in (1, 1)
+    ]
+    assert results[0].probes == results[1].probes
+    assert results[0].located == results[1].located
+
+
+def test_simulate_main(capsys, mocker, tmp_path):
+    """Test the simulate subcommand"""
+    mocker.patch("autobisect.main.configure_logging")
+    mocker.patch(
+        "autobisect.simulation.SCENARIOS",
+        {"test": Scenario("test", "test", builds=16)},
+    )
+    output = tmp_path / "results.json"
+    argv = ["simulate", "--strategy", "midpoint", "--time-scale", "0.0001"]
+
+    assert parse_args(argv).scenario is None
+    assert main(argv + ["--json", str(output)]) == 0
+    assert capsys.readouterr().out.splitlines()[1].startswith("test")
+    results = json.loads(output.read_text())
+    assert [(r["scenario"], r["strategy"]) for r in results] == [("test", "midpoint")]
+    assert results[0]["located"]
@@ -0,0 +1,61 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+from datetime import datetime, timezone
+
+import requests
+
+from autobisect.builds import BuildDescriptor
+from autobisect.timeline import Push, build_timeline, get_pushes
+
+
+def test_build_timeline_order():
+    """Test that merged changesets precede the central build of their push"""
+    first = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    second = datetime(2024, 1, 2, tzinfo=timezone.utc)
+    pushes = [Push(1, first, ["a", "b", "c"]), Push(2, second, ["d"])]
+
+    builds = build_timeline(pushes)
+
+    assert [(b.branch, b.changeset) for b in builds] == [
+        ("autoland", "a"),
+        ("autoland", "b"),
+        ("central", "c"),
+        ("central", "d"),
+    ]
+    assert all(b.kind == BuildDescriptor.CHANGESET for b in builds)
+    assert [b.timestamp for b in builds] == [first, first, first, second]
+
+
+def test_build_timeline_exclude():
+    """Test that excluded changesets are left out"""
+    pushes = [Push(1, datetime.now(), ["a", "b"]), Push(2, datetime.now(), ["c"])]
+
+    builds = build_timeline(pushes, ("b", "c"))
+
+    assert [b.changeset for b in builds] == ["a"]
+
+
+def test_get_pushes_order(mocker):
+    """Test that pushes are ordered by numeric push id"""
+    response = mocker.patch("autobisect.timeline.requests.get").return_value
+    response.json.return_value = {
+        "10": {"changesets": ["c"], "date": 1700000100},
+        "9": {"changesets": ["a", "b"], "date": 1700000000},
+    }
+
+    pushes = get_pushes("x", "y")
+
+    assert pushes is not None
+    assert [p.push_id for p in pushes] == [9, 10]
+    assert [p.head for p in pushes] == ["b", "c"]
+    assert pushes[0].timestamp == datetime.fromtimestamp(1700000000, tz=timezone.utc)
+
+
+def test_get_pushes_error(mocker):
+    """Test that None is returned when the pushlog is unavailable"""
+    mocker.patch(
+        "autobisect.timeline.requests.get",
+        side_effect=requests.exceptions.ConnectionError("offline"),
+    )
+    assert get_pushes("x", "y") is None
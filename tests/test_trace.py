@@ -0,0 +1,56 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+import contextvars
+import json
+import threading
+
+import pytest
+
+from autobisect.trace import span, tracing
+
+
+def test_span_without_tracer():
+    """Test that spans are not recorded unless tracing is enabled"""
+    with tracing(None), span("probe", "bisect", build="a") as details:
+        details["result"] = "passed"
+    assert details == {"build": "a", "result": "passed"}
+
+
+def test_tracing_chrome(tmp_path):
+    """Test that a Chrome trace is written with a timeline per thread"""
+    path = tmp_path / "trace.json"
+
+    def run():
+        with span("run", "evaluate", run=0):
+            pass
+
+    with tracing(path):
+        with span("probe", "bisect", build="a") as details:
+            details["result"] = "passed"
+        with span("download", "download"):
+            context = contextvars.copy_context()
+            thread = threading.Thread(target=context.run, args=(run,))
+            thread.start()
+            thread.join()
+
+    events = json.loads(path.read_text())
+    spans = [event for event in events if event["ph"] == "X"]
+    assert [event["name"] for event in spans] == ["probe", "run", "download"]
+    assert spans[0]["tid"] == spans[2]["tid"] != spans[1]["tid"]
+    assert spans[0]["args"] == {"build": "a", "result": "passed"}
+    assert spans[0]["dur"] >= 0
+    assert len([event for event in events if event["ph"] == "M"]) == 2
+
+
+def test_tracing_jsonl(tmp_path):
+    """Test that JSON lines traces are appended to and record errors"""
+    path = tmp_path / "trace.jsonl"
+    with tracing(path), span("bisection", "bisect"):
+        pass
+    with pytest.raises(OSError), tracing(path), span("download", "download"):
+        raise OSError("unreachable")
+
+    events = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [event["name"] for event in events] == ["bisection", "download"]
+    assert events[1]["args"] == {"error": "OSError"}